@@ -0,0 +1,662 @@
+"""Headless benchmark entry point
+
+Runs parts of the game without a window or sound device, using SDL's dummy
+video and audio drivers, and reports timings as JSON.
+
+Usage examples:
+    python benchmark.py level --map tutorial_1 --map test_map --frames 600
+    python benchmark.py level --stress-enemies 100 --render
+    python benchmark.py level --map tutorial_4 --profile-dir profiles
+    python benchmark.py level --map tutorial_1 --frames 300 --tick-rate 30
+    python benchmark.py screens --repeat 100
+    python benchmark.py projectiles --counts 100 1000 10000
+    python benchmark.py replay recordings
+    python benchmark.py blit --repeat 2000"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+from time import perf_counter
+
+# use dummy drivers so no window or audio device is needed, this must be done
+# before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+
+# screens a level can hand over to, as passed by Program.level_main
+LEVEL_SCREENS = ("pause", "level_complete", "level_fail", "quit")
+
+
+def setup_display():
+    """Initialise pygame and set up a (dummy) display surface so images can be
+    converted to the display format as they are in game."""
+    from utils._settings import WINDOW_WIDTH, WINDOW_HEIGHT
+
+    pygame.init()
+    return pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+
+def percentile(sorted_values, percent):
+    """Return the given percentile of a sorted list using the nearest-rank
+    method."""
+    if not sorted_values:
+        return 0
+    rank = max(int(round(percent / 100 * len(sorted_values))), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarise(frame_times, per_frame=False, label="frames"):
+    """Return a dictionary of statistics for a list of frame times in
+    milliseconds. label names the count of times in the report."""
+    ordered = sorted(frame_times)
+    summary = {label: len(frame_times),
+               "mean_ms": sum(frame_times) / max(len(frame_times), 1),
+               "min_ms": ordered[0] if ordered else 0,
+               "max_ms": ordered[-1] if ordered else 0,
+               "p50_ms": percentile(ordered, 50),
+               "p90_ms": percentile(ordered, 90),
+               "p95_ms": percentile(ordered, 95),
+               "p99_ms": percentile(ordered, 99)}
+    if per_frame:
+        summary["frame_times_ms"] = frame_times
+    return summary
+
+
+# --------------- Scripted Input --------------- #
+
+def script_idle(frame):
+    """Scripted input: the player stands still."""
+    return []
+
+
+def script_patrol(frame):
+    """Scripted input: the player walks right and left, jumping now and then.
+    Returns the events to post on the given frame."""
+    events = []
+    phase = frame % 240
+    if phase == 0:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d))
+    elif phase == 120:
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_d))
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a))
+    elif phase == 239:
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_a))
+
+    if frame % 90 == 45:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_w))
+    elif frame % 90 == 50:
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_w))
+    return events
+
+
+def script_combat(frame):
+    """Scripted input: patrol while firing continuously."""
+    events = script_patrol(frame)
+    if frame % 20 == 0:
+        events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1,
+                                         pos=(0, 0)))
+    return events
+
+
+SCRIPTS = {"idle": script_idle,
+           "patrol": script_patrol,
+           "combat": script_combat}
+
+
+# --------------- Level Benchmark --------------- #
+
+def stress_map(enemies, screens=1):
+    """Return a (gamemap, gamemap_conf) pair the given number of windows wide
+    with a floor, a few platforms and the given number of small enemies
+    dropped in from above."""
+    from screens._level_main import NUMBEROFCOLUMNS, NUMBEROFROWS
+
+    columns = NUMBEROFCOLUMNS * screens
+    gamemap = [[0] * columns for _ in range(NUMBEROFROWS)]
+    gamemap[-1] = [1] * columns
+    for col in range(2, columns - 2, 4):
+        gamemap[NUMBEROFROWS // 2][col] = 1
+        gamemap[NUMBEROFROWS // 2][col + 1] = 1
+
+    # player bottom left, finish point top right
+    gamemap[-2][0] = 2
+    gamemap[0][-1] = 3
+
+    # fill the empty cells with enemies, row by row
+    placed = 0
+    for row in range(NUMBEROFROWS - 1):
+        for col in range(2, columns - 1):
+            if placed < enemies and gamemap[row][col] == 0:
+                gamemap[row][col] = 4
+                placed += 1
+    if placed < enemies:
+        raise Exception(f"Stress map only fits {placed} enemies")
+
+    gamemap_conf = {"custom": [],
+                    "enemies": [[20, 20, 150]] * enemies}
+    return gamemap, gamemap_conf
+
+
+def create_level(mapname, stress_enemies, clock, stress_screens=1, seed=0):
+    """Create the level to benchmark, either a map from maps/ or a synthetic
+    stress map stress_screens windows wide, with the given random seed."""
+    from screens._level_main import LevelMain, PLATFORMLENGTH
+    from utils._tile_map import TileMap
+
+    if stress_enemies is None:
+        return LevelMain(LEVEL_SCREENS, mapname, clock, seed)
+
+    class StressLevel(LevelMain):
+        """Level loaded from a generated stress map instead of a file."""
+        def load_map(self, map_name):
+            gamemap, self.gamemap_conf = stress_map(stress_enemies,
+                                                    stress_screens)
+            self.tilemap = TileMap.from_rows(gamemap, PLATFORMLENGTH)
+
+    return StressLevel(LEVEL_SCREENS, mapname, clock, seed)
+
+
+def benchmark_level(screen, mapname, frames, script, render=False,
+                    stress_enemies=None, seed=0, per_frame=False,
+                    profile_dir=None, tick_rate=None, stress_screens=1):
+    """Drive LevelMain.update for the given number of frames with scripted
+    input and return the frame time statistics. Levels that finish are reset
+    and carry on.
+
+    Each frame runs one simulation step at tick_rate (default the game's
+    TICK_RATE). Scripts are written for the tuned tick rate, so at other
+    rates each frame posts the script's events for the tuned steps it stands
+    for."""
+    from utils._game_clock import GameClock
+    from utils._renderer import Renderer
+    from utils._settings import GREEN, TICK_RATE
+
+    random.seed(seed)
+    pygame.event.clear()
+
+    # one simulation step per update, as fast as possible
+    if tick_rate is None:
+        tick_rate = TICK_RATE
+    clock = GameClock(tick_rate, fast_forward=True)
+
+    start = perf_counter()
+    level = create_level(mapname, stress_enemies, clock, stress_screens,
+                         seed)
+    load_time = (perf_counter() - start) * 1000
+
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+        level.profiler.open_csv(os.path.join(profile_dir,
+                                             f"profile_{mapname}.csv"))
+
+    renderer = None
+    if render:
+        renderer = Renderer(screen, GREEN)
+        renderer.set_sprites(level.sprites)
+        renderer.set_projectiles(level.projectiles)
+        renderer.set_camera(level.camera)
+
+    frame_times = []
+    resets = 0
+    for frame in range(frames):
+        first = round(frame * clock.step_scale)
+        last = round((frame + 1) * clock.step_scale)
+        for script_frame in range(first, last):
+            for event in SCRIPTS[script](script_frame):
+                pygame.event.post(event)
+
+        start = perf_counter()
+        next_screen = level.update()
+        if renderer is not None:
+            level.profiler.measure("draw", renderer.draw)
+            level.profiler.measure("flip", renderer.flip)
+            level.profiler.count("pixels_pushed", renderer.pixels_pushed)
+        frame_times.append((perf_counter() - start) * 1000)
+        level.profiler.end_frame()
+
+        if next_screen in ("level_complete", "level_fail"):
+            level.reset_level()
+            resets += 1
+            if renderer is not None:
+                renderer.repaint()
+
+    level.profiler.close_csv()
+
+    if stress_enemies is not None:
+        mapname = f"stress_{stress_enemies}"
+        if stress_screens > 1:
+            mapname += f"x{stress_screens}"
+    result = {"map": mapname,
+              "script": script,
+              "render": render,
+              "tick_rate": tick_rate,
+              "load_ms": load_time,
+              "resets": resets,
+              # cost of simulating (and drawing) one second of play
+              "ms_per_second": sum(frame_times) * tick_rate / frames}
+    result.update(summarise(frame_times, per_frame))
+    return result
+
+
+def run_level(args):
+    """Run the level benchmark for each requested map."""
+    screen = setup_display()
+
+    results = []
+    if args.stress_enemies is not None:
+        results.append(benchmark_level(screen, "stress", args.frames,
+                                       args.script, args.render,
+                                       args.stress_enemies, args.seed,
+                                       args.per_frame, args.profile_dir,
+                                       args.tick_rate, args.stress_screens))
+    for mapname in args.map or []:
+        results.append(benchmark_level(screen, mapname, args.frames,
+                                       args.script, args.render, None,
+                                       args.seed, args.per_frame,
+                                       args.profile_dir, args.tick_rate))
+    from utils._text import text_cache
+
+    return {"benchmark": "level", "results": results,
+            "text_cache": text_cache.stats()}
+
+
+# --------------- Screen Construction Benchmark --------------- #
+
+def benchmark_screen(name, repeat, per_frame=False):
+    """Construct a menu screen the given number of times and return the build
+    time statistics. The first build is reported separately as it includes
+    one-off work such as loading the font."""
+    from screens._leaderboard import Leaderboard
+    from screens._options import Options
+
+    # screens and the screen names they are constructed with in main.py
+    screens = {"leaderboard": (Leaderboard, ("root_menu",
+                                             "toggle_leaderboard", "quit")),
+               "options": (Options, ("quit", "back", "config_music",
+                                     "config_sound_effects"))}
+    screen_class, screen_names = screens[name]
+
+    build_times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        screen_class(screen_names)
+        build_times.append((perf_counter() - start) * 1000)
+
+    result = {"screen": name,
+              "first_ms": build_times[0] if build_times else 0}
+    result.update(summarise(build_times[1:], per_frame, label="builds"))
+    return result
+
+
+def run_screens(args):
+    """Run the screen construction benchmark for each requested screen."""
+    setup_display()
+
+    from utils._text import text_cache
+
+    results = [benchmark_screen(name, args.repeat, args.per_frame)
+               for name in args.screen or ["leaderboard", "options"]]
+    return {"benchmark": "screens", "results": results,
+            "text_cache": text_cache.stats()}
+
+
+# --------------- Projectile Benchmark --------------- #
+
+def benchmark_projectiles(screen, count, steps, enemies, render=False,
+                          seed=0, per_frame=False):
+    """Time moving a fixed number of live projectiles on a stress map. After
+    each step, projectiles that were removed are replaced with new ones fired
+    from random entities in random directions, so count stay live."""
+    from utils._game_clock import GameClock
+    from utils._renderer import Renderer
+    from utils._settings import GREEN
+
+    random.seed(seed)
+    level = create_level("stress", enemies, GameClock(fast_forward=True),
+                         seed=seed)
+    projectiles = level.projectiles
+    entities = list(level.entities)
+
+    renderer = None
+    if render:
+        renderer = Renderer(screen, GREEN)
+        renderer.set_sprites(level.sprites)
+        renderer.set_projectiles(projectiles)
+        renderer.set_camera(level.camera)
+
+    def top_up():
+        """Fire projectiles until count are live."""
+        while len(projectiles) < count:
+            entity = random.choice(entities)
+            angle = random.uniform(0, 2 * math.pi)
+            projectiles.add(entity, random.uniform(0, level.tilemap.width),
+                            random.uniform(0, level.tilemap.height),
+                            10 * math.cos(angle), 10 * math.sin(angle), 0)
+
+    step_times = []
+    removed = 0
+    for _ in range(steps):
+        top_up()
+        start = perf_counter()
+        level.entity_hash.rebuild(level.entities)
+        level.move_projectiles()
+        if renderer is not None:
+            renderer.draw()
+            renderer.flip()
+        step_times.append((perf_counter() - start) * 1000)
+        removed += count - len(projectiles)
+
+    result = {"projectiles": count,
+              "enemies": enemies,
+              "render": render,
+              "removed_per_step": removed / max(steps, 1)}
+    result.update(summarise(step_times, per_frame, label="steps"))
+    result["mean_us_per_projectile"] = result["mean_ms"] * 1000 / count
+    return result
+
+
+def run_projectiles(args):
+    """Run the projectile benchmark for each requested projectile count."""
+    screen = setup_display()
+
+    results = [benchmark_projectiles(screen, count, args.steps, args.enemies,
+                                     args.render, args.seed, args.per_frame)
+               for count in args.counts]
+    return {"benchmark": "projectiles", "results": results}
+
+
+# --------------- Replay Benchmark --------------- #
+
+def recording_paths(paths):
+    """Return the recording files among the given paths, expanding
+    directories into the JSON files they hold."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name)
+                         for name in sorted(os.listdir(path))
+                         if name.endswith(".json"))
+        else:
+            found.append(path)
+    return found
+
+
+def benchmark_replay(screen, path, render=False, per_frame=False):
+    """Replay a recording saved by the game (see RECORDING_DIRECTORY) one
+    step per frame as fast as possible, and return the frame time
+    statistics and whether the level passed through every recorded
+    checkpoint in the same state."""
+    from screens._level_main import LevelMain
+    from utils._game_clock import GameClock
+    from utils._input_recording import InputRecording
+    from utils._renderer import Renderer
+    from utils._settings import GREEN
+
+    recording = InputRecording.load(path)
+    pygame.event.clear()
+
+    start = perf_counter()
+    level = LevelMain(LEVEL_SCREENS, recording.map_name,
+                      GameClock(recording.tick_rate, fast_forward=True),
+                      recording.seed)
+    load_time = (perf_counter() - start) * 1000
+    level.replay_input(recording)
+
+    renderer = None
+    if render:
+        renderer = Renderer(screen, GREEN)
+        renderer.set_sprites(level.sprites)
+        renderer.set_projectiles(level.projectiles)
+        renderer.set_camera(level.camera)
+
+    # screens the level hands over to are skipped, pausing doesn't change
+    # the simulation and resets after the level ends are replayed
+    frame_times = []
+    for _ in range(recording.steps):
+        start = perf_counter()
+        level.update()
+        if renderer is not None:
+            renderer.draw()
+            renderer.flip()
+        frame_times.append((perf_counter() - start) * 1000)
+
+    # the end isn't always a whole second of steps
+    recording.check(level.steps, level.fingerprint())
+    result = {"recording": path,
+              "map": recording.map_name,
+              "render": render,
+              "tick_rate": recording.tick_rate,
+              "load_ms": load_time,
+              "checkpoints": len(recording.checkpoints),
+              "matches": recording.diverged_at is None,
+              "diverged_at_step": recording.diverged_at,
+              "ms_per_second": (sum(frame_times) * recording.tick_rate /
+                                max(recording.steps, 1))}
+    result.update(summarise(frame_times, per_frame))
+    return result
+
+
+def run_replay(args):
+    """Replay each requested recording."""
+    screen = setup_display()
+
+    results = [benchmark_replay(screen, path, args.render, args.per_frame)
+               for path in recording_paths(args.recordings)]
+    return {"benchmark": "replay", "results": results,
+            "all_match": all(result["matches"] for result in results)}
+
+
+# --------------- Blit Benchmark --------------- #
+
+def legacy_surface(size, colorkey=None, alpha=None):
+    """Return a surface made the way sprites made them before
+    utils._surfaces: a plain surface with a plain colour key and alpha."""
+    surface = pygame.Surface(size)
+    if colorkey is not None:
+        surface.fill(colorkey)
+        surface.set_colorkey(colorkey)
+    if alpha is not None:
+        surface.set_alpha(alpha)
+    return surface
+
+
+def blit_surfaces():
+    """Return a dictionary of the sprite surfaces to time blitting, as
+    (size, colour key, alpha, draw) tuples, draw drawing the sprite's image
+    onto a surface."""
+    from utils._settings import BLACK, WHITE, RED, BLUE, YELLOW, PINK
+
+    def rect_drawer(colour):
+        return lambda surface: surface.fill(colour)
+
+    def draw_vision(surface):
+        radius = surface.get_width() // 2
+        pygame.draw.circle(surface, PINK, (radius, radius), radius)
+
+    def draw_hearts(surface):
+        pygame.draw.rect(surface, RED, [0, 0, 30, 28])
+        pygame.draw.rect(surface, RED, [33, 0, 30, 28], 3)
+
+    return {"platform": ((50, 50), BLACK, None, rect_drawer(RED)),
+            "player": ((25, 50), BLACK, None, rect_drawer(BLUE)),
+            "bar": ((300, 20), BLACK, None, rect_drawer(YELLOW)),
+            "lives": ((96, 28), WHITE, None, draw_hearts),
+            "vision": ((300, 300), BLACK, 150, draw_vision)}
+
+
+def benchmark_blit(screen, name, repeat, per_frame=False):
+    """Time blitting one kind of sprite surface to the display, made the old
+    way by legacy_surface() and by utils._surfaces.new_surface(), and
+    return the time per blit of each in microseconds, and the largest
+    difference in any colour channel between the pixels they draw."""
+    import numpy
+    from utils._surfaces import new_surface
+
+    size, colorkey, alpha, draw = blit_surfaces()[name]
+    result = {"surface": name, "size": size}
+    drawn = {}
+    for label, make in (("legacy", legacy_surface), ("factory", new_surface)):
+        surface = make(size, colorkey, alpha)
+        draw(surface)
+
+        # first blit encodes RLE surfaces, keep it out of the timings
+        screen.fill((0, 0, 0))
+        screen.blit(surface, (10, 10))
+        drawn[label] = numpy.frombuffer(pygame.image.tostring(screen, "RGB"),
+                                        dtype=numpy.uint8).astype(int)
+
+        # time batches of blits, single blits are too quick to time well
+        batch = 100
+        blit_times = []
+        for _ in range(max(repeat // batch, 1)):
+            start = perf_counter()
+            for _ in range(batch):
+                screen.blit(surface, (10, 10))
+            blit_times.append((perf_counter() - start) * 1e6 / batch)
+        summary = summarise(blit_times, per_frame, label="batches")
+        result[f"{label}_us"] = summary["mean_ms"]
+        result[f"{label}_p50_us"] = summary["p50_ms"]
+        if per_frame:
+            result[f"{label}_batch_us"] = summary["frame_times_ms"]
+
+    result["speedup"] = (result["legacy_us"] /
+                         max(result["factory_us"], 1e-9))
+    result["max_difference"] = int(numpy.abs(drawn["legacy"] -
+                                             drawn["factory"]).max())
+    return result
+
+
+def run_blit(args):
+    """Run the blit benchmark for each requested surface."""
+    screen = setup_display()
+
+    results = [benchmark_blit(screen, name, args.repeat, args.per_frame)
+               for name in args.surface or sorted(blit_surfaces())]
+    return {"benchmark": "blit",
+            "display_bits": screen.get_bitsize(),
+            "results": results}
+
+
+def build_parser():
+    """Return the command line argument parser."""
+    parser = argparse.ArgumentParser(description="Run headless benchmarks "
+                                     "and report timings as JSON.")
+    parser.add_argument("--output", help="file to write the JSON report to "
+                        "(default: standard output)")
+    subparsers = parser.add_subparsers(dest="benchmark")
+    subparsers.required = True
+
+    level = subparsers.add_parser("level", help="time LevelMain.update on "
+                                  "maps from maps/ or a stress map")
+    level.add_argument("--map", action="append",
+                       help="name of a map in maps/, can be repeated")
+    level.add_argument("--stress-enemies", type=int,
+                       help="also run a generated map with this many enemies")
+    level.add_argument("--stress-screens", type=int, default=1,
+                       help="width of the generated map in windows")
+    level.add_argument("--frames", type=int, default=600)
+    level.add_argument("--script", choices=sorted(SCRIPTS), default="combat",
+                       help="scripted player input")
+    level.add_argument("--render", action="store_true",
+                       help="include drawing the level in the frame time")
+    level.add_argument("--seed", type=int, default=0)
+    level.add_argument("--per-frame", action="store_true",
+                       help="include every frame time in the report")
+    level.add_argument("--profile-dir",
+                       help="directory to write each map's per-frame phase "
+                       "timings to as CSV")
+    level.add_argument("--tick-rate", type=int,
+                       help="simulation steps per second (default: the "
+                       "game's TICK_RATE), each frame runs one step")
+    level.set_defaults(run=run_level)
+
+    screens = subparsers.add_parser("screens", help="time constructing menu "
+                                    "screens")
+    screens.add_argument("--screen", action="append",
+                         choices=["leaderboard", "options"],
+                         help="screen to build, can be repeated (default: "
+                         "all)")
+    screens.add_argument("--repeat", type=int, default=50,
+                         help="number of times to build each screen")
+    screens.add_argument("--per-frame", action="store_true",
+                         help="include every build time in the report")
+    screens.set_defaults(run=run_screens)
+
+    projectiles = subparsers.add_parser("projectiles", help="time moving "
+                                        "and colliding many live projectiles")
+    projectiles.add_argument("--counts", type=int, nargs="+",
+                             default=[100, 1000, 10000],
+                             help="numbers of live projectiles to time")
+    projectiles.add_argument("--steps", type=int, default=300)
+    projectiles.add_argument("--enemies", type=int, default=20,
+                             help="enemies on the stress map for projectiles "
+                             "to hit")
+    projectiles.add_argument("--render", action="store_true",
+                             help="include drawing the level in the step "
+                             "time")
+    projectiles.add_argument("--seed", type=int, default=0)
+    projectiles.add_argument("--per-frame", action="store_true",
+                             help="include every step time in the report")
+    projectiles.set_defaults(run=run_projectiles)
+
+    replay = subparsers.add_parser("replay", help="replay recorded levels "
+                                   "and check they end as recorded")
+    replay.add_argument("recordings", nargs="+",
+                        help="recording files or directories of them")
+    replay.add_argument("--render", action="store_true",
+                        help="include drawing the level in the frame time")
+    replay.add_argument("--per-frame", action="store_true",
+                        help="include every frame time in the report")
+    replay.set_defaults(run=run_replay)
+
+    blit = subparsers.add_parser("blit", help="time blitting sprite surfaces "
+                                 "made before and after the surface "
+                                 "factory")
+    blit.add_argument("--surface", action="append",
+                      choices=["bar", "lives", "platform", "player",
+                               "vision"],
+                      help="surface to time, can be repeated (default: all)")
+    blit.add_argument("--repeat", type=int, default=5000,
+                      help="number of times to blit each surface")
+    blit.add_argument("--per-frame", action="store_true",
+                      help="include every batch time in the report")
+    blit.set_defaults(run=run_blit)
+
+    return parser
+
+
+def main(argv=None):
+    """Parse arguments, run the chosen benchmark and output the report."""
+    args = build_parser().parse_args(argv)
+    if args.benchmark == "level" and not (args.map or args.stress_enemies):
+        args.map = ["tutorial_1"]
+
+    # maps and assets are loaded relative to the game directory, so find
+    # recordings and output paths from where the benchmark was run first
+    if args.benchmark == "replay":
+        args.recordings = [os.path.abspath(path) for path in args.recordings]
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    if getattr(args, "profile_dir", None):
+        args.profile_dir = os.path.abspath(args.profile_dir)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+
+    report = args.run(args)
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
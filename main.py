@@ -1,5 +1,7 @@
 """Main game file"""
+import os
 import sys
+import time
 import pygame
 from screens._rootmenu import RootMenu
 from screens._level_main import LevelMain
@@ -9,8 +11,13 @@ from screens._level_fail import LevelFail
 from screens._leaderboard import Leaderboard
 from screens._save_score import SaveScore
 from screens._options import Options
-from utils._settings import (WINDOW_WIDTH, WINDOW_HEIGHT, GREEN, BLACK)
-from utils._config_handler import load_config
+from utils._settings import (WINDOW_WIDTH, WINDOW_HEIGHT, GREEN, BLACK,
+                             PROFILE_CSV_DIRECTORY, RECORDING_DIRECTORY,
+                             MENU_RENDER_ON_DEMAND)
+from utils._config_handler import config
+from utils._renderer import Renderer, frozen_backdrop
+from utils._level_prefetcher import LevelPrefetcher
+from utils._input_recording import InputRecording
 
 
 def quit_program():
@@ -30,9 +37,12 @@ class Program():
         # load and play music
         pygame.mixer.music.load("assets/MUSIC_Adventure_AlexanderNakarada.mp3")
         pygame.mixer.music.set_volume(0.3)
-        if load_config()["music"]:
+        if config.music:
             pygame.mixer.music.play(-1)
 
+        # start/stop music when the setting changes
+        config.subscribe(self.config_changed)
+
         # screen surface setup
         self.resolution = (WINDOW_WIDTH, WINDOW_HEIGHT)
         self.screen = pygame.display.set_mode(self.resolution)
@@ -41,9 +51,41 @@ class Program():
         # clock setup
         self.clock = pygame.time.Clock()
 
+        # builds the next level of a series while the current one is played
+        self.level_prefetcher = LevelPrefetcher(LevelMain)
+
         # display root menu screen
         self.rootmenu()
 
+    def tick(self, framerate, screen=None):
+        """Wait for the next frame, then pick up any changes made to the config
+        file outside the game.
+
+        If a menu screen is given and has nothing new to draw, keep waiting
+        until an event arrives or the screen needs updating instead of
+        running frames that would change nothing."""
+        self.clock.tick(framerate)
+        if (screen is not None and MENU_RENDER_ON_DEMAND and
+           not screen.dirty):
+            screen.wait_for_event(screen.idle_timeout())
+        config.poll()
+
+    def redraw_due(self, screen):
+        """Return if a menu screen needs drawing this frame, as it has
+        changed since it was last drawn, and mark it as drawn."""
+        if screen.dirty or not MENU_RENDER_ON_DEMAND:
+            screen.dirty = False
+            return True
+        return False
+
+    def config_changed(self, key, value):
+        """Called by the config service when a setting changes."""
+        if key == "music":
+            if value:
+                pygame.mixer.music.play(-1)  # start music
+            else:
+                pygame.mixer.music.stop()  # stop music
+
     def rootmenu(self):
         """Display the root menu for the player to navigate to different
         screens"""
@@ -58,13 +100,19 @@ class Program():
         menu = RootMenu(tuple(item_calls))
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, menu)
 
             # check if menu item returned, if so, run corresponding function
             # in item_calls dict
             next_screen = menu.update()
             if next_screen is not None:
                 item_calls[next_screen]()
+                # redraw the menu over the screen that was shown
+                menu.dirty = True
+
+            # only draw the screen when it has changed
+            if not self.redraw_due(menu):
+                continue
 
             self.screen.fill(GREEN)
 
@@ -84,22 +132,25 @@ class Program():
                                          allow_save=True)
             else:
                 result = self.level_main(mapname, allow_continue=True,
-                                         allow_save=True)
+                                         allow_save=True,
+                                         next_mapname=tutorial_maps[i + 1])
 
             if isinstance(result, tuple):
                 total_score += result[0]
                 # continue returned
                 if result[1] == "continue":  # (score, "continue")
                     continue
-                if result[1] == "save":  # (score, "save", level_sprites)
+                if result[1] == "save":  # (score, "save", level_backdrop)
                     self.save_score(result[2], total_score)
                 elif result[1] == "gotoroot":  # gotoroot returned
                     return  # (score, "gotoroot")
                 else:
                     raise Exception("Invalid result returned.")
 
-    def level_main(self, mapname=None, allow_save=False, allow_continue=False):
-        """Load and run a game level"""
+    def level_main(self, mapname=None, allow_save=False, allow_continue=False,
+                   next_mapname=None):
+        """Load and run a game level. If next_mapname is given, that level is
+        prefetched while this one is played."""
         screen_calls = {"pause": self.level_pause,              # 0
                         "level_complete": self.level_complete,  # 1
                         "level_fail": self.level_fail,          # 2
@@ -107,56 +158,91 @@ class Program():
 
         if mapname is None:
             mapname = "tutorial_1"
-        level = LevelMain(tuple(screen_calls), mapname)
-
-        while True:
-            self.clock.tick(60)
-
-            # check if menu item returned, if so, run corresponding function
-            # in item_calls dict
-            next_screen = level.update()
-            if next_screen is not None:
-                if next_screen == "quit":
-                    screen_calls[next_screen]()
-                elif "level_" in next_screen:
-                    if next_screen == "level_complete":
-                        screen_return = (screen_calls[next_screen]
-                                         (level.sprites, level.player.score,
-                                          allow_save=allow_save,
-                                          allow_continue=allow_continue))
-                    else:  # next_screen == "level_fail"
-                        screen_return = (screen_calls[next_screen]
-                                         (level.sprites, level.player.score,
-                                          allow_save=allow_save))
-
-                    # if the user requested to go back to root menu
-                    if screen_return == "gotoroot":
-                        return level.player.score, "gotoroot"
-                    # if the user requested to continue to next level
-                    if screen_return == "continue":
-                        return level.player.score, "continue"
-                    # if the user requested to save score
-                    if screen_return == "save":
-                        return level.player.score, "save", level.sprites
-                    # reset level for retry if selected
-                    if screen_return == "retry":
-                        level.reset_level()
-                else:
-                    pause_return = screen_calls[next_screen](level.sprites)
-
-                    # if user requested to go back to root menu
-                    if pause_return == "gotoroot":
-                        return level.player.score, "gotoroot"
-                    # otherwise correct cooldowns and resume level
-                    level.resume(pause_return)
-
-            self.screen.fill(GREEN)
-
-            level.sprites.draw(self.screen)
-
-            pygame.display.flip()
-
-    def level_pause(self, level_sprites):
+        level = self.level_prefetcher.take(tuple(screen_calls), mapname)
+
+        # build the next level in the background while this one is played
+        if next_mapname is not None:
+            self.level_prefetcher.prefetch(tuple(screen_calls), next_mapname)
+
+        # draw only the regions of the level that change each frame
+        renderer = Renderer(self.screen, GREEN)
+        renderer.set_sprites(level.sprites)
+        renderer.set_projectiles(level.projectiles)
+        renderer.set_camera(level.camera)
+
+        # write per-frame phase timings to CSV if enabled
+        if PROFILE_CSV_DIRECTORY is not None:
+            level.profiler.open_csv(os.path.join(PROFILE_CSV_DIRECTORY,
+                                                 f"profile_{mapname}.csv"))
+
+        # record the input played if enabled, saved when the level is left
+        if RECORDING_DIRECTORY is not None:
+            level.record_input(InputRecording(mapname, level.seed,
+                                              level.clock.tick_rate))
+
+        try:
+            while True:
+                self.tick(60)
+
+                # check if menu item returned, if so, run corresponding
+                # function in item_calls dict
+                next_screen = level.update()
+                if next_screen is not None:
+                    if next_screen == "quit":
+                        screen_calls[next_screen]()
+                    elif "level_" in next_screen:
+                        if next_screen == "level_complete":
+                            screen_return = (screen_calls[next_screen]
+                                             (level.draw_backdrop,
+                                              level.player.score,
+                                              allow_save=allow_save,
+                                              allow_continue=allow_continue))
+                        else:  # next_screen == "level_fail"
+                            screen_return = (screen_calls[next_screen]
+                                             (level.draw_backdrop,
+                                              level.player.score,
+                                              allow_save=allow_save))
+
+                        # if the user requested to go back to root menu
+                        if screen_return == "gotoroot":
+                            return level.player.score, "gotoroot"
+                        # if the user requested to continue to next level
+                        if screen_return == "continue":
+                            return level.player.score, "continue"
+                        # if the user requested to save score
+                        if screen_return == "save":
+                            return (level.player.score, "save",
+                                    level.draw_backdrop)
+                        # reset level for retry if selected
+                        if screen_return == "retry":
+                            level.reset_level()
+                    else:
+                        pause_return = (screen_calls[next_screen]
+                                        (level.draw_backdrop))
+
+                        # if user requested to go back to root menu
+                        if pause_return == "gotoroot":
+                            return level.player.score, "gotoroot"
+                        # otherwise resume level
+                        level.resume()
+
+                    # redraw whole level over the previous screen
+                    renderer.repaint()
+
+                # draw and push changes to display, timing each phase
+                level.profiler.measure("draw", renderer.draw)
+                level.profiler.measure("flip", renderer.flip)
+                level.profiler.count("pixels_pushed", renderer.pixels_pushed)
+                level.profiler.end_frame()
+        finally:
+            level.profiler.close_csv()
+            if level.recording is not None:
+                saved = time.strftime("%Y%m%d_%H%M%S")
+                level.finish_recording().save(os.path.join(
+                    RECORDING_DIRECTORY,
+                    f"recording_{mapname}_{saved}.json"))
+
+    def level_pause(self, level_backdrop):
         """Display level pause screen"""
         screen_calls = {"resume": None,
                         "options": self.options,
@@ -165,39 +251,38 @@ class Program():
 
         pause = LevelPause(tuple(screen_calls))
 
-        # create transparent background
-        background = pygame.Surface([WINDOW_WIDTH, WINDOW_HEIGHT])
-        background.fill(GREEN)
-        background.set_alpha(200)
+        # level with a transparent background over it, drawn once as the
+        # level doesn't change while this screen is shown
+        backdrop = frozen_backdrop(level_backdrop, self.resolution, GREEN)
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, pause)
 
             next_screen = pause.update()
             if next_screen is not None:
                 if next_screen == "quit":
                     screen_calls[next_screen]()
                 elif next_screen == "options":
-                    # pass game level's sprites again to retain background
-                    screen_calls[next_screen](level_sprites)
+                    # pass game level's backdrop again to retain background
+                    screen_calls[next_screen](level_backdrop)
+                    pause.dirty = True
                 elif next_screen == "root_menu":
                     return "gotoroot"
                 # resume the level by terminating the method
                 else:
-                    return pause.duration
+                    return "resume"
 
-            self.screen.fill(GREEN)
-
-            level_sprites.draw(self.screen)
+            # only draw the screen when it has changed
+            if not self.redraw_due(pause):
+                continue
 
-            # draw background on top of level sprites
-            self.screen.blit(background.convert_alpha(), (0, 0))
+            self.screen.blit(backdrop, (0, 0))
 
             pause.sprites.draw(self.screen)
 
             pygame.display.flip()
 
-    def level_complete(self, level_sprites, score, allow_save=True,
+    def level_complete(self, level_backdrop, score, allow_save=True,
                        allow_continue=False):
         """Display level pause screen"""
         # build screen_calls dict in correct order
@@ -212,13 +297,12 @@ class Program():
 
         complete = LevelComplete(tuple(screen_calls), score)
 
-        # create transparent background
-        background = pygame.Surface([WINDOW_WIDTH, WINDOW_HEIGHT])
-        background.fill(GREEN)
-        background.set_alpha(200)
+        # level with a transparent background over it, drawn once as the
+        # level doesn't change while this screen is shown
+        backdrop = frozen_backdrop(level_backdrop, self.resolution, GREEN)
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, complete)
 
             next_screen = complete.update()
             if next_screen is not None:
@@ -230,18 +314,17 @@ class Program():
                     return "continue"
                 screen_calls[next_screen]()
 
-            self.screen.fill(GREEN)
-
-            level_sprites.draw(self.screen)
+            # only draw the screen when it has changed
+            if not self.redraw_due(complete):
+                continue
 
-            # draw background on top of level sprites
-            self.screen.blit(background.convert_alpha(), (0, 0))
+            self.screen.blit(backdrop, (0, 0))
 
             complete.sprites.draw(self.screen)
 
             pygame.display.flip()
 
-    def level_fail(self, level_sprites, score, allow_save=True):
+    def level_fail(self, level_backdrop, score, allow_save=True):
         """Display level pause screen"""
         if allow_save:
             screen_calls = {"save_score": self.save_score,
@@ -255,13 +338,12 @@ class Program():
 
         fail = LevelFail(tuple(screen_calls), score)
 
-        # create transparent background
-        background = pygame.Surface([WINDOW_WIDTH, WINDOW_HEIGHT])
-        background.fill(GREEN)
-        background.set_alpha(200)
+        # level with a transparent background over it, drawn once as the
+        # level doesn't change while this screen is shown
+        backdrop = frozen_backdrop(level_backdrop, self.resolution, GREEN)
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, fail)
 
             next_screen = fail.update()
             if next_screen is not None:
@@ -273,18 +355,17 @@ class Program():
                     return "retry"
                 screen_calls[next_screen]()
 
-            self.screen.fill(GREEN)
-
-            level_sprites.draw(self.screen)
+            # only draw the screen when it has changed
+            if not self.redraw_due(fail):
+                continue
 
-            # draw background on top of level sprites
-            self.screen.blit(background.convert_alpha(), (0, 0))
+            self.screen.blit(backdrop, (0, 0))
 
             fail.sprites.draw(self.screen)
 
             pygame.display.flip()
 
-    def save_score(self, level_sprites, score):
+    def save_score(self, level_backdrop, score):
         """Display save score screen"""
         screen_calls = {"global_save": None,
                         "local_save": None,
@@ -292,13 +373,12 @@ class Program():
                         "quit": quit_program}
         save_score = SaveScore(tuple(screen_calls), score)
 
-        # create transparent background
-        background = pygame.Surface([WINDOW_WIDTH, WINDOW_HEIGHT])
-        background.fill(GREEN)
-        background.set_alpha(200)
+        # level with a transparent background over it, drawn once as the
+        # level doesn't change while this screen is shown
+        backdrop = frozen_backdrop(level_backdrop, self.resolution, GREEN)
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, save_score)
 
             # check if menu item returned, if so, run corresponding function
             # in item_calls dict
@@ -313,12 +393,11 @@ class Program():
                 elif next_screen == "local_save":
                     save_score.save_local()
 
-            self.screen.fill(GREEN)
-
-            level_sprites.draw(self.screen)
+            # only draw the screen when it has changed
+            if not self.redraw_due(save_score):
+                continue
 
-            # draw background on top of level sprites
-            self.screen.blit(background.convert_alpha(), (0, 0))
+            self.screen.blit(backdrop, (0, 0))
 
             save_score.sprites.draw(self.screen)
 
@@ -332,7 +411,7 @@ class Program():
         leaderboard = Leaderboard(tuple(screen_calls))
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, leaderboard)
 
             # check if menu item returned, if so, run corresponding function
             # in item_calls dict
@@ -345,6 +424,10 @@ class Program():
                 else:
                     return
 
+            # only draw the screen when it has changed
+            if not self.redraw_due(leaderboard):
+                continue
+
             self.screen.fill(GREEN)
 
             leaderboard.sprites.draw(self.screen)
@@ -361,7 +444,8 @@ class Program():
             if i == len(tutorial_maps) - 1:
                 result = self.level_main(mapname, allow_continue=False)
             else:
-                result = self.level_main(mapname, allow_continue=True)
+                result = self.level_main(mapname, allow_continue=True,
+                                         next_mapname=tutorial_maps[i + 1])
 
             if isinstance(result, tuple):
                 # continue returned
@@ -371,7 +455,7 @@ class Program():
                     return  # (score, "gotoroot")
                 raise Exception("Invalid result returned.")
 
-    def options(self, level_sprites=None):
+    def options(self, level_backdrop=None):
         """Display options screen"""
         screen_calls = {"quit": quit_program,
                         "back": None,
@@ -381,13 +465,15 @@ class Program():
         screen_calls["config_music"] = options.config_music
         screen_calls["config_sound_effects"] = options.config_sound_effects
 
-        # create transparent background
-        background = pygame.Surface([WINDOW_WIDTH, WINDOW_HEIGHT])
-        background.fill(BLACK)
-        background.set_alpha(200)
+        # level with a transparent background over it if provided, drawn
+        # once as the level doesn't change while the options are shown
+        backdrop = None
+        if level_backdrop is not None:
+            backdrop = frozen_backdrop(level_backdrop, self.resolution,
+                                       BLACK)
 
         while True:
-            self.clock.tick(25)
+            self.tick(25, options)
 
             # check if menu item returned, if so, run corresponding function
             # in item_calls dict
@@ -400,14 +486,15 @@ class Program():
                 elif "config_" in next_screen:
                     screen_calls[next_screen]()
 
-            self.screen.fill(BLACK)
+            # only draw the screen when it has changed
+            if not self.redraw_due(options):
+                continue
 
-            # display level sprites if provided
-            if level_sprites is not None:
-                level_sprites.draw(self.screen)
-
-                # draw background on top of level sprites
-                self.screen.blit(background.convert_alpha(), (0, 0))
+            # display level if provided
+            if backdrop is None:
+                self.screen.fill(BLACK)
+            else:
+                self.screen.blit(backdrop, (0, 0))
 
             options.sprites.draw(self.screen)
 
@@ -136,6 +136,8 @@ class Leaderboard(Screen):
             self.render_scores_local()
             button_toggle.toggle_local()
 
+        self.dirty = True
+
     def render_scores_local(self):
         """Render the local leaderboard data onto the screen."""
         handler = ScoreHandler()
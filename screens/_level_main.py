@@ -1,97 +1,103 @@
 """Game Level - Main Module"""
-from json import loads
+import random
+import zlib
 from math import sqrt
-from random import randint
+import numpy
 import pygame
 from ._screen import Screen
 from utils._settings import (WINDOW_WIDTH, WINDOW_HEIGHT, RED, BLUE, PINK,
-                             YELLOW)
+                             YELLOW, PURPLE, SWEPT_COLLISION, REWIND_SECONDS,
+                             REWIND_ENTITIES, REWIND_PROJECTILES)
 from ._level_main_sprites._platform import Platform
+from ._level_main_sprites._entity import PACKED_STATE
 from ._level_main_sprites._player import Player
 from ._level_main_sprites._enemy import Enemy
-from ._level_main_sprites._projectile import Projectile
-from utils._line import Line
+from ._level_main_sprites._projectile_store import (ProjectileStore,
+                                                    PACKED_PROJECTILE)
 from utils._text import Text
-
-
-def list_collisions(sprite, spritelist):
-    """Input singular sprite and spritelist
-    Returns list of sprites in spritelist that collide with the singular
-    sprite using their rects."""
-    collisionslist = pygame.sprite.spritecollide(sprite, spritelist, False)
-    return collisionslist
-
-
-def list_groupcollisions(group1, group2):
-    """Returns collisions between sprites in two sprite groups.
-    Returns dictionary with each sprite in group1 that collided as a key and
-    each sprite in group2 that collided as a value for the respective sprite
-    it collided with in group1. key:value"""
-    collisionslist = pygame.sprite.groupcollide(group1, group2, False, False)
-    return collisionslist
-
-
-def list_collisions_mask(sprite, spritelist):
-    """Input singular sprite and spritelist
-    Returns list of sprites in spritelist that collide with the singular
-    sprite using their masks."""
-    collisionslist = pygame.sprite.spritecollide(sprite, spritelist, False,
-                                                 pygame.sprite.collide_mask)
-
-    return collisionslist
-
-
-def move(sprite, platformlist):
+from utils._tile_map import PLATFORM, SPAWN, FINISH, ENEMY
+from utils._map_file import load_map as load_map_file
+from utils._spatial_hash import SpatialHash
+from utils._ai_scheduler import AIScheduler
+from utils._rewind_buffer import RewindBuffer
+from utils._input_recording import RESET
+from utils._game_clock import GameClock
+from utils._profiler import FrameProfiler, ProfilerOverlay
+from utils._camera import Camera
+from utils._renderer import draw_level, SCREEN_LAYER
+
+
+def move(sprite, tilemap, swept=SWEPT_COLLISION):
     """Method to move specific sprite, taking into account collisions with
-    sprites under the provided spritelist.
-
-    Method moves the sprite in the x direction first, then corrects it's
-    location if it has collided, then moves the sprite in the y direction
-    and corrects if it has collided. Returns the sides it has collided
-    with for further conditional actions."""
+    the platform tiles of the provided tile map.
+
+    Method moves the sprite in the x direction first, then the y direction,
+    stopping it against any platform in the way. Returns the sides it has
+    collided with for further conditional actions.
+
+    When swept, the sprite's rect is swept through the tile map along each
+    direction and stops where it first touches a platform, so it can't pass
+    through a platform however large its velocity is (e.g. at low tick
+    rates). Otherwise the sprite is moved by its whole velocity and then
+    corrected if it overlaps a platform. Velocities are rounded to whole
+    pixels."""
     detectedcollisions = {
         "left": False,
         "right": False,
         "top": False,
         "bottom": False
         }
-
-    # horizontal movement handling
-    sprite.rect.x += sprite.velocity_x
-    collisionslist = list_collisions(sprite, platformlist)
-    for platform in collisionslist:
-        if sprite.velocity_x < 0:  # sprite left
-            sprite.rect.left = platform.rect.right
-            detectedcollisions["left"] = True
-
-        elif sprite.velocity_x > 0:  # sprite right
-            sprite.rect.right = platform.rect.left
-            detectedcollisions["right"] = True
-
-    # vertical movement handling
-    sprite.rect.y += sprite.velocity_y
-    collisionslist = list_collisions(sprite, platformlist)
-    for platform in collisionslist:
-        if sprite.velocity_y > 0:  # sprite bottom
-            sprite.rect.bottom = platform.rect.top
-            detectedcollisions["bottom"] = True
-
-        elif sprite.velocity_y < 0:  # sprite top
-            sprite.rect.top = platform.rect.bottom
-            detectedcollisions["top"] = True
-
-    # kill sprite if offscreen and is projectile
-    if ((sprite.rect.left > WINDOW_WIDTH) or
-       (sprite.rect.right < 0) or
-       (sprite.rect.bottom < 0) or
-       (sprite.rect.top > WINDOW_HEIGHT)):
-        if isinstance(sprite, Projectile):
-            sprite.kill()
-        # check if 200 pixels below screen
-        else:
-            if sprite.rect.top > WINDOW_HEIGHT+200:
-                # kill by deducting significant health
-                sprite.hit(200)
+    velocity_x = round(sprite.velocity_x)
+    velocity_y = round(sprite.velocity_y)
+
+    if swept:
+        # horizontal movement handling, stopped short if blocked
+        distance = tilemap.sweep_x(sprite.rect, velocity_x)
+        sprite.rect.x += distance
+        if distance != velocity_x:
+            if velocity_x < 0:  # sprite left
+                detectedcollisions["left"] = True
+            else:  # sprite right
+                detectedcollisions["right"] = True
+
+        # vertical movement handling, stopped short if blocked
+        distance = tilemap.sweep_y(sprite.rect, velocity_y)
+        sprite.rect.y += distance
+        if distance != velocity_y:
+            if velocity_y > 0:  # sprite bottom
+                detectedcollisions["bottom"] = True
+            else:  # sprite top
+                detectedcollisions["top"] = True
+
+    else:
+        # horizontal movement handling
+        sprite.rect.x += velocity_x
+        collisionslist = tilemap.collide_rect(sprite.rect)
+        for platform in collisionslist:
+            if velocity_x < 0:  # sprite left
+                sprite.rect.left = platform.right
+                detectedcollisions["left"] = True
+
+            elif velocity_x > 0:  # sprite right
+                sprite.rect.right = platform.left
+                detectedcollisions["right"] = True
+
+        # vertical movement handling
+        sprite.rect.y += velocity_y
+        collisionslist = tilemap.collide_rect(sprite.rect)
+        for platform in collisionslist:
+            if velocity_y > 0:  # sprite bottom
+                sprite.rect.bottom = platform.top
+                detectedcollisions["bottom"] = True
+
+            elif velocity_y < 0:  # sprite top
+                sprite.rect.top = platform.bottom
+                detectedcollisions["top"] = True
+
+    # check if 200 pixels below the map
+    if sprite.rect.top > tilemap.height+200:
+        # kill by deducting significant health
+        sprite.hit(200)
 
     return detectedcollisions
 
@@ -140,12 +146,14 @@ def distance(point1, point2):
     return dist
 
 
-def inaccurate_vector(origin, destination, magnitude, inaccuracy):
+def inaccurate_vector(origin, destination, magnitude, inaccuracy,
+                      rng=random):
     """Returns a vector from the from the origin to a random point within a
     radius of x pixels from the given destination, where x is the given
-    inaccuracy."""
-    new_dest_x = destination[0] + randint(-inaccuracy, inaccuracy)
-    new_dest_y = destination[1] + randint(-inaccuracy, inaccuracy)
+    inaccuracy. The point is picked with the given random number generator,
+    by default the random module's."""
+    new_dest_x = destination[0] + rng.randint(-inaccuracy, inaccuracy)
+    new_dest_y = destination[1] + rng.randint(-inaccuracy, inaccuracy)
     new_dest = (new_dest_x, new_dest_y)
 
     return vector(origin, new_dest, magnitude)
@@ -153,125 +161,200 @@ def inaccurate_vector(origin, destination, magnitude, inaccuracy):
 
 # --------------- Constants --------------- #
 PLATFORMLENGTH = 50
-# automatically determine number of rows/columns
+# width of projectiles, also used to model their path for enemy vision
+PROJECTILEWIDTH = 9
+# distance projectiles move per step at the tuned tick rate
+PROJECTILESPEED = 10
+# number of rows/columns that fit in the window, maps can be larger
 NUMBEROFCOLUMNS = int(WINDOW_WIDTH/PLATFORMLENGTH)
 NUMBEROFROWS = int(WINDOW_HEIGHT/PLATFORMLENGTH)
+# width and height of map chunks in tiles
+CHUNKLENGTH = 8
+# chunks within this many chunks of the camera are built, chunks further than
+# RELEASEMARGIN away are released. The gap stops chunks on the boundary being
+# built and released over and over as the camera moves back and forth
+BUILDMARGIN = 1
+RELEASEMARGIN = 2
+
+# phases of a frame timed by the level's profiler, in the order they run
+# (draw and flip are timed by the program drawing the level)
+LEVEL_PHASES = ("handle_events", "record_rewind", "rewind",
+                "entities.update", "move_player",
+                "move_enemies", "build_entity_hash", "move_projectiles",
+                "update_enemy_vision", "update_enemy_movement",
+                "check_finish", "update_chunks", "draw", "flip")
+# per frame counters kept by the level's profiler
+LEVEL_COUNTERS = ("steps", "projectiles", "vision_skipped",
+                  "movement_skipped", "pixels_pushed")
+# sprite layer for the profiler overlay, above all level sprites
+OVERLAY_LAYER = 10
 
 
 class LevelMain(Screen):
-    """Class for handling an individual game level's sprites and logic"""
-    def __init__(self, screens, map_name):
+    """Class for handling an individual game level's sprites and logic
+
+    The level owns a GameClock which runs the simulation in fixed steps. A
+    clock can be passed in, e.g. a fast forward clock for benchmarks.
+
+    Randomness in the level comes from its own generator seeded with seed,
+    a random seed if not given. Given the same seed, tick rate and input
+    before each step, a level plays out exactly the same, so the input can
+    be recorded into an InputRecording and replayed."""
+    def __init__(self, screens, map_name, clock=None, seed=None):
         super().__init__(screens)
 
+        # simulation clock shared by the level's entities
+        if clock is None:
+            clock = GameClock()
+        self.clock = clock
+
+        # random number generator for everything random in the level
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        # number of steps run since the level was built, unlike the clock's
+        # ticks this isn't put back by resets or rewinding
+        self.steps = 0
+
+        # recording the input is being recorded into or replayed from
+        self.recording = None
+        self.replaying = False
+
+        # time each phase of the frame, F3 shows the breakdown on screen
+        self.profiler = FrameProfiler(LEVEL_PHASES, LEVEL_COUNTERS)
+        self.profiler_overlay = ProfilerOverlay(self.profiler, 10, 60)
+
         # add screen specific event handlers to list of event handlers
         self.event_handlers.extend((self.handle_events_keyboard_down,
                                     self.handle_events_keyboard_up))
 
+        # use a dirty sprite group so only changed regions are redrawn
+        self.sprites = pygame.sprite.LayeredDirty()
+
         # instantiate sprite groupd
         self.entities = pygame.sprite.Group()
         self.platforms = pygame.sprite.Group()
         self.finishpoints = pygame.sprite.Group()
         self.enemies = pygame.sprite.Group()
 
-        # load and render map sprites
+        # load map
         self.load_map(map_name)
+
+        # part of the level shown in the window, following the player
+        self.camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT, self.tilemap.width,
+                             self.tilemap.height)
+
+        # every projectile fired in the level
+        self.projectiles = ProjectileStore(self.tilemap, PURPLE,
+                                           PROJECTILEWIDTH)
+
+        # grid of where the entities are, rebuilt each step once they've
+        # moved, for finding the entities near a point or area
+        self.entity_hash = SpatialHash(PLATFORMLENGTH)
+
+        # decides which enemies run their AI each step
+        self.ai_scheduler = AIScheduler(self.clock)
+
+        # the last few seconds of steps, rewound while R is held. Entities
+        # are recorded by their slot, their index in rewind_slots
+        self.rewind_buffer = RewindBuffer(
+            REWIND_SECONDS * self.clock.tick_rate, REWIND_ENTITIES,
+            REWIND_PROJECTILES, PACKED_STATE, PACKED_PROJECTILE)
+        self.rewind_slots = []
+        self.rewind_slot_indexes = {}
+        self.rewinding = False
+
+        # render map sprites
         self.draw_map()
 
-        self.update_cursor()
+        # state of the freshly built level, put back by reset_level
+        self.initial_state = self.snapshot()
 
-        # instantiate line to calculate collision between enemy projectile's
-        # path and platform
-        self.line = Line(self.player.rect.center, (0, 0))
+        self.update_cursor()
 
     def load_map(self, map_name):
-        """Load level map as 2D array"""
+        """Load level map as a tile map, compiled and cached by
+        load_map_file()"""
         # 0 = nothing
         # 1 = platform
         # 2 = player spawn location
         # 3 = map finish location
         # 4 = enemy
-        self.gamemap = []
-        self.gamemap_conf = []
-
-        # read the file with given map name
-        with open("maps/" + map_name + ".txt", "r") as file:
-            # store each line as an element in a list
-            lines = file.readlines()
-            for i, line in enumerate(lines):
-                # remove newline character
-                lines[i] = line.replace("\n", "")
-
-        # generate each inner list (row) of 2d list and add to outer list
-        for line in lines:
-            row = []
-            for char in line:
-                row.append(int(char))
-            self.gamemap.append(row)
-
-        # load map's enemy configuration
-        # read the file with given map name
-        with open("maps/" + map_name + ".json", "r") as file:
-            contents = file.read()
-
-        # convert json data into python data structures
-        self.gamemap_conf = loads(contents)
+        #
+        # the JSON holds each enemy's arguments, in map order, and any custom
+        # sprites. Enemies' AI budgets (see AIScheduler) default to the
+        # optional "ai" dict and can be overridden by a dict after an enemy's
+        # arguments
+        self.tilemap, self.gamemap_conf = load_map_file(
+            "maps", map_name, PLATFORMLENGTH)
 
     def draw_map(self):
         """Iterate through map and draw each sprite (e.g. platforms, player,
-        enemies...)"""
-        enemy_count = 0
-        # Creating sprites then adding to sprite lists
-
-        for row in range(NUMBEROFROWS):
-            for col in range(NUMBEROFCOLUMNS):
-
-                if self.gamemap[row][col] == 1:  # platforms
-                    # colour, width, height, xpos, ypos
-                    plat = Platform(RED, PLATFORMLENGTH, PLATFORMLENGTH,
-                                    col*PLATFORMLENGTH, row*PLATFORMLENGTH)
-                    self.sprites.add(plat)
-                    self.platforms.add(plat)
-
-                elif self.gamemap[row][col] == 2:  # player
-                    self.player = Player(BLUE, 40, 70, col*PLATFORMLENGTH,
-                                         row*PLATFORMLENGTH)
-                    self.sprites.add(self.player, self.player.stats)
-                    self.entities.add(self.player)
-
-                elif self.gamemap[row][col] == 3:  # finish point
-                    self.finishpoint = Platform(PINK, PLATFORMLENGTH,
-                                                PLATFORMLENGTH,
-                                                col*PLATFORMLENGTH,
-                                                row*PLATFORMLENGTH)
-                    self.sprites.add(self.finishpoint)
-                    self.finishpoints.add(self.finishpoint)
-
-                elif self.gamemap[row][col] == 4:  # enemies
-                    # enemy instance args:
-                    # color, width, height, startx, starty, vision,
-                    # responsetime=1000, firecooldown=320, fireinaccuracy=15,
-                    # vel_x=2, vel_y=-16)
-
-                    enemy_args = self.gamemap_conf["enemies"][enemy_count]
-                    if len(enemy_args) == 3:  # essential enemy custominsation
-                        enemy = Enemy(YELLOW, enemy_args[0], enemy_args[1],
-                                      col*PLATFORMLENGTH, row*PLATFORMLENGTH,
-                                      enemy_args[2])
-                    elif len(enemy_args) == 8:  # full enemy customisation
-                        enemy = Enemy(YELLOW, enemy_args[0], enemy_args[1],
-                                      col*PLATFORMLENGTH, row*PLATFORMLENGTH,
-                                      enemy_args[2], enemy_args[3],
-                                      enemy_args[4], enemy_args[5],
-                                      enemy_args[6], enemy_args[7])
-                    else:
-                        raise Exception("Invalid number of enemy args, " +
-                                        "expected 3 or 8, received " +
-                                        f"{len(enemy_args)}")
+        enemies...)
+
+        The player, their stats and custom sprites are created straight away.
+        The map's platforms and enemies are split into square chunks of
+        CHUNKLENGTH tiles, which are only built when near the camera (see
+        update_chunks), so maps can be any size."""
+        # sprites built for each chunk, keyed by (chunk column, chunk row)
+        self.chunks = {}
+        # enemies not spawned yet in each chunk, as (map order, row, column,
+        # args, AI budget), and enemies put to sleep in each chunk
+        self.spawns = {}
+        self.dormant = {}
 
-                    self.sprites.add(enemy)
-                    self.entities.add(enemy)
-                    self.enemies.add(enemy)
-                    enemy_count += 1
+        enemy_count = 0
+        vision_radii = []
+        # default AI budget for the map's enemies
+        ai_budget = self.gamemap_conf.get("ai", {})
+
+        # player
+        spawn_points = self.tilemap.locate(SPAWN)
+        if len(spawn_points) != 1:
+            raise Exception("Expected 1 player spawn location, found " +
+                            f"{len(spawn_points)}")
+        row, col = spawn_points[0]
+        self.player = Player(BLUE, 40, 70, col*PLATFORMLENGTH,
+                             row*PLATFORMLENGTH, self.clock, self.projectiles)
+        self.sprites.add(self.player)
+        # player stats stay put on screen as the camera moves
+        self.sprites.add(self.player.stats, layer=SCREEN_LAYER)
+        self.entities.add(self.player)
+
+        # enemies, in map order
+        for row, col in self.tilemap.locate(ENEMY):
+            # enemy instance args:
+            # color, width, height, startx, starty, clock,
+            # projectiles, vision, responsetime=1000,
+            # firecooldown=320, fireinaccuracy=15, vel_x=2, vel_y=-16)
+
+            enemy_args = self.gamemap_conf["enemies"][enemy_count]
+            # optional AI budget after the enemy's arguments
+            enemy_budget = dict(ai_budget)
+            if enemy_args and isinstance(enemy_args[-1], dict):
+                enemy_budget.update(enemy_args[-1])
+                enemy_args = enemy_args[:-1]
+
+            if len(enemy_args) not in (3, 8):
+                raise Exception("Invalid number of enemy args, " +
+                                "expected 3 or 8, received " +
+                                f"{len(enemy_args)}")
+
+            # spawned when its chunk is first built
+            key = (col // CHUNKLENGTH, row // CHUNKLENGTH)
+            self.spawns.setdefault(key, []).append(
+                (enemy_count, row, col, enemy_args, enemy_budget))
+            vision_radii.append(enemy_args[2])
+            enemy_count += 1
+
+        # largest enemy vision radius, for finding enemies near the player
+        self.vision_radius = max(vision_radii, default=0)
+
+        # build the chunks around the player
+        self.camera.follow(self.player.rect)
+        self.update_chunks()
 
         # spawn in custom sprites like text
         for custom_sprite in self.gamemap_conf["custom"]:
@@ -288,13 +371,128 @@ class LevelMain(Screen):
                                    custom_sprite[7])
                 self.sprites.add(text_sprite)
 
-        # update sfx status for all entites
-        self.check_sfx()
+    def chunk_range(self, margin):
+        """Return the (first column, last column, first row, last row) of the
+        chunks within margin chunks of the camera, clamped to the map."""
+        size = CHUNKLENGTH * PLATFORMLENGTH
+        view = self.camera.rect
+        last_col = (self.tilemap.columns - 1) // CHUNKLENGTH
+        last_row = (self.tilemap.rows - 1) // CHUNKLENGTH
+        return (max(view.left // size - margin, 0),
+                min((view.right - 1) // size + margin, last_col),
+                max(view.top // size - margin, 0),
+                min((view.bottom - 1) // size + margin, last_row))
+
+    def build_chunk(self, key):
+        """Create the platform and finish point sprites of a chunk and
+        return the list of them."""
+        chunk_col, chunk_row = key
+        chunk_sprites = []
+        first_row = chunk_row * CHUNKLENGTH
+        first_col = chunk_col * CHUNKLENGTH
+        last_row = min(first_row + CHUNKLENGTH, self.tilemap.rows)
+        last_col = min(first_col + CHUNKLENGTH, self.tilemap.columns)
+        for row in range(first_row, last_row):
+            for col in range(first_col, last_col):
+                tile = self.tilemap.tile(row, col)
+                if tile == PLATFORM:
+                    # colour, width, height, xpos, ypos
+                    plat = Platform(RED, PLATFORMLENGTH, PLATFORMLENGTH,
+                                    col*PLATFORMLENGTH, row*PLATFORMLENGTH)
+                    self.platforms.add(plat)
+                    chunk_sprites.append(plat)
+                elif tile == FINISH:
+                    finishpoint = Platform(PINK, PLATFORMLENGTH,
+                                           PLATFORMLENGTH, col*PLATFORMLENGTH,
+                                           row*PLATFORMLENGTH)
+                    self.finishpoints.add(finishpoint)
+                    chunk_sprites.append(finishpoint)
+        self.sprites.add(*chunk_sprites)
+        return chunk_sprites
+
+    def spawn_enemy(self, row, col, enemy_args, enemy_budget):
+        """Create an enemy at a map location from its map arguments and
+        start scheduling its AI."""
+        if len(enemy_args) == 3:  # essential enemy custominsation
+            enemy = Enemy(YELLOW, enemy_args[0], enemy_args[1],
+                          col*PLATFORMLENGTH, row*PLATFORMLENGTH,
+                          self.clock, self.projectiles, enemy_args[2])
+        else:  # full enemy customisation
+            enemy = Enemy(YELLOW, enemy_args[0], enemy_args[1],
+                          col*PLATFORMLENGTH, row*PLATFORMLENGTH,
+                          self.clock, self.projectiles, enemy_args[2],
+                          enemy_args[3], enemy_args[4], enemy_args[5],
+                          enemy_args[6], enemy_args[7])
+        self.ai_scheduler.add(enemy, enemy_budget)
+        return enemy
+
+    def update_chunks(self):
+        """Move the camera to follow the player, then build the chunks that
+        have come near the camera and release those that have gone far away.
+
+        Building a chunk creates its platform sprites and brings its enemies
+        into the level: enemies the first time the chunk is built are spawned
+        (in map order, so levels play out the same whatever their size), and
+        enemies put to sleep when it was released are woken up. Releasing a
+        chunk kills its sprites, and enemies in chunks that aren't built are
+        put to sleep, taken out of every group so they aren't simulated or
+        drawn until their chunk is built again."""
+        self.camera.follow(self.player.rect)
+
+        # build chunks near the camera
+        first_col, last_col, first_row, last_row = self.chunk_range(
+            BUILDMARGIN)
+        new_spawns = []
+        woken = []
+        for chunk_row in range(first_row, last_row + 1):
+            for chunk_col in range(first_col, last_col + 1):
+                key = (chunk_col, chunk_row)
+                if key in self.chunks:
+                    continue
+                self.chunks[key] = self.build_chunk(key)
+                new_spawns.extend(self.spawns.pop(key, ()))
+                woken.extend(self.dormant.pop(key, ()))
+
+        for _, row, col, enemy_args, enemy_budget in sorted(
+                new_spawns, key=lambda spawn: spawn[0]):
+            woken.append(self.spawn_enemy(row, col, enemy_args, enemy_budget))
+        for enemy in woken:
+            self.sprites.add(enemy)
+            self.entities.add(enemy)
+            self.enemies.add(enemy)
+
+        # release chunks far from the camera
+        first_col, last_col, first_row, last_row = self.chunk_range(
+            RELEASEMARGIN)
+        for key in list(self.chunks):
+            chunk_col, chunk_row = key
+            if not (first_col <= chunk_col <= last_col and
+                    first_row <= chunk_row <= last_row):
+                for sprite in self.chunks.pop(key):
+                    sprite.kill()
+
+        # put enemies outside the built chunks to sleep
+        size = CHUNKLENGTH * PLATFORMLENGTH
+        for enemy in self.enemies.sprites():
+            key = (enemy.rect.centerx // size, enemy.rect.centery // size)
+            if key not in self.chunks:
+                enemy.kill()
+                self.dormant.setdefault(key, []).append(enemy)
+
+    def update_entities(self):
+        """Call the update method of each entity sprite, then stop scheduling
+        the AI of enemies that died in their update."""
+        enemies = self.enemies.sprites()
+        self.entities.update()
+        if len(self.enemies) < len(enemies):
+            for enemy in enemies:
+                if not enemy.alive():
+                    self.ai_scheduler.forget(enemy)
 
     def move_player(self):
         """Uses the move function to move the player sprite by its current
         velocity vector."""
-        collisions = move(self.player, self.platforms)
+        collisions = move(self.player, self.tilemap)
         # if player bottom or top collides, momentum reset
         # onplatform attribute set accordingly
         if collisions["bottom"]:
@@ -307,7 +505,7 @@ class LevelMain(Screen):
     def move_enemies(self):
         """Uses the move function to move each enemy sprite."""
         for enemy in self.enemies:
-            collisions = move(enemy, self.platforms)
+            collisions = move(enemy, self.tilemap)
             # if enemy bottom or top collides, momentum reset
             # onplatform attribute set accordingly
             if collisions["bottom"]:
@@ -318,75 +516,76 @@ class LevelMain(Screen):
                 enemy.onplatform = False
 
     def move_projectiles(self):
-        """Iterates through each projectile in each entity's 'projectiles'
-        sprite group attribute and moves them using their stored velocity. If
-        the projectile moves off screen, collides with a platform or enemy, it
-        is despawned. Damage inflicted on enemy if enemy collision."""
-        for entity in self.entities:
-            for projectile in entity.projectiles:
-                # --- move projectile and/or kill if platform collision --- #
-                collisions = move(projectile, self.platforms)
-                if True in collisions.values():
-                    # kill projectile if it hits a platform
-                    projectile.kill()
-
-            # --- kill projectile on enemy collision and inflict damage --- #
-            collisions = list_groupcollisions(entity.projectiles,
-                                              self.entities)
-            # iterate through each item (key, value) in dictionary
-            # key is projectile
-            # value is list of entities that collided with projectile
-            for projectile, entities_hit in collisions.items():
-                # iterate through each entity hit by projectile
-                for hit_entity in entities_hit:
-                    # if hit entity is entity that fired the projectile, skip
-                    if hit_entity == entity:
-                        continue
-
-                    projectile.kill()  # for each projectile (key), despawn it
-
-                    # inflict projectile damage
-                    hit_entity.hit(projectile.damage)
-                    if entity == self.player:
-                        self.player.score += 5
-
-            self.sprites.add(entity.projectiles)
+        """Moves every projectile in the level's projectile store by its
+        stored velocity. If a projectile moves off the map, collides with a
+        platform or an entity other than the one that fired it, it is
+        despawned. Damage inflicted on the entity if entity collision."""
+        self.projectiles.update(self.entity_hash, self.player)
 
     def update_enemy_vision(self):
         """Check if the player is inside an enemy's vision, if so, let the
-        Enemy object know."""
-        # iterate through each enemy
+        Enemy object know.
+
+        An enemy can see the player if one of the player's corners is within
+        its vision radius and the line to it is clear. Enemies near the
+        player are found through the entity hash, then the corners within
+        each of their radii are found in one go by comparing squared
+        distances with NumPy. Only those corners have lines cast to them."""
+        # only enemies within the largest vision radius of the player can see
+        # them, find those through the entity hash
+        nearby = set(self.entity_hash.query_rect(
+            self.player.rect.inflate(self.vision_radius * 2,
+                                     self.vision_radius * 2)))
+
+        # enemies that look for the player this step
+        candidates = []
+        far = 0
         for enemy in self.enemies:
-            enemy_radius = enemy.vision.radius
-            enemy_center = enemy.rect.center
+            if enemy not in nearby:
+                far += 1
+                # report no sighting of player
+                if enemy.watching:
+                    enemy.spotted(False)
+            # enemies near the player look for them in turn
+            elif self.ai_scheduler.vision_ready(enemy):
+                candidates.append(enemy)
+        self.ai_scheduler.skip_vision(far)
+        if not candidates:
+            return
 
-            # list of player points to check
-            player_points = [self.player.rect.topleft,
-                             self.player.rect.topright,
-                             self.player.rect.bottomleft,
-                             self.player.rect.bottomright]
+        # list of player points to check
+        player_points = [self.player.rect.topleft,
+                         self.player.rect.topright,
+                         self.player.rect.bottomleft,
+                         self.player.rect.bottomright]
+
+        # squared distance from each candidate's centre to each player point,
+        # compared with the squared radius to avoid square roots
+        centers = numpy.array([enemy.rect.center for enemy in candidates])
+        radii = numpy.array([enemy.vision.radius for enemy in candidates])
+        offsets = numpy.array(player_points)[None, :, :] - centers[:, None, :]
+        in_range = ((offsets ** 2).sum(axis=2) <=
+                    (radii ** 2)[:, None]).tolist()
+
+        for enemy, points_in_range in zip(candidates, in_range):
+            enemy_center = enemy.rect.center
 
             # iterate through each player point
-            for player_point in player_points:
+            for player_point, point_in_range in zip(player_points,
+                                                    points_in_range):
                 # check if point within enemy radius
-                if enemy_radius >= distance(enemy_center, player_point):
-                    # line is used to model projectile's path
-                    # method updates line's endpoints
-                    self.line.update_location(enemy_center, player_point)
-
-                    # check for collisions between line and platforms
-                    # function returns list of collisions
-                    collisions = list_collisions_mask(self.line,
-                                                      self.platforms)
-
-                    # if no collisions (i.e. collisions list is empty)
-                    if not collisions:
+                if point_in_range:
+                    # cast a projectile-wide line through the tile map to
+                    # check if the projectile's path is blocked by platforms
+                    if self.tilemap.line_clear(enemy_center, player_point,
+                                               PROJECTILEWIDTH):
                         # report sighting of player and update enemy with
                         # vector to player
                         # generate vector to player with inaccuracy
-                        proj_vector = inaccurate_vector(enemy_center,
-                                                        player_point, 10,
-                                                        enemy.inaccuracy)
+                        proj_vector = inaccurate_vector(
+                            enemy_center, player_point,
+                            PROJECTILESPEED * self.clock.step_scale,
+                            enemy.inaccuracy, self.random)
                         enemy.spotted(True, proj_vector)
                         # end for loop early
                         break
@@ -395,59 +594,55 @@ class LevelMain(Screen):
                 # report no sighting of player
                 enemy.spotted(False)
 
-    def list_platforms_beneath(self, sprite):
-        """Method to return list of platforms directly under a sprite."""
-        # move sprite down 1 pixel on screen
-        sprite.rect.y += 1
-        # carry out collision check between sprite and platforms
-        collisionslist = list_collisions(sprite, self.platforms)
-        # move sprite up 1 pixel to original position
-        sprite.rect.y -= 1
-        # return list of collisions
-        return collisionslist
-
-    def platform_beside_sprite(self, sprite):
-        """Returns if a platform is directly left/right of a sprite."""
-        # move sprite left 1 pixel to test left side
-        sprite.rect.x -= 1
-        # carry out collision check between sprite and platforms
-        collisionsleft = list_collisions(sprite, self.platforms)
-
-        # move sprite right 2 pixel to test right side
-        sprite.rect.x += 2
-        # carry out collision check between sprite and platforms
-        collisionsright = list_collisions(sprite, self.platforms)
-
-        # move sprite left 1 pixel to original position
-        sprite.rect.x -= 1
-
-        if collisionsleft or collisionsright:  # if either list not empty
-            return True
-        return False
+    def patrol_steps(self, enemy):
+        """Return how many steps a patrolling enemy can keep walking before
+        anything its movement AI looks at could change.
+
+        The floor beneath an enemy, the walls beside it and whether it is
+        past the floor's edge only depend on which tile columns its left and
+        right sides (and the pixels just outside them) are in, so nothing
+        changes until one of them crosses into another column. This assumes
+        the enemy keeps walking along the same floor: the AI scheduler wakes
+        it early if it moves vertically."""
+        speed = abs(round(enemy.defaultvelocity_x * self.clock.step_scale))
+        if speed == 0:
+            return self.ai_scheduler.budgets[enemy]["patrol_interval"]
+
+        steps = None
+        for x in (enemy.rect.left - 1, enemy.rect.left,
+                  enemy.rect.right - 1, enemy.rect.right):
+            # pixels x can move before leaving its column
+            if enemy.movingleft:
+                room = x % PLATFORMLENGTH
+            else:
+                room = PLATFORMLENGTH - 1 - x % PLATFORMLENGTH
+            if steps is None or room // speed < steps:
+                steps = room // speed
+        return steps
 
     def update_enemy_movement(self):
-        """Update an enemy sprite's knowledge of platforms it is colliding
-        with."""
+        """Update an enemy sprite's knowledge of the floor it is standing on
+        and the walls beside it. Floor edges and walls are looked up in the
+        tile map's floor index, built when the map was loaded.
+
+        Patrolling enemies (not watching the player) are put to sleep by the
+        AI scheduler until the next step their surroundings could change, as
+        their decisions can't change before then. They are woken early if
+        they start watching the player, fall or land, see AIScheduler."""
         for enemy in self.enemies:
-            # return list of platforms colliding with enemy
-            collided_platforms = self.list_platforms_beneath(enemy)
-
-            # check if enemy hits a platform on its left/right side, bool type
-            side_collision = self.platform_beside_sprite(enemy)
-
-            # if list not empty (i.e. there are platforms colliding with enemy)
-            if collided_platforms:
-                left_edge = None
-                right_edge = None
-                for platform in collided_platforms:
-                    # locate left edge
-                    if ((left_edge is None) or
-                       (platform.rect.left < left_edge)):
-                        left_edge = platform.rect.left
-                    # locate right edge
-                    if ((right_edge is None) or
-                       (platform.rect.right > right_edge)):
-                        right_edge = platform.rect.right
+            if not self.ai_scheduler.movement_ready(enemy):
+                continue
+
+            # left and right edges of the floor beneath the enemy, None if
+            # it isn't standing on a platform
+            floor = self.tilemap.floor_edges(enemy.rect)
+
+            # if the enemy is standing on a platform
+            if floor is not None:
+                left_edge, right_edge = floor
+
+                # check if enemy hits a platform on its left/right side
+                side_collision = self.tilemap.wall_beside(enemy.rect)
 
                 # reset jumping from previous call
                 enemy.jumping = False
@@ -496,11 +691,15 @@ class LevelMain(Screen):
                         enemy.movingleft = False
                         enemy.movingright = False
 
+                if not enemy.watching:
+                    self.ai_scheduler.sleep_movement(
+                        enemy, self.patrol_steps(enemy))
+
     def check_finish(self):
         """Method to check if the level is finished (completed/failed).
         If player collides with finish points, level completed.
         If player dead attribute true, level failed."""
-        if list_collisions(self.player, self.finishpoints) != []:
+        if self.tilemap.any_collision(self.player.rect, FINISH):
             self.selected = "level_complete"
         elif self.player.dead:
             self.selected = "level_fail"
@@ -510,11 +709,12 @@ class LevelMain(Screen):
         # level did finish, so confirm screen change
         self.confirmed = True
 
-    def resume(self, pause_duration):
+    def resume(self):
         """Method to properly resume the game after a game pause.
-        Cooldowns are corrected and SFX status is updated for entites."""
-        self.player.regulate_cooldown(pause_duration)
-        self.check_sfx()
+        Nothing needs updating: sound effect changes made in the options are
+        pushed to entities by the config service, and the clock stopped
+        counting time when the level was paused so cooldowns don't need
+        correcting."""
 
     def handle_events_keyboard_down(self, event):
         """Handle keyboard related events. If the given event matches, the
@@ -535,12 +735,18 @@ class LevelMain(Screen):
                 self.player.movingright = True
             elif event.key == pygame.K_w:  # W: jump
                 self.player.jumping = True
+            elif event.key == pygame.K_r:  # R: rewind
+                self.rewinding = True
+            elif event.key == pygame.K_F3:  # F3: toggle profiler overlay
+                self.profiler_overlay.toggle(self.sprites, OVERLAY_LAYER)
 
         elif event.type == pygame.MOUSEBUTTONUP:
             if event.button == 1:  # left click: shoot
                 # generate velocity vector from player to cursor
-                projectile_vector = vector(self.player.rect.center,
-                                           self.cursor, 10)
+                projectile_vector = vector(
+                    self.player.rect.center,
+                    self.camera.to_world(self.cursor),
+                    PROJECTILESPEED * self.clock.step_scale)
                 # spawn projectile with generated velocity
                 self.player.fire(projectile_vector)
 
@@ -561,49 +767,273 @@ class LevelMain(Screen):
                 self.player.movingright = False
             elif event.key == pygame.K_w:  # W: stop jumping
                 self.player.jumping = False
+            elif event.key == pygame.K_r:  # R: stop rewinding
+                self.rewinding = False
 
         # return to calling line if the event matched
         else:
             return False  # no match
         return True  # match
 
+    def handle_events(self):
+        """Handle the events in the pygame event queue, recording them if
+        input is being recorded. When replaying, the recorded input due
+        before the next step is handled instead, with the cursor where it
+        was."""
+        if self.replaying:
+            for event, cursor in self.recording.take(self.steps):
+                if event == RESET:
+                    self.reset_level()
+                    continue
+                if cursor is not None:
+                    self.cursor = cursor
+                self.handle_event(event)
+            return
+
+        for event in pygame.event.get():
+            if self.recording is not None:
+                self.recording.record(self.steps, event, self.cursor)
+            self.handle_event(event)
+
+    def record_input(self, recording):
+        """Record the input the level handles from now on into an
+        InputRecording made for this level's map, seed and tick rate."""
+        self.recording = recording
+        self.replaying = False
+
+    def replay_input(self, recording):
+        """Replay the input in an InputRecording instead of handling the
+        event queue. The level must have been built with the recording's
+        map, seed and tick rate, and have a fast forward clock so each update
+        runs one step."""
+        self.recording = recording
+        self.replaying = True
+
+    def finish_recording(self):
+        """Stop recording input and return the recording, with the number of
+        steps run and a final checkpoint stored in it."""
+        if self.steps % self.recording.tick_rate:
+            self.recording.record_checkpoint(self.steps, self.fingerprint())
+        recording, self.recording = self.recording, None
+        recording.steps = self.steps
+        return recording
+
+    def checkpoint(self):
+        """Every second of steps, record the level's fingerprint in the
+        recording, or check it against the recorded one when replaying."""
+        if self.steps % self.recording.tick_rate:
+            return
+        if self.replaying:
+            self.recording.check(self.steps, self.fingerprint())
+        else:
+            self.recording.record_checkpoint(self.steps, self.fingerprint())
+
+    def fingerprint(self):
+        """Return a checksum of the level's state: the simulated time and
+        every entity and projectile packed as they are for rewinding. Runs
+        that end with the same fingerprint almost certainly played out the
+        same."""
+        entity_records = numpy.array([entity.pack(0)
+                                      for entity in self.entities],
+                                     dtype=PACKED_STATE)
+        projectile_records = numpy.zeros(len(self.projectiles),
+                                         dtype=PACKED_PROJECTILE)
+        self.projectiles.pack(projectile_records)
+
+        checksum = zlib.crc32(str(self.clock.ticks).encode())
+        checksum = zlib.crc32(entity_records.tobytes(), checksum)
+        return zlib.crc32(projectile_records.tobytes(), checksum)
+
+    def draw_backdrop(self, surface):
+        """Draw the whole level, sprites and projectiles, onto a surface.
+        Used as the backdrop of overlay screens shown over the level."""
+        draw_level(surface, self.sprites, self.projectiles,
+                   self.camera.offset)
+
+    def snapshot(self):
+        """Return the level's current state: the simulated time, the player's
+        and each enemy's state, which chunks are built, which enemies are
+        active, asleep or yet to be spawned, the AI schedule and the random
+        number generator's state."""
+        return {"ticks": self.clock.ticks,
+                "random": self.random.getstate(),
+                "chunks": set(self.chunks),
+                "player": self.player.snapshot(),
+                "enemies": [(enemy, enemy.snapshot())
+                            for enemy in self.enemies],
+                "dormant": {key: [(enemy, enemy.snapshot())
+                                  for enemy in enemies]
+                            for key, enemies in self.dormant.items()},
+                "spawns": {key: list(spawns)
+                           for key, spawns in self.spawns.items()},
+                "ai_scheduler": self.ai_scheduler.snapshot()}
+
+    def restore(self, state):
+        """Put back the state returned by an earlier snapshot() call.
+
+        Entities are restored in place and put back into the groups they
+        were in, enemies spawned since are dropped and will be spawned again
+        when their chunks are next built. Projectiles are removed. Platforms
+        and text don't change, so chunks built since are released and the
+        rest are left alone."""
+        self.clock.ticks = state["ticks"]
+        self.random.setstate(state["random"])
+        self.player.restore(state["player"])
+
+        # take every enemy out of the level, then put back the active ones in
+        # their original order
+        for enemy in self.enemies:
+            enemy.kill()
+        for enemy, enemy_state in state["enemies"]:
+            enemy.restore(enemy_state)
+            self.sprites.add(enemy)
+            self.entities.add(enemy)
+            self.enemies.add(enemy)
+
+        self.dormant = {}
+        for key, enemies in state["dormant"].items():
+            for enemy, enemy_state in enemies:
+                enemy.restore(enemy_state)
+            self.dormant[key] = [enemy for enemy, _ in enemies]
+        self.spawns = {key: list(spawns)
+                       for key, spawns in state["spawns"].items()}
+        self.ai_scheduler.restore(state["ai_scheduler"])
+        self.projectiles.clear()
+
+        # recorded steps refer to projectile owners that have been cleared
+        self.rewind_buffer.clear()
+        self.rewind_slots = []
+        self.rewind_slot_indexes = {}
+
+        for key in set(self.chunks) - state["chunks"]:
+            for sprite in self.chunks.pop(key):
+                sprite.kill()
+        self.update_chunks()
+
     def reset_level(self):
-        """Reset the game level, clearing all current sprites and reloading
-        the map."""
-        # reset sprite groups by killing all sprites
-        for sprite in self.sprites:
-            sprite.kill()
+        """Reset the game level to how it was when first built, restoring
+        its sprites in place rather than creating them again."""
+        if self.recording is not None and not self.replaying:
+            self.recording.record_reset(self.steps)
+        self.restore(self.initial_state)
+
+    def rewind_slot(self, entity):
+        """Return an entity's slot in the rewind buffer's records, giving it
+        one if it hasn't got one."""
+        slot = self.rewind_slot_indexes.get(entity)
+        if slot is None:
+            slot = len(self.rewind_slots)
+            self.rewind_slots.append(entity)
+            self.rewind_slot_indexes[entity] = slot
+        return slot
+
+    def record_rewind(self):
+        """Record the state of the level's entities and projectiles in the
+        rewind buffer, packed into records rather than copied."""
+        self.rewind_buffer.record(
+            self.clock.ticks,
+            [entity.pack(self.rewind_slot(entity))
+             for entity in self.entities],
+            self.projectiles)
+
+    def rewind(self):
+        """Go back one recorded step, putting back the state of the entities
+        and projectiles recorded then.
+
+        Enemies that have died or gone to sleep since are brought back into
+        the level, and dead ones are scheduled again. Enemies spawned since
+        weren't recorded, so carry on as they are. Every enemy's AI is woken
+        up, as the scheduled times are for the undone future."""
+        step = self.rewind_buffer.pop()
+        if step is None:
+            return
+        ticks, entity_records, projectile_records = step
+
+        self.clock.ticks = ticks
+        for record in entity_records:
+            entity = self.rewind_slots[record["slot"]]
+            entity.unpack(record)
+            if not entity.alive():
+                # take out of the sleeping enemies, if asleep
+                for enemies in self.dormant.values():
+                    if entity in enemies:
+                        enemies.remove(entity)
+                # schedule again, if it died
+                if entity not in self.ai_scheduler.budgets:
+                    self.ai_scheduler.add(entity, entity.ai_budget)
+                self.sprites.add(entity)
+                self.entities.add(entity)
+                self.enemies.add(entity)
+        self.projectiles.unpack(projectile_records)
 
-        # redraw map, instantiating new sprites
-        self.draw_map()
+        for enemy in self.enemies:
+            enemy.disturbed = True
+        self.update_chunks()
 
-    def check_sfx(self):
-        """Iterates through each entity, enabling/disabling sound effects
-        depending on the config file values."""
-        for entity in self.entities:
-            entity.check_sfx_setting()
+    def step(self):
+        """Run one fixed step of the simulation, timing each phase. While
+        rewinding, go back a recorded step instead."""
+        measure = self.profiler.measure
 
-    def update(self):
-        """Update the cursor and sprites and check if the game is finished."""
-        self.update_cursor()
+        if self.rewinding:
+            measure("rewind", self.rewind)
+            return
 
-        self.handle_events()
+        # record the state before the step, for rewinding back to it
+        measure("record_rewind", self.record_rewind)
 
         # call update method for each entity sprite
-        self.entities.update()
+        measure("entities.update", self.update_entities)
 
         # move player, enemies and projectiles
-        self.move_player()
-        self.move_enemies()
-        self.move_projectiles()
+        measure("move_player", self.move_player)
+        measure("move_enemies", self.move_enemies)
+        measure("build_entity_hash", self.entity_hash.rebuild, self.entities)
+        measure("move_projectiles", self.move_projectiles)
 
         # update enemies sight
-        self.update_enemy_vision()
+        measure("update_enemy_vision", self.update_enemy_vision)
 
         # update enemy movement
-        self.update_enemy_movement()
+        measure("update_enemy_movement", self.update_enemy_movement)
 
         # check for game finish
-        self.check_finish()
+        measure("check_finish", self.check_finish)
+
+        # move the camera and build/release chunks around it
+        measure("update_chunks", self.update_chunks)
+
+        # count the AI updates the scheduler saved
+        vision_skipped, movement_skipped = self.ai_scheduler.take_counts()
+        self.profiler.count("vision_skipped", vision_skipped)
+        self.profiler.count("movement_skipped", movement_skipped)
+
+        # move simulated time on
+        self.clock.tick()
+        self.profiler.count("steps")
+
+    def update(self):
+        """Update the cursor, run the simulation steps due this frame and
+        check if the game is finished."""
+        self.update_cursor()
 
-        return self.process_next_screen()
+        self.profiler.measure("handle_events", self.handle_events)
+
+        # run as many fixed steps as needed to catch up with real time
+        for _ in range(self.clock.advance()):
+            self.step()
+            self.steps += 1
+            if self.recording is not None:
+                self.checkpoint()
+            # stop early if the level finished or was paused
+            if self.confirmed:
+                break
+
+        self.profiler.count("projectiles", len(self.projectiles))
+        self.profiler_overlay.update()
+
+        next_screen = self.process_next_screen()
+        if next_screen is not None:
+            # stop the clock while another screen is shown
+            self.clock.pause()
+        return next_screen
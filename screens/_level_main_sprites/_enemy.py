@@ -1,17 +1,24 @@
 """Enemy Class Module"""
-import pygame
 from ._entity import Entity, sfx_fire, sfx_hit
-from ._projectile import Projectile
-from utils._settings import PURPLE
 from ._enemy_vision import EnemyVision
 
 
 class Enemy(Entity):
     """Class for enemy"""
-    def __init__(self, color, width, height, startx, starty, vision,
-                 responsetime=1000, firecooldown=320, fireinaccuracy=15,
-                 vel_x=2, vel_y=-16):
-        super().__init__(color, width, height, startx, starty)
+    # state saved by snapshot()
+    SNAPSHOT_ATTRIBUTES = Entity.SNAPSHOT_ATTRIBUTES + (
+        "health", "number", "lastfired", "watching", "first_spotted",
+        "vectortoplayer", "disturbed")
+
+    # state packed by pack(), health is added by packed_values()
+    PACKED_FLAGS = Entity.PACKED_FLAGS + ("watching", "disturbed")
+    PACKED_TIMES = ("lastfired", "first_spotted")
+
+    def __init__(self, color, width, height, startx, starty, clock,
+                 projectiles, vision, responsetime=1000, firecooldown=320,
+                 fireinaccuracy=15, vel_x=2, vel_y=-16):
+        super().__init__(color, width, height, startx, starty, clock,
+                         projectiles)
         self.health = 50
         self.number = 0
 
@@ -20,7 +27,7 @@ class Enemy(Entity):
 
         # control firerate
         self.firecooldown = firecooldown
-        self.lastfired = pygame.time.get_ticks()
+        self.lastfired = self.clock.get_ticks()
         # control fire inaccuracy
         self.inaccuracy = fireinaccuracy
 
@@ -29,10 +36,17 @@ class Enemy(Entity):
         # store if enemy is maintaining view of the player
         self.watching = False
         # store time player was first spotted
-        self.first_spotted = pygame.time.get_ticks()
+        self.first_spotted = self.clock.get_ticks()
         # store vector from enemy to player
         self.vectortoplayer = ()
 
+        # set when something happens that the enemy's AI should respond to
+        # straight away, e.g. being hit. Cleared by the level's AI scheduler
+        self.disturbed = False
+        # AI budget the enemy is scheduled with, set by the level's AI
+        # scheduler
+        self.ai_budget = None
+
         # sprite default velocities
         self.defaultvelocity_x = vel_x
         self.defaultvelocity_y = vel_y
@@ -40,14 +54,25 @@ class Enemy(Entity):
         if vel_y >= 0:
             raise Exception(f"Vertical velocity not negative! Given: {vel_y}")
 
-    def fire(self, projectile_velocity):
-        """Spawns a projectile and adds it to the projectiles sprite group
-        attribute."""
-        projectile = Projectile(PURPLE, self.rect.centerx,
-                                self.rect.centery, projectile_velocity[0],
-                                projectile_velocity[1], 5)
+    def restore(self, state):
+        """Put back the state returned by an earlier snapshot() call."""
+        super().restore(state)
+        self.update_vision()
 
-        self.projectiles.add(projectile)
+    def packed_values(self):
+        """Return a list of the real values packed by pack(), including the
+        enemy's health."""
+        return super().packed_values() + [self.health]
+
+    def unpack(self, record):
+        """Put back the state packed into a PACKED_STATE record by pack()."""
+        self.health = int(super().unpack(record)[0])
+        self.update_vision()
+
+    def fire(self, projectile_velocity):
+        """Spawns a projectile in the level's projectile store."""
+        self.projectiles.add(self, self.rect.centerx, self.rect.centery,
+                             projectile_velocity[0], projectile_velocity[1], 5)
 
         if self.sfx:
             sfx_fire.play()
@@ -56,6 +81,7 @@ class Enemy(Entity):
         """Method to reduce health when hit by projectile."""
         self.health -= amount
         self.number += 1
+        self.disturbed = True
 
         if self.sfx:
             sfx_hit.play()
@@ -67,7 +93,13 @@ class Enemy(Entity):
         onplatform attribute is True) at the time it wants to jump.
 
         Additionally, this method handles vertical acceleration, in turn,
-        handling falling."""
+        handling falling.
+
+        As for the player, speeds are multiplied by the clock's
+        step_scale."""
+        # number of tuned steps this step stands for
+        scale = self.clock.step_scale
+
         # jump if on platform
         if self.jumping and self.onplatform:
             self.jumpmomentum = self.defaultvelocity_y
@@ -75,24 +107,27 @@ class Enemy(Entity):
 
         # move right
         if self.movingright:
-            self.velocity_x = self.defaultvelocity_x
+            self.velocity_x = self.defaultvelocity_x * scale
             # cant be sure player is still on a platform so enable gravity
             self.onplatform = False
 
         # move left
         if self.movingleft:
-            self.velocity_x = -self.defaultvelocity_x
+            self.velocity_x = -self.defaultvelocity_x * scale
             # cant be sure player is still on a platform so enable gravity
             self.onplatform = False
 
+        # momentum averaged over the tuned steps this step stands for
+        momentum = self.jumpmomentum
         if not self.onplatform:
             # apply gravity velocity
-            self.jumpmomentum += 1
+            self.jumpmomentum += scale
+            momentum = self.jumpmomentum - (scale - 1) / 2
 
         # gradually reduce momentum (i.e. upward acceleration decreases) so
         # that when momentum is positive, player begins to fall (pygame y axis
         # is 0 at top of screen so up is negative and down is positive)
-        self.velocity_y += self.jumpmomentum
+        self.velocity_y += momentum * scale
 
         # cap max velocity due to gravity to 4
         # min function returns smallest of arguments passed
@@ -118,7 +153,7 @@ class Enemy(Entity):
         if status is True:
             if not self.watching:
                 self.watching = True
-                self.first_spotted = pygame.time.get_ticks()
+                self.first_spotted = self.clock.get_ticks()
             # update vector from enemy to player
             self.vectortoplayer = vectortoplayer
         else:
@@ -128,7 +163,7 @@ class Enemy(Entity):
         """If the enemy has maintained view of the player for at least its
         responsetime's duration and hasn't fired in the last firecooldown's
         duration, fire at player."""
-        now = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
         if ((now - self.first_spotted > self.responsetime) and
            (now - self.lastfired > self.firecooldown)):
             self.lastfired = now
@@ -136,8 +171,7 @@ class Enemy(Entity):
 
     def kill_projectiles(self):
         """Kill all projectiles belonging to the sprite."""
-        for projectile in self.projectiles:
-            projectile.kill()
+        self.projectiles.remove_owner(self)
 
     def update(self):
         """Method to check if health is below 0, if so, despawn enemy.
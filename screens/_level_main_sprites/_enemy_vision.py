@@ -1,6 +1,7 @@
 """Enemy Vision Module"""
 import pygame
 from utils._settings import BLACK, PINK
+from utils._surfaces import new_surface
 
 
 class EnemyVision(pygame.sprite.Sprite):
@@ -9,9 +10,8 @@ class EnemyVision(pygame.sprite.Sprite):
         super().__init__()
         self.radius = radius
 
-        self.image = pygame.Surface([radius * 2, radius * 2])
-        self.image.set_colorkey(BLACK)
-        self.image.set_alpha(150)
+        self.image = new_surface([radius * 2, radius * 2], colorkey=BLACK,
+                                 alpha=150)
 
         # draw circle onto image with centre at centre of image
         pygame.draw.circle(self.image, PINK, (radius, radius), radius)
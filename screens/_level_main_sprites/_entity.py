@@ -1,7 +1,9 @@
 """Entity Class Module"""
+import numpy
 import pygame
 from utils._settings import BLACK
-from utils._config_handler import load_config
+from utils._surfaces import new_surface
+from utils._config_handler import config
 
 
 # --------------- Sound Objects --------------- #
@@ -15,18 +17,56 @@ sfx_hit.set_volume(0.35)
 sfx_respawn.set_volume(0.35)
 
 
-class Entity(pygame.sprite.Sprite):
+# --------------- Packed State --------------- #
+# layout of the state packed by Entity.pack(), for recording many steps of
+# play compactly: the entity's slot in the recording, its rect's position,
+# flags as bits, real values and times in milliseconds. Unused places are 0
+PACKED_VALUE_COUNT = 8
+PACKED_TIME_COUNT = 4
+PACKED_STATE = numpy.dtype([("slot", numpy.int32), ("x", numpy.int32),
+                            ("y", numpy.int32), ("flags", numpy.uint8),
+                            ("values", numpy.float64, PACKED_VALUE_COUNT),
+                            ("times", numpy.int64, PACKED_TIME_COUNT)])
+
+
+class Entity(pygame.sprite.DirtySprite):
     """Class to inherit from for player and NPC sprites. Not to be directly
-    used to create objects."""
-    def __init__(self, color, width, height, startx, starty):
+    used to create objects.
+
+    The attributes named in SNAPSHOT_ATTRIBUTES, and the rect's position,
+    are saved by snapshot() and put back by restore(), e.g. to reset a level
+    without creating its entities again. Subclasses extend the tuple with
+    their own state.
+
+    The state that changes from step to step can also be packed into a
+    record of PACKED_STATE with pack() and put back with unpack(), e.g. to
+    rewind the level. The attributes named in PACKED_FLAGS, PACKED_VALUES
+    and PACKED_TIMES are packed, and subclasses add any other values they
+    need to packed_values() and unpack().
+
+    The clock argument is the level's GameClock, used for all timing, and
+    projectiles is the level's ProjectileStore, which fired projectiles are
+    added to."""
+    # state saved by snapshot()
+    SNAPSHOT_ATTRIBUTES = ("velocity_x", "velocity_y", "movingleft",
+                           "movingright", "jumping", "jumpmomentum",
+                           "onplatform")
+
+    # state packed by pack(), as bits, floats and integer times
+    PACKED_FLAGS = ("movingleft", "movingright", "jumping", "onplatform")
+    PACKED_VALUES = ("velocity_x", "velocity_y", "jumpmomentum")
+    PACKED_TIMES = ()
+
+    def __init__(self, color, width, height, startx, starty, clock,
+                 projectiles):
         super().__init__()
-        self.image = pygame.Surface([width, height])
-        self.image.fill(BLACK)
-        self.image.set_colorkey(BLACK)  # greenscreen effect for images
+        # greenscreen effect for images
+        self.image = new_surface([width, height], colorkey=BLACK)
         self.color = color
+        self.clock = clock
 
-        # instantiate projectiles sprite group
-        self.projectiles = pygame.sprite.Group()
+        # store of the level's projectiles
+        self.projectiles = projectiles
 
         # draw the square
         pygame.draw.rect(self.image, color, [0, 0, width, height])
@@ -47,8 +87,58 @@ class Entity(pygame.sprite.Sprite):
         self.jumpmomentum = 0
         self.onplatform = False
 
-        # turn on/off sound effects (sfx)
+        # entities can move every frame so always redraw them
+        self.dirty = 2
+
+        # turn on/off sound effects (sfx), following later changes to the
+        # setting
         self.check_sfx_setting()
+        config.subscribe(self.config_changed)
+
+    def snapshot(self):
+        """Return a dict of the entity's current state."""
+        state = {name: getattr(self, name)
+                 for name in self.SNAPSHOT_ATTRIBUTES}
+        state["position"] = self.rect.topleft
+        return state
+
+    def restore(self, state):
+        """Put back the state returned by an earlier snapshot() call."""
+        for name in self.SNAPSHOT_ATTRIBUTES:
+            setattr(self, name, state[name])
+        self.rect.topleft = state["position"]
+
+    def packed_values(self):
+        """Return a list of the real values packed by pack()."""
+        return [getattr(self, name) for name in self.PACKED_VALUES]
+
+    def pack(self, slot):
+        """Return the entity's state as a tuple laid out like PACKED_STATE,
+        with the given slot."""
+        flags = 0
+        for bit, name in enumerate(self.PACKED_FLAGS):
+            if getattr(self, name):
+                flags |= 1 << bit
+        values = self.packed_values()
+        times = [getattr(self, name) for name in self.PACKED_TIMES]
+        return (slot, self.rect.x, self.rect.y, flags,
+                values + [0] * (PACKED_VALUE_COUNT - len(values)),
+                times + [0] * (PACKED_TIME_COUNT - len(times)))
+
+    def unpack(self, record):
+        """Put back the state packed into a PACKED_STATE record by pack().
+        Returns a list of the packed values after PACKED_VALUES, for
+        subclasses to put back."""
+        flags = int(record["flags"])
+        for bit, name in enumerate(self.PACKED_FLAGS):
+            setattr(self, name, bool(flags >> bit & 1))
+        values = record["values"].tolist()
+        for name, value in zip(self.PACKED_VALUES, values):
+            setattr(self, name, value)
+        for name, time in zip(self.PACKED_TIMES, record["times"].tolist()):
+            setattr(self, name, time)
+        self.rect.topleft = int(record["x"]), int(record["y"])
+        return values[len(self.PACKED_VALUES):]
 
     def resetvelocity(self):
         """Resets player velocity"""
@@ -56,10 +146,15 @@ class Entity(pygame.sprite.Sprite):
         self.velocity_y = 0
 
     def check_sfx_setting(self):
-        """Reads the sound_effects key from config.json and saves it to self.sfx.
+        """Reads the sound_effects setting and saves it to self.sfx.
         If self.sfx is True, sound effects should be played, otherwise they
         shouldn't."""
-        self.sfx = load_config()["sound_effects"]
+        self.sfx = config.sound_effects
+
+    def config_changed(self, key, value):
+        """Called by the config service when a setting changes."""
+        if key == "sound_effects":
+            self.sfx = value
 
     def update(self):
         """Update method to carry out actions for entity each game loop.
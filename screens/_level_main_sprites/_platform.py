@@ -1,15 +1,15 @@
 """Platform Class Module"""
 import pygame
 from utils._settings import BLACK
+from utils._surfaces import new_surface
 
 
-class Platform(pygame.sprite.Sprite):
+class Platform(pygame.sprite.DirtySprite):
     """Class for platforms"""
     def __init__(self, color, width, height, startx, starty):
         super().__init__()
-        self.image = pygame.Surface([width, height])
-        self.image.fill(BLACK)
-        self.image.set_colorkey(BLACK)  # greenscreen effect for images
+        # greenscreen effect for images
+        self.image = new_surface([width, height], colorkey=BLACK)
         self.color = color
 
         # draw rectangle
@@ -17,7 +17,3 @@ class Platform(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
 
         self.rect.x, self.rect.y = startx, starty
-
-        # define sprite's mask for collision calculation between line and
-        # platform for enemy vision
-        self.mask = pygame.mask.from_surface(self.image)
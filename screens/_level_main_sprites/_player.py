@@ -1,8 +1,7 @@
 """Player Class Module"""
 import pygame
 from ._entity import Entity, sfx_fire, sfx_hit, sfx_respawn
-from ._projectile import Projectile
-from utils._settings import WINDOW_WIDTH, GREEN, RED, YELLOW, PURPLE
+from utils._settings import WINDOW_WIDTH, GREEN, RED, YELLOW
 from utils._progressbar import ProgressBar
 from utils._text import Text
 from ._player_lives import LivesIndicator
@@ -10,8 +9,21 @@ from ._player_lives import LivesIndicator
 
 class Player(Entity):
     """Class for player"""
-    def __init__(self, color, width, height, startx, starty):
-        super().__init__(color, width, height, startx, starty)
+    # state saved by snapshot(), score is restored through its setter so the
+    # score text is updated
+    SNAPSHOT_ATTRIBUTES = Entity.SNAPSHOT_ATTRIBUTES + (
+        "dead", "sprinting", "lastfired", "lastjumped", "lastsprinted",
+        "lasthit", "number", "score")
+
+    # state packed by pack(), health, stamina, score and lives are added by
+    # packed_values()
+    PACKED_FLAGS = Entity.PACKED_FLAGS + ("sprinting", "dead")
+    PACKED_TIMES = ("lastfired", "lastjumped", "lastsprinted", "lasthit")
+
+    def __init__(self, color, width, height, startx, starty, clock,
+                 projectiles):
+        super().__init__(color, width, height, startx, starty, clock,
+                         projectiles)
         self.defaulthealth = 25
         self.defaultstamina = 100
         self.dead = False
@@ -22,10 +34,10 @@ class Player(Entity):
         self.staminacooldown_jump = 2500
         self.staminacooldown_sprint = 1500
         self.healthcooldown = 7000
-        self.lastfired = pygame.time.get_ticks()
-        self.lastjumped = pygame.time.get_ticks()
-        self.lastsprinted = pygame.time.get_ticks()
-        self.lasthit = pygame.time.get_ticks()
+        self.lastfired = self.clock.get_ticks()
+        self.lastjumped = self.clock.get_ticks()
+        self.lastsprinted = self.clock.get_ticks()
+        self.lasthit = self.clock.get_ticks()
 
         # for hit debugging
         self.number = 0
@@ -45,25 +57,55 @@ class Player(Entity):
         self.stats.add(self.score_text, self.health.bars, self.stamina.bars,
                        self.lives)
 
+    def snapshot(self):
+        """Return a dict of the player's current state, including their
+        stats."""
+        state = super().snapshot()
+        state["stats"] = (self.health.value, self.stamina.value,
+                          self.lives.value)
+        return state
+
+    def restore(self, state):
+        """Put back the state returned by an earlier snapshot() call."""
+        super().restore(state)
+        self.health.value, self.stamina.value, self.lives.value = (
+            state["stats"])
+
+    def packed_values(self):
+        """Return a list of the real values packed by pack(), including the
+        player's stats."""
+        return super().packed_values() + [self.health.value,
+                                          self.stamina.value, self.score,
+                                          self.lives.value]
+
+    def unpack(self, record):
+        """Put back the state packed into a PACKED_STATE record by pack().
+        The score and lives are only set if changed, as setting them redraws
+        their sprites."""
+        health, stamina, score, lives = super().unpack(record)[:4]
+        self.health.value = health
+        self.stamina.value = stamina
+        if int(score) != self.score:
+            self.score = int(score)
+        if int(lives) != self.lives.value:
+            self.lives.value = int(lives)
+
     def fire(self, projectile_velocity):
-        """Spawns a projectile and adds it to the projectiles sprite group
-        attribute."""
-        now = pygame.time.get_ticks()
+        """Spawns a projectile in the level's projectile store."""
+        now = self.clock.get_ticks()
         if now - self.lastfired >= self.firecooldown:
             self.lastfired = now
 
-            projectile = Projectile(PURPLE, self.rect.centerx,
-                                    self.rect.centery, projectile_velocity[0],
-                                    projectile_velocity[1], 5)
-
-            self.projectiles.add(projectile)
+            self.projectiles.add(self, self.rect.centerx, self.rect.centery,
+                                 projectile_velocity[0],
+                                 projectile_velocity[1], 5)
 
             if self.sfx:
                 sfx_fire.play()
 
     def hit(self, amount):
         """Method to reduce health when hit by projectile."""
-        now = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
         self.lasthit = now
 
         self.health.value -= amount
@@ -91,7 +133,7 @@ class Player(Entity):
         """Replenish health slowly if player hasn't taken damage for the
         duration of self.healthcooldown."""
         if now - self.lasthit >= self.healthcooldown:
-            self.health.value += 0.01
+            self.health.value += 0.01 * self.clock.step_scale
 
     def replenish_stamina(self, now):
         """Replenish stamina if player hasn't sprinted/jumped for respective
@@ -99,7 +141,7 @@ class Player(Entity):
         if (not(self.jumping and self.sprinting) and
            (now - self.lastjumped >= self.staminacooldown_jump) and
            (now - self.lastsprinted >= self.staminacooldown_sprint)):
-            self.stamina.value += 0.5
+            self.stamina.value += 0.5 * self.clock.step_scale
 
     def move_2d(self, now):
         """Move the sprite horizontally (left/right) and vertically (jump/fall).
@@ -108,7 +150,14 @@ class Player(Entity):
         onplatform attribute is True) at the time it wants to jump.
 
         Additionally, this method handles vertical acceleration, in turn,
-        handling falling."""
+        handling falling.
+
+        Speeds and stamina costs are per step at the tuned tick rate, so are
+        multiplied by the clock's step_scale. jumpmomentum is kept in tuned
+        steps' units."""
+        # number of tuned steps this step stands for
+        scale = self.clock.step_scale
+
         # jump if on platform
         if self.jumping and self.onplatform:
             # check if enough stamina
@@ -125,12 +174,12 @@ class Player(Entity):
         if self.movingright:
             # check if sprint key down and sufficient stamina
             if self.sprinting and self.stamina.value >= 2:
-                self.velocity_x = 6
-                self.stamina.value -= 2
+                self.velocity_x = 6 * scale
+                self.stamina.value -= 2 * scale
                 self.lastsprinted = now
             # otherwise move at default velocity
             else:
-                self.velocity_x = 4
+                self.velocity_x = 4 * scale
                 # reset sprint so stamina can regen fully
                 self.sprinting = False
 
@@ -141,26 +190,29 @@ class Player(Entity):
         if self.movingleft:
             # check if sprint key down and sufficient stamina
             if self.sprinting and self.stamina.value >= 2:
-                self.velocity_x = -6
-                self.stamina.value -= 2
+                self.velocity_x = -6 * scale
+                self.stamina.value -= 2 * scale
                 self.lastsprinted = now
             # otherwise move at default velocity
             else:
-                self.velocity_x = -4
+                self.velocity_x = -4 * scale
                 # reset sprint so stamina can regen fully
                 self.sprinting = False
 
             # cant be sure player is still on a platform so enable gravity
             self.onplatform = False
 
+        # momentum averaged over the tuned steps this step stands for
+        momentum = self.jumpmomentum
         if not self.onplatform:
             # apply gravity velocity
-            self.jumpmomentum += 1
+            self.jumpmomentum += scale
+            momentum = self.jumpmomentum - (scale - 1) / 2
 
         # gradually reduce momentum (i.e. upward acceleration decreases) so
         # that when momentum is positive, player begins to fall (pygame y axis
         # is 0 at top of screen so up is negative and down is positive)
-        self.velocity_y += self.jumpmomentum
+        self.velocity_y += momentum * scale
 
         # cap max velocity due to gravity to 4
         # min function returns smallest of arguments passed
@@ -177,21 +229,12 @@ class Player(Entity):
             else:
                 self.respawn()
 
-    def regulate_cooldown(self, time_paused):
-        """Adjust the lastfired, lastjumped, lastsprinted and lasthit
-        attributes to account for the time paused as if the game was never
-        paused."""
-        self.lastfired = self.lastfired + time_paused
-        self.lastjumped = self.lastjumped + time_paused
-        self.lastsprinted = self.lastsprinted + time_paused
-        self.lasthit = self.lasthit + time_paused
-
     def update(self):
         """Carry out operations to update player's location and attributes
         like health and stamina."""
         super().update()
 
-        now = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
 
         self.replenish_health(now)
 
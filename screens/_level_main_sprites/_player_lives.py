@@ -1,17 +1,25 @@
 """Player Lives Indicator Module"""
 import pygame
-from utils._settings import WHITE, WINDOW_HEIGHT, WINDOW_WIDTH
+from utils._settings import WHITE
+from utils._surfaces import new_surface, converted_surface
 
-pygame.init()
-resolution = (WINDOW_WIDTH, WINDOW_HEIGHT)
-screen = pygame.display.set_mode(resolution)
+# heart images by state, loaded when the first heart is created
+heart_images = {}
 
-# import images and convert to pygame surfaces
-heart_full = pygame.image.load("assets/heart_full.png").convert()
-heart_empty = pygame.image.load("assets/heart_empty.png").convert()
 
+def load_heart_images():
+    """Load the heart images into heart_images if not already loaded. Images
+    are converted by converted_surface(), so the module can be used without
+    opening a window."""
+    if heart_images:
+        return
 
-class LivesIndicator(pygame.sprite.Sprite):
+    for state in ("full", "empty"):
+        image = pygame.image.load(f"assets/heart_{state}.png")
+        heart_images[state] = converted_surface(image, colorkey=WHITE)
+
+
+class LivesIndicator(pygame.sprite.DirtySprite):
     """Class for Player Lives Indicator"""
     def __init__(self, startx, centery):
         super().__init__()
@@ -21,9 +29,7 @@ class LivesIndicator(pygame.sprite.Sprite):
         # heart image dimensions: 30x28
         # surface width with 3 pixels between each heart
         # 30*3+3*2 = 96
-        self.image = pygame.Surface((96, 28))
-        self.image.fill(WHITE)
-        self.image.set_colorkey(WHITE)
+        self.image = new_surface((96, 28), colorkey=WHITE)
         color = WHITE
 
         # draw the rectangle
@@ -66,6 +72,9 @@ class LivesIndicator(pygame.sprite.Sprite):
         # draw updated hearts to surface
         self.hearts.draw(self.image)
 
+        # redraw sprite on next frame
+        self.dirty = 1
+
     @property
     def value(self):
         """Property decorator for value attribute"""
@@ -85,6 +94,8 @@ class Heart(pygame.sprite.Sprite):
     def __init__(self, startx, starty):
         super().__init__()
 
+        load_heart_images()
+
         # define _state attribute
         self._state = "full"
 
@@ -105,12 +116,9 @@ class Heart(pygame.sprite.Sprite):
 
     @state.setter
     def state(self, new_state):
-        if new_state == "full":
-            self.image = heart_full
-        elif new_state == "empty":
-            self.image = heart_empty
+        if new_state in heart_images:
+            self.image = heart_images[new_state]
         else:
             raise Exception("Invalid heart state")
-        self.image.set_colorkey(WHITE)
 
         self._state = new_state
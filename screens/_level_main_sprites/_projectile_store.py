@@ -0,0 +1,247 @@
+"""Projectile Store Module"""
+import numpy
+import pygame
+from utils._tile_map import PLATFORM
+
+
+# layout of a projectile packed by ProjectileStore.pack(), one field per array
+PACKED_PROJECTILE = numpy.dtype([("x", numpy.float64),
+                                 ("y", numpy.float64),
+                                 ("velocity_x", numpy.float64),
+                                 ("velocity_y", numpy.float64),
+                                 ("damage", numpy.int32),
+                                 ("owner", numpy.int32)])
+
+
+class ProjectileStore():
+    """Class holding every projectile in a level.
+
+    Projectiles aren't sprites. Each attribute of every projectile is kept in
+    its own NumPy array (a struct of arrays), so moving them, removing those
+    that leave the map and checking what they hit is done with a handful of
+    array operations per step however many projectiles there are. The first
+    count entries of each array are the live projectiles.
+
+    Projectiles are squares of the given size. x and y hold the top left
+    corner, velocity_x and velocity_y the distance moved per step, damage the
+    health taken from an entity that is hit and owner the index of the entity
+    that fired it in self.owners. Entities don't get hit by their own
+    projectiles."""
+    def __init__(self, tilemap, color, size=9, capacity=64):
+        self.tilemap = tilemap
+        self.color = color
+        self.size = size
+
+        # tile grid as a 2D array for looking up many cells at once
+        self.tiles = numpy.frombuffer(bytes(tilemap.tiles),
+                                      dtype=numpy.uint8).reshape(
+                                          tilemap.rows, tilemap.columns)
+
+        # entities that have fired projectiles, and their index in owners
+        self.owners = []
+        self.owner_indexes = {}
+
+        self.count = 0
+        self.x = numpy.zeros(capacity)
+        self.y = numpy.zeros(capacity)
+        self.velocity_x = numpy.zeros(capacity)
+        self.velocity_y = numpy.zeros(capacity)
+        self.damage = numpy.zeros(capacity, dtype=numpy.int32)
+        self.owner = numpy.zeros(capacity, dtype=numpy.int32)
+
+    def __len__(self):
+        return self.count
+
+    def owner_index(self, entity):
+        """Return the index of an entity in owners, adding it if needed."""
+        index = self.owner_indexes.get(entity)
+        if index is None:
+            index = len(self.owners)
+            self.owners.append(entity)
+            self.owner_indexes[entity] = index
+        return index
+
+    def grow(self):
+        """Double the capacity of the arrays."""
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "velocity_x", "velocity_y", "damage",
+                     "owner"):
+            old = getattr(self, name)
+            new = numpy.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, owner, centerx, centery, velocity_x, velocity_y, damage):
+        """Spawn a projectile centred on a point."""
+        if self.count == len(self.x):
+            self.grow()
+
+        i = self.count
+        self.x[i] = centerx - self.size // 2
+        self.y[i] = centery - self.size // 2
+        self.velocity_x[i] = velocity_x
+        self.velocity_y[i] = velocity_y
+        self.damage[i] = damage
+        self.owner[i] = self.owner_index(owner)
+        self.count += 1
+
+    def keep(self, alive):
+        """Keep only the projectiles where the boolean array alive is True,
+        moving them to the front of the arrays."""
+        kept = int(numpy.count_nonzero(alive))
+        for array in (self.x, self.y, self.velocity_x, self.velocity_y,
+                      self.damage, self.owner):
+            array[:kept] = array[:self.count][alive]
+        self.count = kept
+
+    def pack(self, records):
+        """Copy every live projectile into the start of an array of
+        PACKED_PROJECTILE records, which must be long enough to hold them.
+        Returns the number of projectiles copied."""
+        for name in PACKED_PROJECTILE.names:
+            records[name][:self.count] = getattr(self, name)[:self.count]
+        return self.count
+
+    def unpack(self, records):
+        """Replace every projectile with those in an array of
+        PACKED_PROJECTILE records written by pack(). Owners are indexes in
+        owners, so the store mustn't have been cleared since."""
+        while len(self.x) < len(records):
+            self.grow()
+        self.count = len(records)
+        for name in PACKED_PROJECTILE.names:
+            getattr(self, name)[:self.count] = records[name]
+
+    def remove_owner(self, entity):
+        """Remove every projectile fired by an entity."""
+        index = self.owner_indexes.get(entity)
+        if index is not None and self.count:
+            self.keep(self.owner[:self.count] != index)
+
+    def clear(self):
+        """Remove every projectile and forget their owners."""
+        self.count = 0
+        self.owners = []
+        self.owner_indexes = {}
+
+    def hits_platform(self, x, y):
+        """Return a boolean array of which projectiles at the given top left
+        corners overlap a platform tile. Projectiles are smaller than a tile,
+        so checking the tiles under their 4 corners covers every tile they
+        overlap. Cells outside the map are empty."""
+        tile_size = self.tilemap.tile_size
+        rows, columns = self.tiles.shape
+
+        left = numpy.floor(x).astype(numpy.int64)
+        top = numpy.floor(y).astype(numpy.int64)
+        hits = numpy.zeros(len(x), dtype=bool)
+        for corner_x in (left, left + self.size - 1):
+            col = corner_x // tile_size
+            for corner_y in (top, top + self.size - 1):
+                row = corner_y // tile_size
+                inside = ((col >= 0) & (col < columns) &
+                          (row >= 0) & (row < rows))
+                tiles = self.tiles[row[inside], col[inside]]
+                hits[inside] |= tiles == PLATFORM
+        return hits
+
+    def update(self, entity_hash, player=None):
+        """Move every projectile one step, then remove the projectiles that
+        hit a platform, leave the map or hit an entity. Entities are found
+        through entity_hash, a SpatialHash of the level's entities. Entities
+        hit take the projectile's damage and the player scores 5 for each hit
+        made with their projectiles.
+
+        As with sprites moved by move(), projectiles move horizontally first
+        then vertically, and hitting a platform after either counts.
+
+        Hits are only checked where a move ends, so a projectile moving
+        further than its size plus the thickness of what's in its way could
+        pass straight through it. When projectiles are that fast (e.g. at low
+        tick rates) the step is split into equal sub-steps short enough to
+        hit the thinnest entity or platform, checking for hits after each."""
+        if not self.count:
+            return
+        count = self.count
+        x = self.x[:count]
+        y = self.y[:count]
+
+        # longest move that can't pass through the thinnest thing in the way
+        thinnest = min((min(entity.rect.width, entity.rect.height)
+                        for entity in entity_hash),
+                       default=self.tilemap.tile_size)
+        longest = self.size + min(thinnest, self.tilemap.tile_size) - 1
+        speed = max(numpy.abs(self.velocity_x[:count]).max(),
+                    numpy.abs(self.velocity_y[:count]).max())
+        substeps = max(int(numpy.ceil(speed / longest)), 1)
+        velocity_x = self.velocity_x[:count] / substeps
+        velocity_y = self.velocity_y[:count] / substeps
+
+        dead = numpy.zeros(count, dtype=bool)
+        owner = self.owner[:count]
+        for _ in range(substeps):
+            x += velocity_x
+            dead |= self.hits_platform(x, y)
+            y += velocity_y
+            dead |= self.hits_platform(x, y)
+
+            # off the map
+            dead |= ((x >= self.tilemap.width) | (x + self.size <= 0) |
+                     (y >= self.tilemap.height) | (y + self.size <= 0))
+
+            # entity hits, ignoring projectiles that already hit something
+            for projectile, entity in self.hits_entities(x, y, entity_hash,
+                                                         dead):
+                entity.hit(int(self.damage[projectile]))
+                if (player is not None and
+                   self.owners[owner[projectile]] is player):
+                    player.score += 5
+                dead[projectile] = True
+
+        self.keep(~dead)
+
+    def hits_entities(self, x, y, entity_hash, ignore):
+        """Return a list of (projectile index, entity) pairs for each
+        projectile at the given top left corners that overlaps an entity
+        other than its owner, skipping projectiles where the boolean array
+        ignore is True.
+
+        Only the entities near each projectile are checked, found in a batch
+        through the spatial hash, so the cost grows with the number of
+        projectiles rather than projectiles times entities."""
+        live = numpy.flatnonzero(~ignore)
+        boxes, items = entity_hash.query_boxes(x[live], y[live],
+                                               x[live] + self.size,
+                                               y[live] + self.size)
+        if not len(boxes):
+            return []
+        projectiles = live[boxes]
+
+        # owner index of each entity in the hash, to skip self hits
+        entity_owners = numpy.array([self.owner_indexes.get(entity, -1)
+                                     for entity in entity_hash.items])
+        own = self.owner[projectiles] == entity_owners[items]
+
+        return [(projectile, entity_hash.items[item])
+                for projectile, item in zip(projectiles[~own].tolist(),
+                                            items[~own].tolist())]
+
+    def rects(self):
+        """Return a list of rects covering each projectile."""
+        lefts = numpy.floor(self.x[:self.count]).astype(int).tolist()
+        tops = numpy.floor(self.y[:self.count]).astype(int).tolist()
+        return [pygame.Rect(left, top, self.size, self.size)
+                for left, top in zip(lefts, tops)]
+
+    def draw(self, surface, offset=(0, 0)):
+        """Draw every projectile onto a surface, shifted by -offset (e.g. a
+        camera's position), and return the rects drawn. Rects are clipped to
+        the surface first, as fill() draws rects that are partly off the left
+        or top of a surface in the wrong place."""
+        surface_rect = surface.get_rect()
+        offset_x, offset_y = offset
+        rects = [rect.move(-offset_x, -offset_y).clip(surface_rect)
+                 for rect in self.rects()]
+        for rect in rects:
+            surface.fill(self.color, rect)
+        return rects
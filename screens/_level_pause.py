@@ -20,14 +20,6 @@ class LevelPause(Screen):
         self.add_text()
         self.add_buttons()
 
-        # define attributes specific to pause screen
-        self.pause_begin = pygame.time.get_ticks()
-
-        self.pause_end = None
-
-        # calculate time paused
-        self.duration = None
-
     # ---------- Add Text and Button Sprites ---------- #
 
     def add_text(self):
@@ -127,21 +119,3 @@ class LevelPause(Screen):
         else:
             return False  # no match
         return True  # match
-
-    def process_next_screen(self):
-        """Return the next screen to display (returning None will mean the
-        current screen will continue to be displayed."""
-
-        if self.confirmed:
-            self.confirmed = False
-            self.set_selected_click()
-
-            if self.selected == "resume":
-                # additional steps if resuming
-                # calculate total time paused and store in duration attribute
-                self.pause_end = pygame.time.get_ticks()
-                self.duration = self.pause_end - self.pause_begin
-            # return next screen's name
-            return self.selected
-        # return nothing if selected item not confirmed (e.g. no left click)
-        return None
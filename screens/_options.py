@@ -1,7 +1,7 @@
 """Options Screen Module"""
 import pygame
 from ._screen import Screen
-from utils._config_handler import load_config, save_config
+from utils._config_handler import config
 from utils._text import Text
 from utils._button import Button
 from .helpers._options_button import ToggleButton
@@ -11,11 +11,10 @@ from utils._settings import (WINDOW_WIDTH, DARK_RED, BLUE, BLACK, CYAN, YELLOW)
 
 class Options(Screen):
     """Class for options screen
-    Imported config is {"music": True,
+    Shown settings are {"music": True,
                         "sound_effects": True}"""
     def __init__(self, screens):
         super().__init__(screens, has_quit_button=False)
-        self.config = load_config()
 
         # add screen specific event handlers to list of event handlers
         self.event_handlers.extend((self.handle_events_keyboard,
@@ -67,7 +66,8 @@ class Options(Screen):
         # ----- ADD SETTING TOGGLE BUTTONS ----- #
         # each iteration height increments 55
         # zip function to handle parallel iterator variables
-        config_states = self.config.values()
+        settings = config.as_dict()
+        config_states = settings.values()
         button_toggle = []
         for value in config_states:
             if value is True:
@@ -81,7 +81,7 @@ class Options(Screen):
                                               range(250,
                                                     250+100*len(button_toggle),
                                                     100),
-                                              self.config.keys()):
+                                              settings.keys()):
             button = ToggleButton(80, 50, toggle, 30, "middle_left",
                                   WINDOW_WIDTH/2 + 200, height,
                                   identifier="config_" + identifier)
@@ -91,6 +91,10 @@ class Options(Screen):
         # set top button as highlighted
         self.set_selected_hover()
 
+        # keep toggle buttons in step with the settings, including changes
+        # made to the config file outside the game
+        config.subscribe(self.config_changed)
+
     def handle_events_keyboard(self, event):
         """Handle keyboard related events. If the given event matches, the
         corresponding actions for that matched event are carried out."""
@@ -143,34 +147,28 @@ class Options(Screen):
         return True  # match
 
     def config_music(self):
-        """Toggle music key in config and update button."""
-        # get music togglebutton instance
-        button_music = return_button("config_music", self.buttons)
-
-        if self.config["music"] is True:
-            self.config["music"] = False  # change value in file
-            pygame.mixer.music.stop()  # stop music
-            button_music.toggle_off()  # toggle button to off
-
-        else:
-            self.config["music"] = True  # change value in file
-            pygame.mixer.music.play(-1)  # start music
-            button_music.toggle_on()  # toggle button to on
-
-        save_config(self.config)  # save changes to file
+        """Toggle music setting. The button is updated and the music started
+        or stopped by the config service's subscribers."""
+        config.music = not config.music
 
     def config_sound_effects(self):
-        """Toggle sound effect key in config and update button."""
-        # get sound_effects togglebutton instance
-        button_sound_effects = return_button("config_sound_effects",
-                                             self.buttons)
-
-        if self.config["sound_effects"] is True:
-            self.config["sound_effects"] = False  # change value in file
-            button_sound_effects.toggle_off()  # toggle button to off
-
+        """Toggle sound effects setting. The button is updated by the config
+        service's subscribers."""
+        config.sound_effects = not config.sound_effects
+
+    def config_changed(self, key, value):
+        """Called by the config service when a setting changes, toggles the
+        setting's button to match."""
+        button = return_button("config_" + key, self.buttons)
+        if button is None:
+            return
+        if value:
+            button.toggle_on()
         else:
-            self.config["sound_effects"] = True  # change value in file
-            button_sound_effects.toggle_on()  # toggle button to on
+            button.toggle_off()
+
+        # toggling leaves the button in hover state, only wanted if selected
+        if self.selected != button.identifier:
+            button.state_idle()
 
-        save_config(self.config)  # save changes to file
+        self.dirty = True
@@ -183,9 +183,11 @@ class SaveScore(Screen):
         self.update_text_sprite()
 
     def update_text_sprite(self):
-        """Update the text sprite's surface with new text string."""
-        self.text_sprite.text = self.text
-        self.text_sprite.update()
+        """Update the text sprite's surface with new text string, if it has
+        changed."""
+        if self.text_sprite.text != self.text:
+            self.text_sprite.text = self.text
+            self.dirty = True
 
     def update_text_backspace(self):
         """Remove the last character on the text attribute if the backspace is
@@ -197,7 +199,7 @@ class SaveScore(Screen):
     def update_alert(self, text):
         """Update the alert sprite with the given text."""
         self.alert_text.text = text
-        self.alert_text.update()
+        self.dirty = True
 
     def save_local(self):
         """Attempt to save the score to scores.json."""
@@ -235,6 +237,14 @@ class SaveScore(Screen):
             # display alert on screen to remind user
             self.update_alert("Tags must consist of 3 characters.")
 
+    def idle_timeout(self):
+        """Return the longest time in milliseconds the screen can go without
+        an update, none while backspace is held as a character is removed
+        every update."""
+        if self.backspace:
+            return 0
+        return super().idle_timeout()
+
     def update(self):
         """Update the menu by checking for any events and updating attributes
         and button states as needed."""
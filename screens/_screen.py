@@ -1,5 +1,6 @@
 """Screen Class Module"""
 import pygame
+from utils._settings import MENU_IDLE_TIMEOUT
 from utils._functions import (is_point_within_rect, set_button_idle,
                               set_button_hover, set_button_click)
 
@@ -48,6 +49,15 @@ class Screen():
         # list of event handler sub-functions
         self.event_handlers = []
 
+        # store if the screen has changed since it was last drawn, set when
+        # selection, text or button states change. Screens shown on demand
+        # are only redrawn when set
+        self.dirty = True
+
+        # event taken from the queue by wait_for_event, handled first on the
+        # next update
+        self.waited_event = None
+
     @property
     def selected(self):
         """Property decorator getter for selected attribute"""
@@ -79,18 +89,25 @@ class Screen():
     def set_selected_idle(self):
         """Set the currently selected screen's button to idle state."""
         set_button_idle(self.buttons, self.selected)
+        self.dirty = True
 
     def set_selected_hover(self):
         """Set the currently selected screen's button to hover state."""
         set_button_hover(self.buttons, self.selected)
+        self.dirty = True
 
     def set_selected_click(self):
         """Set the currently selected screen's button to click state."""
         set_button_click(self.buttons, self.selected)
+        self.dirty = True
 
     def is_button_hover(self):
         """Check if cursor is hovering over a button."""
         for button in self.buttons:
+            # nothing changes if the button is already hovered over
+            if (button.identifier == self.selected and
+               button.state == "hover"):
+                continue
             if is_point_within_rect(self.cursor, button):
                 self.set_selected_idle()
                 self.selected = button.identifier
@@ -174,14 +191,45 @@ class Screen():
         """Get and handle events from the pygame event queue.
         Each event gets iterated through each event handler to carry out tasks
         if it matches a specific event."""
-        for event in pygame.event.get():
-            # iterate through each event handler method
-            for event_handler in self.event_handlers:
-                # call event handler method with event as argument
-                # if event matched, match = True, otherwise match = False
-                match = event_handler(event)
-                if match:  # if match == True
-                    break  # end for loop
+        events = pygame.event.get()
+        if self.waited_event is not None:
+            events.insert(0, self.waited_event)
+            self.waited_event = None
+        for event in events:
+            self.handle_event(event)
+
+    def handle_event(self, event):
+        """Pass an event to each event handler in turn until one matches."""
+        # the window has been uncovered and needs drawing again
+        if event.type == pygame.VIDEOEXPOSE:
+            self.dirty = True
+
+        # iterate through each event handler method
+        for event_handler in self.event_handlers:
+            # call event handler method with event as argument
+            # if event matched, match = True, otherwise match = False
+            match = event_handler(event)
+            if match:  # if match == True
+                break  # end for loop
+
+    def idle_timeout(self):
+        """Return the longest time in milliseconds the screen can go without
+        an update when no events arrive: until the next keyboard navigation
+        step while an arrow key is held, otherwise MENU_IDLE_TIMEOUT."""
+        if self.select_up or self.select_down:
+            elapsed = pygame.time.get_ticks() - self.last_selected
+            return max(self.select_cooldown - elapsed, 0)
+        return MENU_IDLE_TIMEOUT
+
+    def wait_for_event(self, timeout):
+        """Block until an event arrives or timeout milliseconds have passed,
+        rather than updating a screen that has nothing to do. The event is
+        kept to be handled first by the next update."""
+        if timeout <= 0:
+            return
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            self.waited_event = event
 
     def update(self):
         """Update the menu by checking for any events and updating attributes
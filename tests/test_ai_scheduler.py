@@ -0,0 +1,145 @@
+"""AI Scheduler Tests
+
+Patrolling enemies are put to sleep until their surroundings could next
+change, which must not change how a level plays. These tests play levels
+with the default patrol_interval and with patrol sleeping turned off (0),
+and check every step ends in the same state, then check the scheduler wakes
+sleeping enemies when their surroundings change."""
+import os
+
+# run without a window or sound device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+from benchmark import LEVEL_SCREENS, script_combat, stress_map  # noqa: E402
+from screens._level_main import LevelMain, PLATFORMLENGTH  # noqa: E402
+from utils._ai_scheduler import (AIScheduler,  # noqa: E402
+                                 DEFAULT_AI_BUDGET)
+from utils._game_clock import GameClock  # noqa: E402
+from utils._settings import TICK_RATE  # noqa: E402
+from utils._tile_map import TileMap  # noqa: E402
+
+
+# steps played on each map, long enough for enemies to chase the player and
+# turn around at walls and floor edges
+STEPS = 2000
+
+
+def create_level(map_name, patrol_interval, tick_rate):
+    """Return a level of a shipped map, or of a generated stress map if
+    map_name is "stress", with every enemy's patrol_interval set."""
+    class Level(LevelMain):
+        """Level with the map's AI budget overridden."""
+        def load_map(self, map_name):
+            if map_name == "stress":
+                gamemap, self.gamemap_conf = stress_map(20)
+                self.tilemap = TileMap.from_rows(gamemap, PLATFORMLENGTH)
+            else:
+                super().load_map(map_name)
+            budget = dict(self.gamemap_conf.get("ai", {}),
+                          patrol_interval=patrol_interval)
+            self.gamemap_conf = dict(self.gamemap_conf, ai=budget)
+
+    clock = GameClock(tick_rate, fast_forward=True)
+    return Level(LEVEL_SCREENS, map_name, clock, 0)
+
+
+def play(map_name, patrol_interval, tick_rate):
+    """Play a level with the combat script, returning the level's
+    fingerprint after every step and how many movement updates were
+    skipped."""
+    pygame.event.clear()
+    level = create_level(map_name, patrol_interval, tick_rate)
+    fingerprints = []
+    skipped = 0
+    for step in range(STEPS):
+        for event in script_combat(step):
+            pygame.event.post(event)
+        if level.update() in ("level_complete", "level_fail"):
+            level.reset_level()
+        fingerprints.append(level.fingerprint())
+        skipped += level.profiler.frame_counts["movement_skipped"]
+        level.profiler.end_frame()
+    return fingerprints, skipped
+
+
+@pytest.fixture(scope="module", autouse=True)
+def display():
+    """Set up a (dummy) display, as the game does before building levels."""
+    pygame.init()
+    pygame.display.set_mode((800, 600))
+    yield
+    pygame.quit()
+
+
+@pytest.mark.parametrize("tick_rate", [TICK_RATE, 30])
+@pytest.mark.parametrize("map_name",
+                         ["tutorial_3", "tutorial_4", "test_map", "stress"])
+def test_patrol_sleeping_plays_the_same(map_name, tick_rate):
+    """Levels play out step for step the same with patrol sleeping on. The
+    script is posted once per step, so at lower tick rates the enemies move
+    further for each of the player's moves, chasing them and turning around
+    near walls and floor edges in different places."""
+    scheduled, skipped = play(map_name,
+                              DEFAULT_AI_BUDGET["patrol_interval"],
+                              tick_rate)
+    every_step, _ = play(map_name, 0, tick_rate)
+
+    # the default budget does skip updates, so it's being compared
+    assert skipped > 0
+    diverged = next((step for step, (first, second)
+                     in enumerate(zip(scheduled, every_step))
+                     if first != second), None)
+    assert diverged is None
+
+
+class Enemy(pygame.sprite.Sprite):
+    """Stand in for an enemy, with just what the scheduler looks at."""
+    def __init__(self):
+        super().__init__()
+        self.rect = pygame.Rect(0, 0, 20, 20)
+        self.onplatform = True
+        self.watching = False
+        self.disturbed = False
+
+
+def sleeping_enemy():
+    """Return a scheduler and an enemy it has put to sleep for 10 steps."""
+    clock = GameClock(TICK_RATE, fast_forward=True)
+    scheduler = AIScheduler(clock)
+    enemy = Enemy()
+    scheduler.add(enemy, {"patrol_interval": 30})
+    scheduler.sleep_movement(enemy, 10)
+    clock.tick()
+    return clock, scheduler, enemy
+
+
+def test_sleeping_enemy_skips_movement():
+    """A patrolling enemy on the same floor sleeps until it's due."""
+    clock, scheduler, enemy = sleeping_enemy()
+    assert not scheduler.movement_ready(enemy)
+
+
+def test_watching_ends_sleep():
+    """An enemy that watches the player isn't put back to sleep by a patrol
+    sleep from before it started watching."""
+    clock, scheduler, enemy = sleeping_enemy()
+    enemy.watching = True
+    assert scheduler.movement_ready(enemy)
+    enemy.watching = False
+    clock.tick()
+    assert scheduler.movement_ready(enemy)
+
+
+@pytest.mark.parametrize("change", ["fall", "leave_floor"])
+def test_vertical_movement_ends_sleep(change):
+    """An enemy that moves vertically is woken up."""
+    clock, scheduler, enemy = sleeping_enemy()
+    if change == "fall":
+        enemy.rect.y += 5
+    else:
+        enemy.onplatform = False
+    assert scheduler.movement_ready(enemy)
@@ -0,0 +1,124 @@
+"""Line of Sight Compatibility Tests
+
+TileMap.line_clear replaced drawing the projectile's path with
+pygame.draw.line and mask-colliding it with the platforms. These tests check
+it gives the same answer as the old check over the shipped maps."""
+import os
+import glob
+import random
+
+# run without a window or sound device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+from screens._level_main import PLATFORMLENGTH, PROJECTILEWIDTH  # noqa: E402
+from utils._tile_map import TileMap, EMPTY, PLATFORM, ENEMY  # noqa: E402
+
+
+MAPS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "maps")
+MAP_NAMES = sorted(os.path.splitext(os.path.basename(path))[0]
+                   for path in glob.glob(os.path.join(MAPS_DIRECTORY,
+                                                      "*.txt")))
+
+# point pairs checked per map, and the farthest a player point is from the
+# enemy (further than any shipped enemy's vision radius)
+PAIRS_PER_MAP = 4000
+MAX_DISTANCE = 400
+
+
+def load_tilemap(map_name):
+    """Return the tile map of a shipped map, read from its source file."""
+    with open(os.path.join(MAPS_DIRECTORY, f"{map_name}.txt"), "r") as file:
+        gamemap = [[int(char) for char in line.replace("\n", "")]
+                   for line in file]
+    return TileMap.from_rows(gamemap, PLATFORMLENGTH)
+
+
+def platform_mask(tilemap):
+    """Return a mask of the map with every platform tile's pixels set."""
+    mask = pygame.mask.Mask((tilemap.width, tilemap.height))
+    tile = pygame.mask.Mask((tilemap.tile_size, tilemap.tile_size),
+                            fill=True)
+    for row, col in tilemap.locate(PLATFORM):
+        rect = tilemap.tile_rect(row, col)
+        mask.draw(tile, rect.topleft)
+    return mask
+
+
+def mask_line_clear(platforms, point1, point2, width):
+    """Return if a line between two points misses every platform, the way
+    enemy vision checked it before line_clear: draw the line onto a blank
+    surface and collide its mask with the platforms' masks. The surface
+    only covers the line, offset to keep it small."""
+    left = min(point1[0], point2[0]) - width
+    top = min(point1[1], point2[1]) - width
+    surface = pygame.Surface((abs(point1[0] - point2[0]) + width * 2 + 1,
+                              abs(point1[1] - point2[1]) + width * 2 + 1))
+    pygame.draw.line(surface, (255, 255, 255),
+                     (point1[0] - left, point1[1] - top),
+                     (point2[0] - left, point2[1] - top), width)
+    line = pygame.mask.from_threshold(surface, (255, 255, 255),
+                                      (1, 1, 1, 255))
+    return line.overlap(platforms, (-left, -top)) is None
+
+
+def point_pairs(tilemap, rng):
+    """Yield (enemy point, player point) pairs, each enemy point in an
+    enemy's tile (or any empty tile on maps without enemies) and each player
+    point within MAX_DISTANCE of it."""
+    enemies = tilemap.locate(ENEMY) or tilemap.locate(EMPTY)
+    for _ in range(PAIRS_PER_MAP):
+        rect = tilemap.tile_rect(*rng.choice(enemies))
+        enemy_point = (rng.randrange(rect.left, rect.right),
+                       rng.randrange(rect.top, rect.bottom))
+        player_point = (
+            min(max(enemy_point[0] + rng.randint(-MAX_DISTANCE,
+                                                 MAX_DISTANCE), 0),
+                tilemap.width - 1),
+            min(max(enemy_point[1] + rng.randint(-MAX_DISTANCE,
+                                                 MAX_DISTANCE), 0),
+                tilemap.height - 1))
+        yield enemy_point, player_point
+
+
+@pytest.mark.parametrize("map_name", MAP_NAMES)
+def test_line_clear_matches_mask_collision(map_name):
+    """line_clear gives the same answer as the old mask collision, apart
+    from lines that only graze a tile's corner, where a pixel either way
+    changes the answer."""
+    tilemap = load_tilemap(map_name)
+    platforms = platform_mask(tilemap)
+    rng = random.Random(map_name)
+
+    mismatches = []
+    for enemy_point, player_point in point_pairs(tilemap, rng):
+        expected = mask_line_clear(platforms, enemy_point,
+                                   player_point, PROJECTILEWIDTH)
+        if tilemap.line_clear(enemy_point, player_point,
+                              PROJECTILEWIDTH) == expected:
+            continue
+        # a graze: a slightly thinner or thicker line changes the answer
+        thinner = mask_line_clear(platforms, enemy_point,
+                                  player_point, PROJECTILEWIDTH - 2)
+        thicker = mask_line_clear(platforms, enemy_point,
+                                  player_point, PROJECTILEWIDTH + 2)
+        if thinner == thicker:
+            mismatches.append((enemy_point, player_point, expected))
+
+    assert not mismatches
+
+
+def test_line_clear_blocked_through_platform():
+    """A line straight through a platform tile is blocked, and one beside
+    it is clear."""
+    tilemap = TileMap.from_rows([[0, 0, 0], [0, 1, 0], [0, 0, 0]],
+                                PLATFORMLENGTH)
+    middle = PLATFORMLENGTH * 3 // 2
+    assert not tilemap.line_clear((0, middle), (PLATFORMLENGTH * 3 - 1,
+                                                middle), PROJECTILEWIDTH)
+    assert tilemap.line_clear((0, 10), (PLATFORMLENGTH * 3 - 1, 10),
+                              PROJECTILEWIDTH)
@@ -0,0 +1,150 @@
+"""AI Scheduler Module"""
+
+
+# keys of an enemy's AI budget and their defaults, see AIScheduler
+DEFAULT_AI_BUDGET = {"vision_interval": 1,
+                     "patrol_interval": 30}
+
+
+class AIScheduler():
+    """Class deciding which enemies run their AI on each simulation step.
+
+    Each enemy has a budget, normally set from the map's JSON:
+    vision_interval - steps between vision updates (ray casts) while the
+        player is near. Enemies are given different offsets so that with an
+        interval of n, about 1/n of them look each step.
+    patrol_interval - most steps in a row an enemy that isn't watching the
+        player can skip its movement AI. The level puts patrolling enemies to
+        sleep until their surroundings could next change, up to this many
+        steps. 0 runs it every step. A sleeping enemy is woken up if it moves
+        vertically (e.g. falls off or lands on a floor) or starts watching the
+        player, as its sleep was only worked out for patrolling along the
+        floor it was on.
+
+    Enemies are forgotten when they die. The budget an enemy was added with
+    is also kept in its ai_budget attribute, so it can be added again if it
+    comes back to life, e.g. by rewinding.
+
+    An enemy whose disturbed attribute is set (e.g. by being hit) is woken up
+    straight away, running both on the next check. Skipped updates are
+    counted so the savings show up in the level's profiler."""
+    def __init__(self, clock):
+        self.clock = clock
+
+        # enemy: budget dict, and the step each enemy's vision and movement
+        # AI are next due
+        self.budgets = {}
+        self.vision_due = {}
+        self.movement_due = {}
+        # enemy: (rect bottom, onplatform) when its movement AI was put to
+        # sleep
+        self.movement_floor = {}
+
+        # updates skipped since the counts were last taken
+        self.vision_skipped = 0
+        self.movement_skipped = 0
+
+    def add(self, enemy, budget):
+        """Start scheduling an enemy with a budget dict (see
+        DEFAULT_AI_BUDGET, missing keys take the default)."""
+        unknown = set(budget) - set(DEFAULT_AI_BUDGET)
+        if unknown:
+            raise Exception("Unknown AI budget keys: " +
+                            ", ".join(sorted(unknown)))
+        full_budget = dict(DEFAULT_AI_BUDGET, **budget)
+        for key, value in full_budget.items():
+            # vision must happen at some point, patrols can always run
+            minimum = 1 if key == "vision_interval" else 0
+            if not isinstance(value, int) or value < minimum:
+                raise Exception(f"AI budget {key} must be an integer of at "
+                                f"least {minimum}, received {value}")
+
+        # stagger vision updates by the order enemies were added
+        offset = len(self.budgets) % full_budget["vision_interval"]
+        self.budgets[enemy] = full_budget
+        enemy.ai_budget = full_budget
+        self.vision_due[enemy] = self.clock.ticks + offset
+        self.movement_due[enemy] = self.clock.ticks
+
+    def forget(self, enemy):
+        """Stop scheduling an enemy, e.g. when it has been killed."""
+        self.budgets.pop(enemy, None)
+        self.vision_due.pop(enemy, None)
+        self.movement_due.pop(enemy, None)
+        self.movement_floor.pop(enemy, None)
+
+    def snapshot(self):
+        """Return the scheduler's current state."""
+        return (dict(self.budgets), dict(self.vision_due),
+                dict(self.movement_due), dict(self.movement_floor))
+
+    def restore(self, state):
+        """Put back the state returned by an earlier snapshot() call,
+        forgetting enemies added since."""
+        budgets, vision_due, movement_due, movement_floor = state
+        self.budgets = dict(budgets)
+        self.vision_due = dict(vision_due)
+        self.movement_due = dict(movement_due)
+        self.movement_floor = dict(movement_floor)
+        self.vision_skipped = 0
+        self.movement_skipped = 0
+
+    def wake_if_disturbed(self, enemy):
+        """Make an enemy's AI due now if something has disturbed it."""
+        if enemy.disturbed:
+            enemy.disturbed = False
+            now = self.clock.ticks
+            self.vision_due[enemy] = now
+            self.movement_due[enemy] = now
+
+    def vision_ready(self, enemy):
+        """Return if an enemy near the player should look for them this
+        step. If so, the next look is scheduled vision_interval steps on."""
+        self.wake_if_disturbed(enemy)
+        now = self.clock.ticks
+        if now < self.vision_due[enemy]:
+            self.vision_skipped += 1
+            return False
+        self.vision_due[enemy] = (now +
+                                  self.budgets[enemy]["vision_interval"])
+        return True
+
+    def skip_vision(self, count=1):
+        """Count vision updates that weren't needed, e.g. for enemies too far
+        from the player to see them."""
+        self.vision_skipped += count
+
+    def movement_ready(self, enemy):
+        """Return if an enemy's movement AI should run this step. Enemies
+        watching the player always run, as do sleeping enemies that have
+        moved vertically since being put to sleep."""
+        self.wake_if_disturbed(enemy)
+        now = self.clock.ticks
+        if enemy.watching:
+            # chasing can turn the enemy around, so a patrol sleep worked out
+            # for its old direction must not carry on once it stops watching
+            self.movement_due[enemy] = now
+            return True
+        if now >= self.movement_due[enemy]:
+            return True
+        if (enemy.rect.bottom, enemy.onplatform) != self.movement_floor.get(
+                enemy):
+            self.movement_due[enemy] = now
+            return True
+        self.movement_skipped += 1
+        return False
+
+    def sleep_movement(self, enemy, steps):
+        """Skip an enemy's movement AI for the given number of steps after
+        this one, capped at its patrol_interval."""
+        steps = min(steps, self.budgets[enemy]["patrol_interval"])
+        self.movement_due[enemy] = self.clock.ticks + 1 + steps
+        self.movement_floor[enemy] = (enemy.rect.bottom, enemy.onplatform)
+
+    def take_counts(self):
+        """Return the (vision, movement) updates skipped since last called
+        and reset the counts."""
+        counts = self.vision_skipped, self.movement_skipped
+        self.vision_skipped = 0
+        self.movement_skipped = 0
+        return counts
@@ -1,15 +1,16 @@
 """Bar Module"""
 import pygame
 from ._settings import BLACK
+from ._surfaces import new_surface
 
 
-class Bar(pygame.sprite.Sprite):
+class Bar(pygame.sprite.DirtySprite):
     """Class for bars. Individual bar capacity is determined by percentage.
     0% being empty, 100% being full size"""
     def __init__(self, color, width, height, startx, starty):
         super().__init__()
-        self.image = pygame.Surface([width, height])
-        self.image.set_colorkey(BLACK)  # greenscreen effect for images
+        # greenscreen effect for images
+        self.image = new_surface([width, height], colorkey=BLACK)
         self.color = color
         self.image.fill(self.color)
 
@@ -41,14 +42,16 @@ class Bar(pygame.sprite.Sprite):
 
     def update(self):
         """Update the bar sprite's size based on current capacity"""
-        # transform image scale with capacity percentage width
-        self.image = pygame.transform.scale(self.image,
-                                            [int((self.capacity/self.maximum) *
-                                                 self.width),
-                                             self.height])
+        # new image with capacity percentage width
+        self.image = new_surface([int((self.capacity/self.maximum) *
+                                      self.width),
+                                  self.height], colorkey=BLACK)
 
         # update rect with new image
         pygame.draw.rect(self.image, self.color,
                          [0, 0, self.width, self.height])
         self.rect = self.image.get_rect()
         self.rect.x, self.rect.y = self.startx, self.starty  # set location
+
+        # redraw sprite on next frame
+        self.dirty = 1
@@ -7,11 +7,19 @@ from ._functions import check_alignment, align
 
 class Button(pygame.sprite.Sprite):
     """Class for instantiating individual button sprites. State colours in
-    form: textcolor, bgcolor"""
+    form: textcolor, bgcolor
+
+    The image for each state (idle, hover and click) is rendered once when the
+    button is created or its text changes, so changing state only swaps the
+    image shown."""
     def __init__(self, width, height, text, textsize, alignment, idlecolor,
                  hovercolor, clickcolor, startx, starty, alpha=None,
                  identifier=None):
         super().__init__()
+        # state images, rendered once all attributes are set
+        self.images = None
+        self.state = "idle"
+
         self.width = width
         self.height = height
         self.text = text
@@ -32,11 +40,38 @@ class Button(pygame.sprite.Sprite):
         self.startx = startx
         self.starty = starty
 
-        self.update_sprite(self.color_idle)
+        # define rect instance for image and set location on screen using set
+        # alignment
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+        align(self.alignment, self.rect, self.startx, self.starty)
+
+        self.render_states()
+
+    @property
+    def text(self):
+        """Property decorator for text attribute"""
+        return self._text
+
+    @text.setter
+    def text(self, new_text):
+        self._text = new_text
 
-    def update_sprite(self, colors):
-        """Method to update the button sprite's colours. 2 surfaces are
-        created so that the opacity on the text and background is preserved.
+        # re-render state images with the new text, keeping the current state
+        if self.images is not None:
+            self.render_states()
+
+    def render_states(self):
+        """Render the image for each state and show the current state's
+        image. Called when the text or state colours change."""
+        self.images = {"idle": self.render_state(self.color_idle),
+                       "hover": self.render_state(self.color_hover),
+                       "click": self.render_state(self.color_click)}
+        self.image = self.images[self.state]
+
+    def render_state(self, colors):
+        """Method to render and return the button image for a state's
+        colours. 2 surfaces are created so that the opacity on the text and
+        background is preserved.
 
         The parameter colors can be passed as a list or tuple in the form:
         (color of text, color of background) where the color is in the form of
@@ -48,52 +83,53 @@ class Button(pygame.sprite.Sprite):
 
         # ---------- INSTANTIATE SURFACES AND MODIFY MAIN SURFACE ---------- #
         # instantiate main and background surface
-        self.image = pygame.Surface([self.width, self.height])
-        self.background = pygame.Surface([self.width, self.height])
+        image = pygame.Surface([self.width, self.height])
+        background = pygame.Surface([self.width, self.height])
 
         # remove default black color fill after surface instantiation from
         # main surface so that it's completely transparent
-        self.image.set_colorkey(BLACK)
+        image.set_colorkey(BLACK)
 
         # change main surface pixel format with per pixel alphas
-        self.image = self.image.convert_alpha()
-
-        # define rect instance for image
-        self.rect = self.image.get_rect()
+        image = image.convert_alpha()
 
         # ---------- ADD BACKGROUND ---------- #
         if self.alpha is not None:
             # set opacity on background surface using given alpha value
-            self.background.set_alpha(self.alpha)
+            background.set_alpha(self.alpha)
 
         # fill background surface with background color
-        self.background.fill(bgcolor)
+        background.fill(bgcolor)
 
         # render background surface onto main surface
         # background surface operated on with convert_alpha() function to
         # retain per pixel alphas
-        self.image.blit(self.background.convert_alpha(), (0, 0))
+        image.blit(background.convert_alpha(), (0, 0))
 
         # ---------- ADD TEXT ---------- #
-        # create text instance
+        # create text instance centred on the button
+        center = image.get_rect().center
         button_text = Text(self.text.upper().replace("_", " "), self.textsize,
-                           "middle_center", textcolor, None, self.rect.centerx,
-                           self.rect.centery)
+                           "middle_center", textcolor, None, center[0],
+                           center[1])
         # render text instance surface onto button surface
-        self.image.blit(button_text.image, button_text.rect)
+        image.blit(button_text.image, button_text.rect)
 
-        # ---------- SET LOCATION ---------- #
-        # set location on screen using set alignment
-        align(self.alignment, self.rect, self.startx, self.starty)
+        return image
+
+    def set_state(self, state):
+        """Show the pre-rendered image for a state."""
+        self.state = state
+        self.image = self.images[state]
 
     def state_idle(self):
         """Method to change the sprite image when idle (not hovered over)."""
-        self.update_sprite(self.color_idle)
+        self.set_state("idle")
 
     def state_hover(self):
         """Method to change the sprite image when being hovered."""
-        self.update_sprite(self.color_hover)
+        self.set_state("hover")
 
     def state_click(self):
         """Method to change the sprite image when being hovered."""
-        self.update_sprite(self.color_click)
+        self.set_state("click")
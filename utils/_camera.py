@@ -0,0 +1,35 @@
+"""Camera Module"""
+import pygame
+
+
+class Camera():
+    """Class for the part of a level shown in the window.
+
+    rect is the viewport in level (world) coordinates. follow() centres it
+    on a target, keeping it inside the level, so levels bigger than the
+    window scroll while levels the size of the window never move. World
+    sprites are drawn shifted by -offset to turn level coordinates into
+    window coordinates, and cursor positions are shifted by +offset to go
+    the other way."""
+    def __init__(self, width, height, world_width, world_height):
+        self.rect = pygame.Rect(0, 0, width, height)
+        self.world_width = world_width
+        self.world_height = world_height
+
+    @property
+    def offset(self):
+        """Property decorator getter for the viewport's top left corner"""
+        return self.rect.topleft
+
+    def follow(self, target):
+        """Centre the viewport on a rect, as far as the level's edges allow.
+        Levels smaller than the viewport stay in the top left corner."""
+        self.rect.center = target.center
+        self.rect.left = max(min(self.rect.left,
+                                 self.world_width - self.rect.width), 0)
+        self.rect.top = max(min(self.rect.top,
+                                self.world_height - self.rect.height), 0)
+
+    def to_world(self, point):
+        """Return the level coordinates of a point in the window."""
+        return point[0] + self.rect.left, point[1] + self.rect.top
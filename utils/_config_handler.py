@@ -1,5 +1,11 @@
 """Config Handler Module"""
+import os
 import json
+import stat
+import tempfile
+import threading
+from time import monotonic
+from weakref import WeakMethod
 
 
 default_config = {"music": True,
@@ -19,28 +25,211 @@ def validate_config(config):
     return True
 
 
-def load_config():
-    """Load the saved settings from config.json"""
-    with open("config.json", "r") as file:
-        contents = file.read()
+class ConfigService():
+    """Class to hold the game settings in memory.
 
-    config = json.loads(contents)
+    The config file is read once, the first time a setting is needed, and
+    every later read comes from memory. Changes are written straight back to
+    the file and pushed to subscribers, callables taking (key, value) that are
+    called for each setting that changes. Bound methods are held weakly so
+    subscribing doesn't keep e.g. the entities of a finished level alive.
+    Levels can be built, and so subscribe, on another thread while
+    subscribers are being notified, so the subscriber list is only changed
+    while holding a lock.
 
-    if validate_config(config):
-        return config
+    poll() checks the file's modification time, at most once every
+    poll_interval seconds, and reloads it if it has been edited outside the
+    game."""
+    def __init__(self, path="config.json", poll_interval=1):
+        self.path = path
+        self.poll_interval = poll_interval
 
-    # otherwise invalid, run code below
-    print("Invalid config detected. Returned default.")
-    return default_config
+        # settings dict, None until loaded
+        self._config = None
 
+        # modification time of the file when it was last read or written
+        self.mtime = None
+        self.last_polled = monotonic()
 
-def save_config(new_config):
-    """Save the current settings to config.json"""
-    if validate_config(new_config):
-        save = new_config
-    else:
-        print("Invalid config detected. Replaced with default.")
-        save = default_config
+        # list of subscribed callables or weak references to bound methods,
+        # and the lock held while changing it
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
 
-    with open("config.json", "w") as file:
-        file.write(json.dumps(save, indent=4, sort_keys=True) + "\n")
+    @property
+    def config(self):
+        """Property decorator getter for config attribute, loading the file
+        the first time it's accessed."""
+        if self._config is None:
+            self._config = self.read()
+        return self._config
+
+    @property
+    def music(self):
+        """Property decorator getter for music setting"""
+        return self.config["music"]
+
+    @music.setter
+    def music(self, value):
+        """Property decorator setter for music setting"""
+        self.set("music", value)
+
+    @property
+    def sound_effects(self):
+        """Property decorator getter for sound_effects setting"""
+        return self.config["sound_effects"]
+
+    @sound_effects.setter
+    def sound_effects(self, value):
+        """Property decorator setter for sound_effects setting"""
+        self.set("sound_effects", value)
+
+    def read(self):
+        """Read and return the settings in the config file, or the default
+        settings if the file is missing or invalid."""
+        try:
+            self.mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r") as file:
+                config = json.loads(file.read())
+        except FileNotFoundError:
+            print("No config found. Returned default.")
+            return dict(default_config)
+        except ValueError:
+            config = None
+
+        if isinstance(config, dict) and validate_config(config):
+            return config
+
+        # otherwise invalid, run code below
+        print("Invalid config detected. Returned default.")
+        return dict(default_config)
+
+    def get(self, key):
+        """Return the value of a setting"""
+        return self.config[key]
+
+    def as_dict(self):
+        """Return a copy of all the settings"""
+        return dict(self.config)
+
+    def set(self, key, value):
+        """Change a setting, saving it and notifying subscribers."""
+        new_config = self.as_dict()
+        new_config[key] = value
+        self.save(new_config)
+
+    def save(self, new_config):
+        """Replace all the settings, write them to the config file and notify
+        subscribers of the settings that changed."""
+        if validate_config(new_config):
+            save = dict(new_config)
+        else:
+            print("Invalid config detected. Replaced with default.")
+            save = dict(default_config)
+
+        self.write(save)
+        self.replace(save)
+
+    def write(self, config):
+        """Write settings to the config file. They are written to a temporary
+        file in the same directory first, which is then moved over the config
+        file, so the file is never left half written. The temporary file is
+        given the config file's permissions (or 0644 for a new config file)
+        as mkstemp makes it readable by its owner only."""
+        try:
+            mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(dir=directory,
+                                                 suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                file.write(json.dumps(config, indent=4, sort_keys=True) +
+                           "\n")
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        # don't reload our own changes when polling
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+    def replace(self, new_config):
+        """Swap in new settings and notify subscribers of each changed
+        setting."""
+        old_config = self._config
+        self._config = new_config
+
+        for key, value in new_config.items():
+            if old_config is None or old_config.get(key) != value:
+                self.notify(key, value)
+
+    def subscribe(self, callback):
+        """Call callback with (key, value) whenever a setting changes."""
+        if hasattr(callback, "__self__"):
+            # bound method, hold it weakly
+            subscriber = WeakMethod(callback)
+        else:
+            subscriber = callback
+        with self.subscribers_lock:
+            self.subscribers.append(subscriber)
+
+    def unsubscribe(self, callback):
+        """Stop calling a subscribed callback."""
+        with self.subscribers_lock:
+            self.subscribers = [subscriber for subscriber in self.subscribers
+                                if subscriber != callback and not
+                                (isinstance(subscriber, WeakMethod) and
+                                 subscriber() == callback)]
+
+    def notify(self, key, value):
+        """Call each subscriber with a changed setting, dropping subscribers
+        that no longer exist. The callbacks are called without holding the
+        lock, so they can subscribe or unsubscribe."""
+        with self.subscribers_lock:
+            subscribers = list(self.subscribers)
+
+        dead = []
+        for subscriber in subscribers:
+            if isinstance(subscriber, WeakMethod):
+                callback = subscriber()
+                if callback is None:
+                    # object has been garbage collected
+                    dead.append(id(subscriber))
+                    continue
+            else:
+                callback = subscriber
+            callback(key, value)
+
+        # remove only the dead subscribers, keeping any added meanwhile
+        if dead:
+            with self.subscribers_lock:
+                self.subscribers = [subscriber
+                                    for subscriber in self.subscribers
+                                    if id(subscriber) not in dead]
+
+    def poll(self):
+        """Reload the config file if it has been changed since it was last
+        read or written. Returns True if it was reloaded."""
+        now = monotonic()
+        if now - self.last_polled < self.poll_interval:
+            return False
+        self.last_polled = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+        if self._config is None or mtime == self.mtime:
+            return False
+
+        self.replace(self.read())
+        return True
+
+
+# the game's settings, shared by every screen and sprite
+config = ConfigService()
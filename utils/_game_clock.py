@@ -0,0 +1,85 @@
+"""Game Clock Module"""
+import pygame
+from ._settings import TICK_RATE
+
+
+# step rate the game's speeds are tuned for
+TUNED_TICK_RATE = 60
+
+
+class GameClock():
+    """Class for a game level's simulation clock.
+
+    The simulation is run in fixed steps of 1/tick_rate seconds. Each frame,
+    advance() adds the real time passed since the previous frame to an
+    accumulator and returns how many steps need to be run to catch up, so the
+    simulation runs at a constant rate whatever the render rate is.
+
+    Game logic reads the time with get_ticks(), which returns the simulated
+    time in milliseconds. Simulated time only passes when steps are run, so
+    time spent paused doesn't count towards cooldowns. After pause() the next
+    advance() call picks up from the current real time.
+
+    In fast forward mode every advance() call runs exactly one step, letting
+    the simulation run as fast as the CPU allows (e.g. for benchmarks).
+
+    Speeds, accelerations and per step regeneration are tuned for
+    TUNED_TICK_RATE steps per second. step_scale is how many of those steps
+    one step stands for, which game logic multiplies them by so the game
+    plays at the same speed at any tick rate."""
+    def __init__(self, tick_rate=TICK_RATE, fast_forward=False,
+                 max_steps=5):
+        self.tick_rate = tick_rate
+        self.step_duration = 1000 / tick_rate
+        self.step_scale = TUNED_TICK_RATE / tick_rate
+        self.fast_forward = fast_forward
+
+        # maximum steps to run in one frame, so a long stall doesn't make the
+        # simulation spend ages catching up
+        self.max_steps = max_steps
+
+        # number of steps simulated so far
+        self.ticks = 0
+
+        # real time waiting to be simulated and the time advance was last
+        # called, None if paused or not started
+        self.accumulator = 0
+        self.last_advanced = None
+
+    def get_ticks(self):
+        """Return the simulated time in milliseconds."""
+        return int(self.ticks * self.step_duration)
+
+    def advance(self):
+        """Return the number of simulation steps to run this frame."""
+        if self.fast_forward:
+            return 1
+
+        now = pygame.time.get_ticks()
+
+        # starting or resuming, run one step straight away
+        if self.last_advanced is None:
+            self.last_advanced = now
+            self.accumulator = self.step_duration
+
+        self.accumulator += now - self.last_advanced
+        self.last_advanced = now
+
+        steps = int(self.accumulator // self.step_duration)
+        if steps > self.max_steps:
+            # drop the time that can't be caught up
+            steps = self.max_steps
+            self.accumulator = 0
+        else:
+            self.accumulator -= steps * self.step_duration
+
+        return steps
+
+    def tick(self):
+        """Move the simulated time on by one step."""
+        self.ticks += 1
+
+    def pause(self):
+        """Stop real time counting towards the simulation until advance is
+        next called."""
+        self.last_advanced = None
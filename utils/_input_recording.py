@@ -0,0 +1,121 @@
+"""Input Recording Module"""
+import json
+import os
+import pygame
+
+
+# event types that affect a level's simulation, the only ones recorded
+RECORDED_EVENT_TYPES = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONUP)
+
+# entry type marking the level being reset, e.g. retried after failing
+RESET = "reset"
+
+
+class InputRecording():
+    """Class for the input given to a game level, for replaying the level
+    exactly as it was played.
+
+    A level's simulation only depends on the random seed it was built with,
+    its tick rate and the input it handled before each step, so those are
+    all that's recorded. Each entry is a list of the number of steps the
+    level had run when the input was handled, then either the event's type
+    and key, or its type, button and the cursor position, or RESET if the
+    level was reset. steps is the number of steps the level ran in total.
+
+    Checkpoints are [steps, fingerprint] pairs of the level's fingerprint()
+    every second of steps and at the end. When replaying, take() returns
+    the entries due before each step in turn and check() compares the
+    replayed level's fingerprints with the checkpoints, storing the steps
+    at the first that differs in diverged_at. A replay that diverges part
+    way can end up back in the recorded state, e.g. by rewinding past where
+    it diverged, so checking the end alone isn't enough."""
+    def __init__(self, map_name, seed, tick_rate, entries=None, steps=0,
+                 checkpoints=None):
+        self.map_name = map_name
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.entries = [] if entries is None else entries
+        self.steps = steps
+        self.checkpoints = [] if checkpoints is None else checkpoints
+
+        # index of the next entry to replay, the fingerprint expected at
+        # each checkpoint and the steps at the first that didn't match
+        self.position = 0
+        self.expected = dict(map(tuple, self.checkpoints))
+        self.diverged_at = None
+
+    @classmethod
+    def load(cls, path):
+        """Return the recording saved to a file by save()."""
+        with open(path, "r") as file:
+            data = json.loads(file.read())
+        return cls(data["map"], data["seed"], data["tick_rate"],
+                   data["entries"], data["steps"], data["checkpoints"])
+
+    def save(self, path):
+        """Save the recording to a JSON file, creating its directory if
+        needed."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"map": self.map_name,
+                "seed": self.seed,
+                "tick_rate": self.tick_rate,
+                "steps": self.steps,
+                "checkpoints": self.checkpoints,
+                "entries": self.entries}
+        with open(path, "w") as file:
+            file.write(json.dumps(data, separators=(",", ":")))
+
+    def record(self, step, event, cursor):
+        """Record an event handled after the given number of steps, if it's
+        a type that affects the simulation. cursor is the level's cursor
+        position when the event was handled."""
+        if event.type not in RECORDED_EVENT_TYPES:
+            return
+        if event.type == pygame.MOUSEBUTTONUP:
+            self.entries.append([step, event.type, event.button, *cursor])
+        else:
+            self.entries.append([step, event.type, event.key])
+
+    def record_reset(self, step):
+        """Record the level being reset after the given number of steps."""
+        self.entries.append([step, RESET])
+
+    def record_checkpoint(self, step, fingerprint):
+        """Record the level's fingerprint after the given number of
+        steps."""
+        self.checkpoints.append([step, fingerprint])
+
+    def check(self, step, fingerprint):
+        """Compare a replayed level's fingerprint after the given number of
+        steps with the recorded one, if there is one, and return if they
+        match."""
+        expected = self.expected.get(step)
+        if expected is None or expected == fingerprint:
+            return True
+        if self.diverged_at is None:
+            self.diverged_at = step
+        return False
+
+    def take(self, step):
+        """Return a list of the next entries to replay that were recorded
+        after the given number of steps, as (event, cursor) pairs, cursor
+        being None for key events. A level reset is returned as (RESET,
+        None)."""
+        taken = []
+        while (self.position < len(self.entries) and
+               self.entries[self.position][0] <= step):
+            _, event_type, *values = self.entries[self.position]
+            self.position += 1
+            if event_type == RESET:
+                taken.append((RESET, None))
+            elif event_type == pygame.MOUSEBUTTONUP:
+                button, cursor_x, cursor_y = values
+                taken.append((pygame.event.Event(event_type, button=button,
+                                                 pos=(cursor_x, cursor_y)),
+                              (cursor_x, cursor_y)))
+            else:
+                taken.append((pygame.event.Event(event_type, key=values[0]),
+                              None))
+        return taken
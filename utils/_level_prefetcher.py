@@ -0,0 +1,59 @@
+"""Level Prefetcher Module"""
+import threading
+
+
+class LevelPrefetcher():
+    """Class for building the next level on a worker thread while the current
+    level is played, so moving on to it doesn't stall the game.
+
+    build is called with the arguments given to prefetch() (e.g. LevelMain
+    with its screen names and map name) and returns the built level. take()
+    hands over the prefetched level if it was built with the same arguments
+    and has finished. Otherwise the level is built on the calling thread, as
+    it would be without a prefetcher, which also raises any error the worker
+    ran into.
+
+    Levels only start their clocks when first updated, so a level built
+    early isn't affected by the time it waits."""
+    def __init__(self, build):
+        self.build = build
+
+        # arguments, built level and finished event of the latest prefetch
+        self.job = None
+
+    def prefetch(self, *args):
+        """Start building a level with the given arguments on a worker
+        thread, replacing any previous prefetch."""
+        self.job = {"args": args,
+                    "level": None,
+                    "finished": threading.Event()}
+        # daemon thread, so an unfinished build doesn't stop the game closing
+        thread = threading.Thread(target=self.run, args=(self.job,),
+                                  daemon=True)
+        thread.start()
+
+    def run(self, job):
+        """Build a prefetched level, run on the worker thread."""
+        try:
+            job["level"] = self.build(*job["args"])
+        except Exception:  # pylint: disable=broad-except
+            # the level is built again by take(), raising the error there
+            pass
+        finally:
+            job["finished"].set()
+
+    def ready(self, *args):
+        """Return if a level with the given arguments has been prefetched and
+        is ready to be taken."""
+        return (self.job is not None and self.job["args"] == args and
+                self.job["finished"].is_set() and
+                self.job["level"] is not None)
+
+    def take(self, *args):
+        """Return a level built with the given arguments, the prefetched
+        level if it is ready, otherwise one built now."""
+        ready = self.ready(*args)
+        job, self.job = self.job, None
+        if ready:
+            return job["level"]
+        return self.build(*args)
@@ -0,0 +1,151 @@
+"""Map File Module"""
+import contextlib
+import json
+import mmap
+import os
+import struct
+import threading
+import numpy
+from ._tile_map import TileMap
+from ._settings import MAP_CACHE
+
+
+# start of every compiled map file, and the format's version. Files with a
+# different magic or version are compiled again
+MAP_FILE_MAGIC = b"PMAP"
+MAP_FILE_VERSION = 1
+
+# magic, version, tile size, columns, rows, modification time (ns) and size
+# of the .txt and .json source files, and the length of the configuration
+HEADER = struct.Struct("<4sHHIIqqqqI")
+
+# extension of compiled map files, saved next to their source files
+MAP_FILE_EXTENSION = ".mapc"
+
+
+def source_stamp(txt_path, json_path):
+    """Return the (modification time, size) of both source files of a map,
+    used to tell if a compiled map file is out of date."""
+    txt_stat = os.stat(txt_path)
+    json_stat = os.stat(json_path)
+    return (txt_stat.st_mtime_ns, txt_stat.st_size,
+            json_stat.st_mtime_ns, json_stat.st_size)
+
+
+def padded(length):
+    """Return a length rounded up to a multiple of 4, so that every section
+    of a map file starts 4 byte aligned."""
+    return (length + 3) // 4 * 4
+
+
+def compile_map(txt_path, json_path, tile_size, stamp):
+    """Compile a map's source files into the bytes of a map file.
+
+    A map file is a header (see HEADER), the tiles as one byte each row by
+    row, the tile map's floor index as C ints (span lefts, span rights and
+    column counts) and the map's JSON configuration re-encoded without
+    whitespace. The configuration's enemy and custom sprite records hold any
+    JSON values, so they are kept as JSON."""
+    # read the file, one row of tile digits per line
+    with open(txt_path, "r") as file:
+        gamemap = [[int(char) for char in line.replace("\n", "")]
+                   for line in file]
+    tilemap = TileMap.from_rows(gamemap, tile_size)
+
+    # read the map's enemy configuration
+    with open(json_path, "r") as file:
+        conf = json.loads(file.read())
+    conf_bytes = json.dumps(conf, separators=(",", ":")).encode("utf-8")
+
+    sections = [HEADER.pack(MAP_FILE_MAGIC, MAP_FILE_VERSION, tile_size,
+                            tilemap.columns, tilemap.rows, *stamp,
+                            len(conf_bytes)),
+                bytes(tilemap.tiles).ljust(padded(len(tilemap.tiles)),
+                                           b"\0")]
+    for index in (tilemap.span_lefts, tilemap.span_rights,
+                  tilemap.column_counts):
+        sections.append(numpy.asarray(index, dtype=numpy.intc).tobytes())
+    sections.append(conf_bytes)
+    return b"".join(sections)
+
+
+def read_map(data, tile_size, stamp=None):
+    """Return the (tile map, configuration) of a compiled map held in a
+    buffer, e.g. a memory-mapped file, or None if the buffer isn't a map file
+    for this tile size and version or, if stamp is given, was compiled from
+    different source files.
+
+    The tile map's tiles and floor index are memoryviews of the buffer, so
+    they aren't copied or parsed, only the configuration is decoded."""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        return None
+    (magic, version, file_tile_size, columns, rows,
+     *file_stamp, conf_length) = HEADER.unpack_from(view)
+    if (magic != MAP_FILE_MAGIC or version != MAP_FILE_VERSION or
+       file_tile_size != tile_size or
+       (stamp is not None and tuple(file_stamp) != tuple(stamp))):
+        return None
+
+    # section lengths in bytes
+    tile_count = columns * rows
+    lengths = (padded(tile_count), tile_count * 4, tile_count * 4,
+               columns * (rows + 1) * 4, conf_length)
+    if len(view) != HEADER.size + sum(lengths):
+        return None
+
+    sections = []
+    start = HEADER.size
+    for length in lengths:
+        sections.append(view[start:start + length])
+        start += length
+    tiles = sections[0][:tile_count]
+    floor_index = tuple(section.cast("i") for section in sections[1:4])
+    conf = json.loads(bytes(sections[4]).decode("utf-8"))
+
+    return TileMap(tiles, columns, rows, tile_size, floor_index), conf
+
+
+def load_map(directory, map_name, tile_size, cache=MAP_CACHE):
+    """Return the (tile map, configuration) of the map with the given name in
+    a directory, from its .txt tile grid and .json configuration.
+
+    If cache is set, the map is compiled to a map file next to its source
+    files the first time it's loaded, and later loads memory-map the
+    compiled file instead of parsing the sources again. Compiled files are
+    compiled again whenever either source file's modification time or size
+    changes. If the compiled file can't be written (e.g. a read-only
+    directory) the map is still loaded from the compiled bytes."""
+    base_path = os.path.join(directory, map_name)
+    txt_path = base_path + ".txt"
+    json_path = base_path + ".json"
+    cache_path = base_path + MAP_FILE_EXTENSION
+    stamp = source_stamp(txt_path, json_path)
+
+    if cache:
+        try:
+            with open(cache_path, "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # missing or empty file
+            data = None
+        if data is not None:
+            loaded = read_map(data, tile_size, stamp)
+            if loaded is not None:
+                return loaded
+            data.close()
+
+    data = compile_map(txt_path, json_path, tile_size, stamp)
+    if cache:
+        # write a new file then swap it in, so other loads never see a
+        # partly written file. Each thread writes its own temporary file as
+        # a level can be loaded on a prefetch thread at the same time
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            # don't leave a partly written or unmoved file behind
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+    return read_map(data, tile_size)
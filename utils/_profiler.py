@@ -0,0 +1,198 @@
+"""Frame Profiler Module"""
+import csv
+from collections import deque
+from time import perf_counter_ns
+import pygame
+from ._text import Text
+from ._settings import WHITE, BLACK
+
+
+# upper bounds of the histogram buckets in microseconds, the last bucket holds
+# everything slower
+HISTOGRAM_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def bucket_index(duration_ns):
+    """Return the index of the histogram bucket a duration falls into."""
+    duration_us = duration_ns / 1000
+    for i, upper in enumerate(HISTOGRAM_BUCKETS):
+        if duration_us < upper:
+            return i
+    return len(HISTOGRAM_BUCKETS)
+
+
+class FrameProfiler():
+    """Class for timing the phases of each frame.
+
+    Phases are timed with perf_counter_ns, adding up if a phase runs more than
+    once in a frame (e.g. several simulation steps). Counters hold per frame
+    values such as pixels pushed to the display. When end_frame is called the
+    frame's values are added to a rolling history of the last history frames,
+    from which averages and histograms are worked out, and optionally written
+    as a row of a CSV file. The histograms give the percentiles shown by
+    ProfilerOverlay without sorting the history every refresh."""
+    def __init__(self, phases, counters=(), history=120):
+        self.phases = tuple(phases)
+        self.counters = tuple(counters)
+        self.history = history
+
+        # values for the frame in progress
+        self.frame_times = dict.fromkeys(self.phases, 0)
+        self.frame_counts = dict.fromkeys(self.counters, 0)
+
+        # rolling history of phase times (ns) and counter values per frame
+        self.samples = {name: deque(maxlen=history)
+                        for name in self.phases + self.counters}
+        # bucket counts of the phase times in the rolling history
+        self.histograms = {phase: [0] * (len(HISTOGRAM_BUCKETS) + 1)
+                           for phase in self.phases}
+
+        self.frame = 0
+        self.csv_file = None
+        self.csv_writer = None
+
+    def measure(self, phase, function, *args):
+        """Call function with args, adding the time taken to phase. The
+        function's return value is returned."""
+        start = perf_counter_ns()
+        result = function(*args)
+        self.frame_times[phase] += perf_counter_ns() - start
+        return result
+
+    def count(self, counter, amount=1):
+        """Add an amount to a counter for the current frame."""
+        self.frame_counts[counter] += amount
+
+    def end_frame(self):
+        """Store the current frame's values in the rolling history and CSV
+        file, then reset them for the next frame."""
+        for phase, duration in self.frame_times.items():
+            samples = self.samples[phase]
+            histogram = self.histograms[phase]
+            # remove the sample about to drop out of the history
+            if len(samples) == samples.maxlen:
+                histogram[bucket_index(samples[0])] -= 1
+            samples.append(duration)
+            histogram[bucket_index(duration)] += 1
+
+        for counter, value in self.frame_counts.items():
+            self.samples[counter].append(value)
+
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(
+                [self.frame] +
+                [self.frame_times[phase] for phase in self.phases] +
+                [self.frame_counts[counter] for counter in self.counters])
+
+        self.frame += 1
+        self.frame_times = dict.fromkeys(self.phases, 0)
+        self.frame_counts = dict.fromkeys(self.counters, 0)
+
+    def mean(self, name):
+        """Return the mean of a phase (in ms) or counter over the history."""
+        samples = self.samples[name]
+        if not samples:
+            return 0
+        mean = sum(samples) / len(samples)
+        if name in self.histograms:
+            return mean / 1000000
+        return mean
+
+    def maximum(self, name):
+        """Return the maximum of a phase (in ms) or counter over the
+        history."""
+        samples = self.samples[name]
+        if not samples:
+            return 0
+        if name in self.histograms:
+            return max(samples) / 1000000
+        return max(samples)
+
+    def percentile(self, phase, fraction):
+        """Return the time (in ms) that the given fraction of a phase's
+        times over the history are below, e.g. 0.95 for the 95th percentile.
+        Read from the histogram, so it's the upper bound of the bucket the
+        percentile falls into, or the maximum if it's in the last bucket."""
+        histogram = self.histograms[phase]
+        # number of samples at or below the percentile
+        target = fraction * len(self.samples[phase])
+        seen = 0
+        for upper, count in zip(HISTOGRAM_BUCKETS, histogram):
+            seen += count
+            if seen and seen >= target:
+                return upper / 1000
+        return self.maximum(phase)
+
+    def open_csv(self, path):
+        """Write every following frame's phase times (in ns) and counters to a
+        CSV file."""
+        self.close_csv()
+        # newline="" stops the csv module writing blank lines on Windows
+        self.csv_file = open(path, "w", newline="")
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow(["frame"] +
+                                 [f"{phase}_ns" for phase in self.phases] +
+                                 list(self.counters))
+
+    def close_csv(self):
+        """Stop writing frames to the CSV file and close it."""
+        if self.csv_file is not None:
+            self.csv_file.close()
+        self.csv_file = None
+        self.csv_writer = None
+
+
+class ProfilerOverlay():
+    """Class for an on screen breakdown of a FrameProfiler's phases and
+    counters. The text is rebuilt every refresh_rate frames while shown."""
+    def __init__(self, profiler, startx, starty, refresh_rate=30, size=12):
+        self.profiler = profiler
+        self.startx = startx
+        self.starty = starty
+        self.refresh_rate = refresh_rate
+        self.size = size
+
+        # one text sprite per line, created when first shown
+        self.lines = pygame.sprite.Group()
+        self.shown = False
+
+    def build_lines(self):
+        """Return the text for each line of the overlay."""
+        lines = ["phase           mean ms  p95 ms  p99 ms   max ms"]
+        total = 0
+        for phase in self.profiler.phases:
+            mean = self.profiler.mean(phase)
+            total += mean
+            lines.append(f"{phase:<15} {mean:>7.3f} "
+                         f"{self.profiler.percentile(phase, 0.95):>7.3f} "
+                         f"{self.profiler.percentile(phase, 0.99):>7.3f} "
+                         f"{self.profiler.maximum(phase):>8.3f}")
+        lines.append(f"{'total':<15} {total:>7.3f}")
+        for counter in self.profiler.counters:
+            lines.append(f"{counter:<15} {self.profiler.mean(counter):>7.0f} "
+                         f"{'':>15} "
+                         f"{self.profiler.maximum(counter):>8.0f}")
+        return lines
+
+    def toggle(self, sprites, layer):
+        """Show or hide the overlay by adding its line sprites to or removing
+        them from a LayeredDirty sprite group."""
+        if self.shown:
+            for line in self.lines:
+                line.kill()
+            self.shown = False
+        else:
+            self.lines.empty()
+            for i, text in enumerate(self.build_lines()):
+                line = Text(text, self.size, "top_left", WHITE, BLACK,
+                            self.startx, self.starty + i * (self.size + 4))
+                self.lines.add(line)
+                sprites.add(line, layer=layer)
+            self.shown = True
+
+    def update(self):
+        """Refresh the overlay text if shown and due a refresh."""
+        if self.shown and self.profiler.frame % self.refresh_rate == 0:
+            for line, text in zip(self.lines, self.build_lines()):
+                if line.text != text:
+                    line.text = text
@@ -0,0 +1,72 @@
+"""Render Cache Module"""
+from collections import OrderedDict
+
+
+class RenderCache():
+    """Class for a least recently used cache of rendered surfaces.
+
+    Surfaces are stored against a key describing what was rendered (e.g.
+    text, size and colours) so rendering the same thing again reuses the
+    stored surface. The cache is bounded by the memory the surfaces' pixels
+    take up: once max_bytes is exceeded the least recently used surfaces are
+    dropped. Cached surfaces are shared, so they must not be drawn on.
+
+    Hits, misses and evictions are counted to help tune max_bytes."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+
+        # key: surface, ordered from least to most recently used
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        """Return the memory taken up by a surface's pixels."""
+        return surface.get_pitch() * surface.get_height()
+
+    def get(self, key, render, *args):
+        """Return the surface stored for key. If not stored, render is called
+        with args to create the surface, which is then stored."""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = render(*args)
+
+        size = self.surface_bytes(surface)
+        # surfaces bigger than the whole cache aren't worth storing
+        if size <= self.max_bytes:
+            self.surfaces[key] = surface
+            self.bytes += size
+            self.evict()
+        return surface
+
+    def evict(self):
+        """Drop least recently used surfaces until within max_bytes."""
+        while self.bytes > self.max_bytes:
+            _, surface = self.surfaces.popitem(last=False)
+            self.bytes -= self.surface_bytes(surface)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all stored surfaces."""
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Return a dictionary of the cache's usage statistics."""
+        lookups = self.hits + self.misses
+        return {"entries": len(self.surfaces),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0}
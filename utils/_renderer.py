@@ -0,0 +1,164 @@
+"""Renderer Module"""
+import pygame
+from ._settings import DIRTY_RECT_RENDERING
+from ._surfaces import new_surface
+
+
+# number of projectile rects above which redrawing the whole screen is quicker
+# than redrawing the regions the projectiles moved between
+PROJECTILE_RECT_LIMIT = 400
+
+# sprites on this layer and above (e.g. the HUD) are fixed to the screen,
+# sprites on lower layers are part of the level and move with the camera
+SCREEN_LAYER = 5
+
+
+def draw_level(surface, sprites, projectiles=None, offset=(0, 0)):
+    """Blit every sprite in a LayeredDirty group onto a surface, whether or
+    not it has changed, then the projectiles of a projectile store over them.
+    Used to draw a frozen game level underneath overlay screens without
+    disturbing the group's dirty rect bookkeeping, and to draw scrolled
+    levels.
+
+    Sprites below SCREEN_LAYER and projectiles are shifted by -offset (the
+    camera's position), and level sprites that end up off the surface are
+    skipped."""
+    surface_rect = surface.get_rect()
+    offset_x, offset_y = offset
+    for layer in sprites.layers():
+        for sprite in sprites.get_sprites_from_layer(layer):
+            if layer >= SCREEN_LAYER:
+                surface.blit(sprite.image, sprite.rect)
+                continue
+            rect = sprite.rect.move(-offset_x, -offset_y)
+            if rect.colliderect(surface_rect):
+                surface.blit(sprite.image, rect)
+
+    if projectiles is not None:
+        projectiles.draw(surface, offset)
+
+
+def frozen_backdrop(draw_backdrop, size, colour, alpha=200):
+    """Return a display format surface of the given size holding a level
+    drawn by draw_backdrop (e.g. LevelMain.draw_backdrop) on a background of
+    the given colour, tinted by a layer of the same colour with the given
+    alpha.
+
+    Overlay screens draw this once when they open and blit it every frame,
+    as the level underneath doesn't change while they are shown."""
+    backdrop = new_surface(size)
+    backdrop.fill(colour)
+    draw_backdrop(backdrop)
+
+    tint = pygame.Surface(size)
+    tint.fill(colour)
+    tint.set_alpha(alpha)
+    backdrop.blit(tint.convert_alpha(), (0, 0))
+    return backdrop
+
+
+class Renderer():
+    """Class for drawing a pygame.sprite.LayeredDirty group of DirtySprites,
+    and optionally a store of projectiles on top of them, to the display.
+
+    In dirty rect mode only the regions of the screen that changed since the
+    last frame are redrawn and pushed to the display. Otherwise the whole
+    window is redrawn and flipped every frame. The number of pixels pushed to
+    the display on the last frame is stored in pixels_pushed.
+
+    If a camera is set and has scrolled away from the top left of the level,
+    every level sprite is in a different place on screen each time it moves,
+    so the whole window is redrawn with draw_level() instead."""
+    def __init__(self, screen, bgcolour, dirty=DIRTY_RECT_RENDERING):
+        self.screen = screen
+        self.dirty = dirty
+
+        # background used to clear the areas sprites have moved away from
+        self.background = new_surface(screen.get_size())
+        self.background.fill(bgcolour)
+
+        self.sprites = None
+
+        # projectile store and the rects its projectiles were last drawn at
+        self.projectiles = None
+        self.projectile_rects = []
+
+        # camera of a scrolling level and its offset on the last frame
+        self.camera = None
+        self.last_offset = (0, 0)
+
+        # regions drawn by the last draw call
+        self.rects = []
+        self.pixels_pushed = 0
+
+    def set_sprites(self, sprites):
+        """Set the sprite group to draw and redraw the whole screen on the
+        next frame."""
+        self.sprites = sprites
+        self.sprites.clear(self.screen, self.background)
+        self.repaint()
+
+    def set_projectiles(self, projectiles):
+        """Set the projectile store to draw over the sprite group."""
+        self.projectiles = projectiles
+        self.projectile_rects = []
+
+    def set_camera(self, camera):
+        """Set the camera that level sprites are drawn relative to."""
+        self.camera = camera
+        self.last_offset = (0, 0)
+
+    def repaint(self):
+        """Mark the whole screen to be redrawn on the next frame, e.g. after
+        another screen has been drawn over it."""
+        self.sprites.repaint_rect(self.screen.get_rect())
+
+    def draw(self):
+        """Draw the sprite group onto the screen surface, then the
+        projectiles. Projectiles aren't sprites, so the regions they were
+        drawn at last frame are marked to be redrawn, clearing them."""
+        offset = (0, 0) if self.camera is None else self.camera.offset
+        if offset != (0, 0) or self.last_offset != (0, 0):
+            self.draw_scrolled(offset)
+            return
+
+        if self.projectiles is not None and self.dirty:
+            if (len(self.projectile_rects) + len(self.projectiles) >
+               PROJECTILE_RECT_LIMIT):
+                self.repaint()
+            else:
+                for rect in self.projectile_rects:
+                    self.sprites.repaint_rect(rect)
+
+        if not self.dirty:
+            self.repaint()
+        self.rects = self.sprites.draw(self.screen)
+
+        if self.projectiles is not None:
+            self.projectile_rects = self.projectiles.draw(self.screen)
+            self.rects = self.rects + self.projectile_rects
+
+    def draw_scrolled(self, offset):
+        """Redraw the whole screen with the level shifted by the camera's
+        offset."""
+        self.screen.blit(self.background, (0, 0))
+        draw_level(self.screen, self.sprites, self.projectiles, offset)
+        self.rects = [self.screen.get_rect()]
+        self.projectile_rects = []
+
+        # back at the top left, the sprite group has to redraw everything
+        # over the scrolled frame next time
+        if offset == (0, 0):
+            self.repaint()
+        self.last_offset = offset
+
+    def flip(self):
+        """Push the regions drawn by the last draw call to the display."""
+        if self.dirty:
+            pygame.display.update(self.rects)
+            self.pixels_pushed = sum(rect.width * rect.height
+                                     for rect in self.rects)
+        else:
+            pygame.display.flip()
+            self.pixels_pushed = (self.screen.get_width() *
+                                  self.screen.get_height())
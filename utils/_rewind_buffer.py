@@ -0,0 +1,78 @@
+"""Rewind Buffer Module"""
+import numpy
+
+
+class RewindBuffer():
+    """Class for a ring buffer of packed per-step level states, for rewinding
+    the most recent steps of play.
+
+    Every array is allocated up front, so memory use is fixed: each of the
+    frames slots holds a tick count, up to entities records of entity_dtype
+    and up to projectiles records of projectile_dtype. Once full, recording
+    a step overwrites the oldest one. Steps are taken back newest first with
+    pop().
+
+    A step with more entities or projectiles than fit can't be recorded.
+    The buffer is emptied instead, as the steps before it could no longer be
+    rewound to in order."""
+    def __init__(self, frames, entities, projectiles, entity_dtype,
+                 projectile_dtype):
+        self.ticks = numpy.zeros(frames, dtype=numpy.int64)
+        self.entity_counts = numpy.zeros(frames, dtype=numpy.int32)
+        self.projectile_counts = numpy.zeros(frames, dtype=numpy.int32)
+        self.entities = numpy.zeros((frames, entities), dtype=entity_dtype)
+        self.projectiles = numpy.zeros((frames, projectiles),
+                                       dtype=projectile_dtype)
+
+        # slot of the newest step and the number of steps held
+        self.newest = -1
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """Property decorator getter for the memory used by the buffer"""
+        return sum(array.nbytes for array in (self.ticks, self.entity_counts,
+                                              self.projectile_counts,
+                                              self.entities,
+                                              self.projectiles))
+
+    def clear(self):
+        """Forget every recorded step."""
+        self.newest = -1
+        self.count = 0
+
+    def record(self, ticks, entity_records, projectile_store):
+        """Record a step: the tick count, a list of entity record tuples and
+        the live projectiles of a projectile store (see
+        ProjectileStore.pack). Returns if the step was recorded."""
+        if (len(entity_records) > self.entities.shape[1] or
+           len(projectile_store) > self.projectiles.shape[1]):
+            self.clear()
+            return False
+
+        frame = (self.newest + 1) % len(self.ticks)
+        self.newest = frame
+        self.count = min(self.count + 1, len(self.ticks))
+
+        self.ticks[frame] = ticks
+        self.entity_counts[frame] = len(entity_records)
+        self.entities[frame, :len(entity_records)] = entity_records
+        self.projectile_counts[frame] = projectile_store.pack(
+            self.projectiles[frame])
+        return True
+
+    def pop(self):
+        """Remove the newest step and return its (tick count, entity records,
+        projectile records), or None if no steps are held. The records are
+        views of the buffer, only valid until the next step is recorded."""
+        if not self.count:
+            return None
+        frame = self.newest
+        self.newest = (frame - 1) % len(self.ticks)
+        self.count -= 1
+        return (int(self.ticks[frame]),
+                self.entities[frame, :self.entity_counts[frame]],
+                self.projectiles[frame, :self.projectile_counts[frame]])
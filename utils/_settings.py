@@ -3,6 +3,16 @@ WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 FPS = 60
 
+# simulation steps per second. Speeds are tuned for 60 steps per second and
+# are scaled to match at other rates, e.g. 30 halves the simulation's CPU use
+TICK_RATE = 60
+
+# move sprites by sweeping them through the tile map, stopping where they
+# first touch a platform, so they can't pass through platforms however fast
+# they go. Set to False to fall back to moving then pushing sprites out of
+# the platforms they overlap, which is only correct for small velocities
+SWEPT_COLLISION = True
+
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 RED = (255, 0, 0)
@@ -15,3 +25,46 @@ ORANGE = (252, 127, 3)
 CYAN = (3, 252, 240)
 DARK_GREEN = (14, 156, 14)
 DARK_RED = (199, 18, 18)
+
+# bits per pixel of sprite surfaces made before a display has been set up
+# (e.g. headless tools), the format they would be converted to. Once a
+# display is set up, surfaces are made in its format instead
+HEADLESS_SURFACE_DEPTH = 32
+
+# redraw only the changed regions of the game level each frame, set to False
+# to fall back to redrawing the whole window every frame
+DIRTY_RECT_RENDERING = True
+
+# only redraw menu screens when something on them changes, waiting for
+# events in between rather than redrawing them every frame. Set to False to
+# fall back to redrawing menus every frame
+MENU_RENDER_ON_DEMAND = True
+
+# longest time in milliseconds an unchanged menu waits for an event, so
+# changes made to the config file outside the game are still picked up
+MENU_IDLE_TIMEOUT = 1000
+
+# directory to write each level's per-frame phase timings to as CSV files,
+# None to disable
+PROFILE_CSV_DIRECTORY = None
+
+# directory to save a recording of the input and random seed of each level
+# played to, None to disable. Recordings replay the level exactly, e.g. with
+# "python benchmark.py replay DIRECTORY"
+RECORDING_DIRECTORY = None
+
+# seconds of play that can be rewound by holding R, and the most entities
+# and projectiles recorded each step. These fix the memory used, about
+# (109 * REWIND_ENTITIES + 40 * REWIND_PROJECTILES) bytes per step recorded.
+# Steps with more entities or projectiles can't be rewound past
+REWIND_SECONDS = 5
+REWIND_ENTITIES = 128
+REWIND_PROJECTILES = 128
+
+# compile maps into binary files next to their source files the first time
+# they're loaded, and memory-map the compiled files on later loads. Compiled
+# files are rebuilt when their source files change
+MAP_CACHE = True
+
+# memory in bytes the cache of rendered text surfaces can use
+TEXT_CACHE_BYTES = 4 * 1024 * 1024
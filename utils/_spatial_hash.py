@@ -0,0 +1,169 @@
+"""Spatial Hash Module"""
+import numpy
+
+
+# multiplier combining a cell's row and column into one integer key, large
+# enough that keys are unique for any realistic column (including negative)
+KEY_STRIDE = 1 << 32
+
+
+class SpatialHash():
+    """Class for finding which sprites are near a point or area.
+
+    The level is divided into a uniform grid of square cells and each
+    sprite is listed against every cell its rect overlaps. A query then only
+    needs to check the sprites listed in the cells the query area overlaps,
+    rather than every sprite, so the cost of a query depends on how crowded
+    the area is and not on how many sprites there are in total.
+
+    The hash is rebuilt from the sprites' current rects with rebuild(), e.g.
+    once per simulation step after sprites have moved. Besides single rect
+    queries, query_boxes() finds the overlaps of many small boxes (such as
+    projectiles) at once using NumPy, on arrays built from the hash the first
+    time they're needed after a rebuild."""
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+
+        # sprites in the hash and a list of sprites for each cell key
+        self.items = []
+        self.cells = {}
+
+        # every (cell key, item index) pair sorted by key, and the left, top,
+        # right and bottom of each item's rect, for batched queries. Only
+        # worked out when first needed after a rebuild
+        self.pairs = []
+        self.arrays = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def cell_range(self, rect):
+        """Return the (first row, last row, first column, last column) of the
+        cells overlapped by a rect. The right and bottom edges are exclusive
+        so are reduced by one."""
+        size = self.cell_size
+        return (rect.top // size, (rect.bottom - 1) // size,
+                rect.left // size, (rect.right - 1) // size)
+
+    def rebuild(self, items):
+        """Empty the hash and add each sprite in items at its rect's current
+        location."""
+        self.items = list(items)
+        self.cells = {}
+        self.pairs = []
+        self.arrays = None
+
+        cells = self.cells
+        for index, item in enumerate(self.items):
+            first_row, last_row, first_col, last_col = self.cell_range(
+                item.rect)
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    key = row * KEY_STRIDE + col
+                    if key in cells:
+                        cells[key].append(item)
+                    else:
+                        cells[key] = [item]
+                    self.pairs.append((key, index))
+
+    def batch_arrays(self):
+        """Return the (keys, indexes, bounds) arrays used by batched
+        queries, creating them if the hash has been rebuilt since."""
+        if self.arrays is None:
+            # sort pairs by key so the pairs for a cell can be found by binary
+            # search
+            pairs = numpy.array(self.pairs, dtype=numpy.int64).reshape(-1, 2)
+            order = numpy.argsort(pairs[:, 0], kind="stable")
+            bounds = numpy.array([(item.rect.left, item.rect.top,
+                                   item.rect.right, item.rect.bottom)
+                                  for item in self.items],
+                                 dtype=float).reshape(-1, 4)
+            self.arrays = (pairs[order, 0], pairs[order, 1], bounds)
+        return self.arrays
+
+    def query_rect(self, rect):
+        """Return a list of the sprites whose rects overlap a rect."""
+        found = []
+        seen = set()
+        first_row, last_row, first_col, last_col = self.cell_range(rect)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                for item in self.cells.get(row * KEY_STRIDE + col, ()):
+                    if item not in seen and item.rect.colliderect(rect):
+                        seen.add(item)
+                        found.append(item)
+        return found
+
+    def query_boxes(self, left, top, right, bottom):
+        """Find every overlap between a batch of boxes and the sprites in the
+        hash. The boxes are given as arrays of their edges (right and bottom
+        exclusive, fractions allowed) and must be no bigger than a cell, so
+        each overlaps at most 2x2 cells.
+
+        Returns two arrays: the index of the box and the index in self.items
+        of the sprite for each overlapping pair. A pair can be found through
+        several cells that both overlap, so it is only kept from the cell
+        holding the top left corner of the overlap, which both always
+        overlap."""
+        size = self.cell_size
+        box_count = len(left)
+        if not box_count or not self.pairs:
+            empty = numpy.zeros(0, dtype=numpy.int64)
+            return empty, empty
+        cell_keys, cell_indexes, bounds = self.batch_arrays()
+
+        first_col = numpy.floor(left / size).astype(numpy.int64)
+        first_row = numpy.floor(top / size).astype(numpy.int64)
+        last_col = numpy.ceil(right / size).astype(numpy.int64) - 1
+        last_row = numpy.ceil(bottom / size).astype(numpy.int64) - 1
+
+        # the corner cells of each box, skipping corners in the same cell
+        # as an earlier corner
+        corners = ((first_col, first_row, None),
+                   (last_col, first_row, last_col != first_col),
+                   (first_col, last_row, last_row != first_row),
+                   (last_col, last_row, (last_col != first_col) &
+                    (last_row != first_row)))
+
+        found_boxes = []
+        found_items = []
+        for cols, rows, wanted in corners:
+            boxes = numpy.arange(box_count)
+            if wanted is not None:
+                boxes = boxes[wanted]
+            keys = rows[boxes] * KEY_STRIDE + cols[boxes]
+
+            # range of (key, item index) pairs listed for each box's cell
+            starts = numpy.searchsorted(cell_keys, keys, side="left")
+            counts = numpy.searchsorted(cell_keys, keys, side="right") - starts
+            total = int(counts.sum())
+            if not total:
+                continue
+
+            # one entry per (box, item in the box's cell)
+            boxes = numpy.repeat(boxes, counts)
+            offsets = numpy.arange(total) - numpy.repeat(
+                numpy.cumsum(counts) - counts, counts)
+            items = cell_indexes[numpy.repeat(starts, counts) + offsets]
+
+            # keep pairs that overlap, from the cell holding the overlap's
+            # top left corner
+            item_bounds = bounds[items]
+            overlap_left = numpy.maximum(left[boxes], item_bounds[:, 0])
+            overlap_top = numpy.maximum(top[boxes], item_bounds[:, 1])
+            keep = ((overlap_left < numpy.minimum(right[boxes],
+                                                  item_bounds[:, 2])) &
+                    (overlap_top < numpy.minimum(bottom[boxes],
+                                                 item_bounds[:, 3])) &
+                    (numpy.floor(overlap_left / size) == cols[boxes]) &
+                    (numpy.floor(overlap_top / size) == rows[boxes]))
+            found_boxes.append(boxes[keep])
+            found_items.append(items[keep])
+
+        if not found_boxes:
+            empty = numpy.zeros(0, dtype=numpy.int64)
+            return empty, empty
+        return numpy.concatenate(found_boxes), numpy.concatenate(found_items)
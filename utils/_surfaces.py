@@ -0,0 +1,48 @@
+"""Surface Factory Module"""
+import pygame
+from ._settings import HEADLESS_SURFACE_DEPTH
+
+
+def new_surface(size, colorkey=None, alpha=None):
+    """Return a new surface of the given size in the display's pixel format,
+    so blitting it to the display needs no conversion. Without a display
+    (e.g. when running headless before a mode is set) surfaces are made with
+    HEADLESS_SURFACE_DEPTH bits per pixel instead.
+
+    If colorkey is given the surface is filled with it and it is set as the
+    surface's colour key. alpha sets the surface's opacity. Both are set
+    with RLEACCEL, so the surface is run-length encoded on its first blit
+    and later blits copy whole runs of pixels instead of checking every
+    pixel. Drawing onto the surface again undoes the encoding until its next
+    blit, so this suits surfaces that are drawn once and blitted often."""
+    display = pygame.display.get_surface()
+    if display is not None:
+        surface = pygame.Surface(size, 0, display)
+    else:
+        surface = pygame.Surface(size, 0, HEADLESS_SURFACE_DEPTH)
+
+    if colorkey is not None:
+        surface.fill(colorkey)
+        surface.set_colorkey(colorkey, pygame.RLEACCEL)
+    if alpha is not None:
+        surface.set_alpha(alpha, pygame.RLEACCEL)
+    return surface
+
+
+def converted_surface(image, colorkey=None, alpha=None):
+    """Return a copy of a surface, e.g. a loaded image, in the pixel format
+    made by new_surface(), with the given colour key and alpha. Any per
+    pixel alpha in the image is dropped, as with Surface.convert(), but
+    this also works without a display."""
+    surface = new_surface(image.get_size())
+
+    # copy the colour of each pixel without blending in its alpha
+    image = image.copy()
+    image.set_alpha(None)
+    surface.blit(image, (0, 0))
+
+    if colorkey is not None:
+        surface.set_colorkey(colorkey, pygame.RLEACCEL)
+    if alpha is not None:
+        surface.set_alpha(alpha, pygame.RLEACCEL)
+    return surface
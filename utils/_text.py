@@ -1,10 +1,47 @@
 """Text Class Module"""
+import threading
 import pygame
 import pygame.freetype
 from ._functions import check_alignment, align
+from ._render_cache import RenderCache
+from ._settings import TEXT_CACHE_BYTES
 
 
-class Text(pygame.sprite.Sprite):
+# font file used for all text
+FONT_PATH = "assets/PressStart2P-Regular.ttf"
+
+# shared font object, loaded the first time text is rendered
+shared_font = None
+
+# rendered text surfaces, shared by all text sprites (and so buttons)
+text_cache = RenderCache(TEXT_CACHE_BYTES)
+
+# held while using the shared font or text cache, which aren't thread safe,
+# so text can be created on a level prefetch thread while the main thread
+# renders
+font_lock = threading.RLock()
+
+
+def get_font():
+    """Return the font object shared by all text sprites, loading it if not
+    yet loaded. The font is loaded once per process and the size is given on
+    each render/measure call instead of loading a font per size."""
+    global shared_font  # pylint: disable=global-statement
+    with font_lock:
+        if shared_font is None:
+            # parameters: font file/name, default font size
+            shared_font = pygame.freetype.Font(FONT_PATH, 20)
+    return shared_font
+
+
+def colour_key(colour):
+    """Return a colour in a hashable form for use in a cache key."""
+    if colour is None:
+        return None
+    return tuple(colour)
+
+
+class Text(pygame.sprite.DirtySprite):
     """Class for creating text sprites in pygame significantly more easily and
     more organised. """
     def __init__(self, text, size, alignment, fgcolour, bgcolour, startx,
@@ -19,8 +56,8 @@ class Text(pygame.sprite.Sprite):
         self._starty = starty
         self.font_size = 20
 
-        # ----- instantiate font object instance ----- #
-        self.update_font()
+        # ----- get shared font object ----- #
+        self.font = get_font()
 
         # ----- configure text sprite alignment ----- #
         self.alignment = check_alignment(alignment)
@@ -43,45 +80,54 @@ class Text(pygame.sprite.Sprite):
         """Procedure that finds and sets the maximum font size that can fit
         inside the given dimensions.
 
-        A while loop is used to iterate through different font sizes.
-        If font size too big, font size decreased with the upper variable
-        telling the procedure that the font was previously too big;
-        otherwise font size increased.
-
-        If font size not too big and upper variable is true, we know the
-        current font in self.font_size is the maximum integer font size."""
+        The text is only measured (not rendered) at each size tried. Text
+        size grows roughly in proportion to font size, so measuring at the
+        current font size gives a close estimate. Steps of doubling size are
+        taken from the estimate until a size that fits (lower) and a size
+        that doesn't (upper) are found, then a binary search narrows the
+        range until they are next to each other and lower is the maximum
+        integer font size. Sizes are kept at least 1."""
         dimensions_x, dimensions_y = desired_dimensions
-        fitting = True
-        upper = False
-
-        # while loop to find biggest font that fits in dimensions
-        while fitting:
-            # update font sprite with new font size
-            self.update()
+        with font_lock:
+            rect = self.font.get_rect(self.text, size=self.font_size)
+        scale = min(dimensions_x / max(rect.width, 1),
+                    dimensions_y / max(rect.height, 1))
+        estimate = max(int(self.font_size * scale), 1)
+
+        step = 1
+        if self.fits(estimate, desired_dimensions):
+            # step up until too big
+            lower = estimate
+            while self.fits(lower + step, desired_dimensions):
+                lower += step
+                step *= 2
+            upper = lower + step
+        else:
+            # step down until fitting (or the smallest size is reached)
+            upper = estimate
+            while (upper - step > 1 and
+                   not self.fits(upper - step, desired_dimensions)):
+                upper -= step
+                step *= 2
+            lower = max(upper - step, 1)
+
+        # binary search between the fitting and too big sizes
+        while upper - lower > 1:
+            middle = (lower + upper) // 2
+            if self.fits(middle, desired_dimensions):
+                lower = middle
+            else:
+                upper = middle
 
-            # check if sprite bigger than desired dimensions
-            if ((self.rect.width > dimensions_x) or
-               (self.rect.height > dimensions_y)):
-                # decrease font size
-                self.font_size -= 1
-                # tell function we were too big
-                upper = True
+        self.font_size = lower
 
-            # sprite is within desired dimensions
-            else:
-                # if previously too big
-                if upper:
-                    # this is the maximum font size that fits, so end loop
-                    fitting = False
-                # otherwise too small, increase font size
-                else:
-                    self.font_size += 1
-
-    def update_font(self):
-        """Update the Font object with new font size."""
-        # parameters: font file/name, font size
-        self.font = pygame.freetype.Font("assets/PressStart2P-Regular.ttf",
-                                         self.font_size)
+    def fits(self, font_size, desired_dimensions):
+        """Return if the text at the given font size fits inside the given
+        dimensions, measuring it without rendering."""
+        dimensions_x, dimensions_y = desired_dimensions
+        with font_lock:
+            rect = self.font.get_rect(self.text, size=font_size)
+        return rect.width <= dimensions_x and rect.height <= dimensions_y
 
     def rect_info(self):
         """For debugging, outputs generated text sprite's rect details
@@ -95,15 +141,27 @@ class Text(pygame.sprite.Sprite):
         self.number += 1
         self.text = "Score: " + str(self.number)
 
+    def render(self):
+        """Render the text to a new surface and return it."""
+        # function returns text as rendered surface and rect object instance
+        # parameters: text, fgcolour, bgcolour, size
+        surface, _ = self.font.render(self.text, self.fgcolour, self.bgcolour,
+                                      size=self.font_size)
+        return surface
+
     def update(self):
-        """Update the sprite's font, image and rect"""
-        # function returns text as rendered syrface and rect object instance
-        # parameters: text, fgcolour, bgcolour
-        self.update_font()
-        self.image, self.rect = self.font.render(self.text, self.fgcolour,
-                                                 self.bgcolour)
+        """Update the sprite's image and rect, reusing a previously rendered
+        surface of the same text, size and colours if there is one"""
+        key = (self.text, self.font_size, colour_key(self.fgcolour),
+               colour_key(self.bgcolour))
+        with font_lock:
+            self.image = text_cache.get(key, self.render)
+        self.rect = self.image.get_rect()
         align(self.alignment, self.rect, self.startx, self.starty)
 
+        # redraw sprite on next frame
+        self.dirty = 1
+
     @property
     def text(self):
         """Property decorator for text attribute"""
@@ -0,0 +1,333 @@
+"""Tile Map Module"""
+import numpy
+import pygame
+
+
+# --------------- Tile Types --------------- #
+EMPTY = 0
+PLATFORM = 1
+SPAWN = 2
+FINISH = 3
+ENEMY = 4
+
+
+class TileMap():
+    """Class to answer collision queries against a level's tile grid.
+
+    Tiles are stored row by row in a flat sequence of tile type integers, so
+    finding the tiles under a rect is a matter of indexing the grid cells the
+    rect covers. The cost of a query depends on the size of the rect, not on
+    how many platforms the map has.
+
+    Platforms don't move, so a floor index is also built when the map is
+    created: the walkable span (run of neighbouring platforms in a row) each
+    platform belongs to, and the number of platforms in each column above
+    each row. Floor edge and wall lookups for patrolling sprites are then a
+    few table reads. A floor index built earlier (e.g. loaded from a compiled
+    map file) can be passed in as (span_lefts, span_rights, column_counts)
+    instead.
+
+    tiles and the floor index can be any sequences of integers, e.g.
+    memoryviews of a memory-mapped file."""
+    def __init__(self, tiles, columns, rows, tile_size, floor_index=None):
+        self.tiles = tiles
+        self.columns = columns
+        self.rows = rows
+        self.tile_size = tile_size
+
+        # map dimensions in pixels
+        self.width = columns * tile_size
+        self.height = rows * tile_size
+
+        if floor_index is None:
+            self.build_floor_index()
+        else:
+            self.span_lefts, self.span_rights, self.column_counts = (
+                floor_index)
+
+    def build_floor_index(self):
+        """Work out the walkable span of every platform tile and count the
+        platforms in each column, for floor_edges() and wall_beside()."""
+        size = self.tile_size
+
+        # left and right edge in pixels of the span each tile is in, indexed
+        # like tiles, -1 for tiles that aren't platforms
+        self.span_lefts = [-1] * len(self.tiles)
+        self.span_rights = [-1] * len(self.tiles)
+        for row in range(self.rows):
+            start = row * self.columns
+            col = 0
+            while col < self.columns:
+                if self.tiles[start + col] != PLATFORM:
+                    col += 1
+                    continue
+                # find the end of this run of platforms
+                end = col
+                while (end + 1 < self.columns and
+                       self.tiles[start + end + 1] == PLATFORM):
+                    end += 1
+                for span_col in range(col, end + 1):
+                    self.span_lefts[start + span_col] = col * size
+                    self.span_rights[start + span_col] = (end + 1) * size
+                col = end + 1
+
+        # column_counts[col * (rows + 1) + row] is the number of platforms in
+        # the column above the row, so the platforms in any range of rows is
+        # the difference of two counts
+        self.column_counts = []
+        for col in range(self.columns):
+            count = 0
+            self.column_counts.append(count)
+            for row in range(self.rows):
+                if self.tiles[row * self.columns + col] == PLATFORM:
+                    count += 1
+                self.column_counts.append(count)
+
+    @classmethod
+    def from_rows(cls, gamemap, tile_size):
+        """Create a tile map from a 2D list of tile types (list of rows)."""
+        rows = len(gamemap)
+        columns = max((len(row) for row in gamemap), default=0)
+
+        tiles = bytearray(columns * rows)
+        for row_index, row in enumerate(gamemap):
+            start = row_index * columns
+            tiles[start:start + len(row)] = bytes(row)
+
+        return cls(tiles, columns, rows, tile_size)
+
+    def locate(self, tile_type):
+        """Return a list of the (row, column) of every tile of tile_type, row
+        by row."""
+        tiles = numpy.frombuffer(self.tiles, dtype=numpy.uint8)
+        indexes = numpy.flatnonzero(tiles == tile_type).tolist()
+        return [divmod(index, self.columns) for index in indexes]
+
+    def tile(self, row, col):
+        """Return the tile type at a grid location. Locations outside the map
+        are treated as empty."""
+        if 0 <= row < self.rows and 0 <= col < self.columns:
+            return self.tiles[row * self.columns + col]
+        return EMPTY
+
+    def tile_rect(self, row, col):
+        """Return the rect of the tile at a grid location in pixels."""
+        return pygame.Rect(col * self.tile_size, row * self.tile_size,
+                           self.tile_size, self.tile_size)
+
+    def cell_range(self, rect):
+        """Return the (first row, last row, first column, last column) of the
+        grid cells overlapped by a rect, clamped to the map.
+
+        Rects only overlap a cell if they share at least one pixel with it, so
+        the right and bottom edges (which are exclusive) are reduced by one."""
+        size = self.tile_size
+        first_row = max(rect.top // size, 0)
+        last_row = min((rect.bottom - 1) // size, self.rows - 1)
+        first_col = max(rect.left // size, 0)
+        last_col = min((rect.right - 1) // size, self.columns - 1)
+        return first_row, last_row, first_col, last_col
+
+    def collide_rect(self, rect, tile_type=PLATFORM):
+        """Return a list of rects of tiles of tile_type that overlap a rect.
+        Tiles are returned in row by row order, the same order the map's
+        sprites are created in."""
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+
+        first_row, last_row, first_col, last_col = self.cell_range(rect)
+
+        collisions = []
+        for row in range(first_row, last_row + 1):
+            start = row * self.columns
+            for col in range(first_col, last_col + 1):
+                if self.tiles[start + col] == tile_type:
+                    collisions.append(self.tile_rect(row, col))
+        return collisions
+
+    def any_collision(self, rect, tile_type=PLATFORM):
+        """Return if any tile of tile_type overlaps a rect."""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+
+        first_row, last_row, first_col, last_col = self.cell_range(rect)
+
+        for row in range(first_row, last_row + 1):
+            start = row * self.columns
+            for col in range(first_col, last_col + 1):
+                if self.tiles[start + col] == tile_type:
+                    return True
+        return False
+
+    def sweep_x(self, rect, distance, tile_type=PLATFORM):
+        """Return how far a rect can move horizontally, up to distance
+        (negative for left), before overlapping a tile of tile_type.
+
+        Only the columns the rect's leading edge passes through are checked,
+        nearest first, so the first tile in the way is found however far the
+        rect moves. The result is distance if nothing is in the way, and
+        strictly shorter if something is."""
+        if rect.height <= 0 or distance == 0:
+            return distance
+        size = self.tile_size
+        first_row = max(rect.top // size, 0)
+        last_row = min((rect.bottom - 1) // size, self.rows - 1)
+
+        if distance > 0:
+            # columns entered by the right edge, left to right
+            edge = rect.right
+            columns = range(max(edge // size, 0),
+                            min((edge + distance - 1) // size,
+                                self.columns - 1) + 1)
+        else:
+            # columns entered by the left edge, right to left
+            edge = rect.left
+            columns = range(min((edge - 1) // size, self.columns - 1),
+                            max((edge + distance) // size, 0) - 1, -1)
+
+        for col in columns:
+            for row in range(first_row, last_row + 1):
+                if self.tiles[row * self.columns + col] == tile_type:
+                    # stop against the tile's near side
+                    if distance > 0:
+                        return col * size - edge
+                    return (col + 1) * size - edge
+        return distance
+
+    def sweep_y(self, rect, distance, tile_type=PLATFORM):
+        """Return how far a rect can move vertically, up to distance
+        (negative for up), before overlapping a tile of tile_type. Works as
+        sweep_x() does, checking the rows the leading edge passes through."""
+        if rect.width <= 0 or distance == 0:
+            return distance
+        size = self.tile_size
+        first_col = max(rect.left // size, 0)
+        last_col = min((rect.right - 1) // size, self.columns - 1)
+
+        if distance > 0:
+            # rows entered by the bottom edge, top to bottom
+            edge = rect.bottom
+            rows = range(max(edge // size, 0),
+                         min((edge + distance - 1) // size,
+                             self.rows - 1) + 1)
+        else:
+            # rows entered by the top edge, bottom to top
+            edge = rect.top
+            rows = range(min((edge - 1) // size, self.rows - 1),
+                         max((edge + distance) // size, 0) - 1, -1)
+
+        for row in rows:
+            start = row * self.columns
+            for col in range(first_col, last_col + 1):
+                if self.tiles[start + col] == tile_type:
+                    # stop against the tile's near side
+                    if distance > 0:
+                        return row * size - edge
+                    return (row + 1) * size - edge
+        return distance
+
+    def floor_edges(self, rect):
+        """Return the (left, right) edges in pixels of the floor a rect is
+        standing on: the left edge of the span under the rect's leftmost
+        supported pixel and the right edge of the span under its rightmost.
+        Returns None if no platform is directly beneath the rect."""
+        size = self.tile_size
+        row = rect.bottom // size
+        if not 0 <= row < self.rows or rect.width <= 0:
+            return None
+        first_col = max(rect.left // size, 0)
+        last_col = min((rect.right - 1) // size, self.columns - 1)
+        start = row * self.columns
+
+        # first platform from each side of the rect, usually the first cell
+        lefts = self.span_lefts
+        rights = self.span_rights
+        for col in range(first_col, last_col + 1):
+            if lefts[start + col] >= 0:
+                left = lefts[start + col]
+                break
+        else:
+            return None
+        for col in range(last_col, first_col - 1, -1):
+            if rights[start + col] >= 0:
+                return left, rights[start + col]
+
+    def column_blocked(self, col, first_row, last_row):
+        """Return if any platform is in a column between two rows
+        (inclusive). Locations outside the map are empty."""
+        if not 0 <= col < self.columns:
+            return False
+        first_row = max(first_row, 0)
+        last_row = min(last_row, self.rows - 1)
+        if first_row > last_row:
+            return False
+        start = col * (self.rows + 1)
+        return (self.column_counts[start + last_row + 1] >
+                self.column_counts[start + first_row])
+
+    def wall_beside(self, rect):
+        """Return if a platform is directly left or right of a rect."""
+        size = self.tile_size
+        first_row = rect.top // size
+        last_row = (rect.bottom - 1) // size
+        return (self.column_blocked((rect.left - 1) // size, first_row,
+                                    last_row) or
+                self.column_blocked(rect.right // size, first_row,
+                                    last_row))
+
+    def line_clear(self, point1, point2, width=9):
+        """Return if a line of the given thickness between two points can pass
+        without touching a platform tile.
+
+        Thick lines are drawn by pygame as the segment widened along its
+        minor axis (sideways for steep lines, up/down for shallow lines), so a
+        tile blocks the line if the segment passes through the tile inflated
+        by half the width along that axis. The grid is walked one column strip
+        at a time: the part of the segment inside a strip gives the range of
+        rows it can touch, so only the cells along the line are checked and
+        no surfaces or masks are needed."""
+        half_width = width // 2
+        size = self.tile_size
+
+        # walk the strips from left to right
+        if point1[0] <= point2[0]:
+            (start_x, start_y), (end_x, end_y) = point1, point2
+        else:
+            (start_x, start_y), (end_x, end_y) = point2, point1
+        change_x = end_x - start_x
+        change_y = end_y - start_y
+
+        # steep lines are widened horizontally, shallow lines vertically
+        if abs(change_x) <= abs(change_y):
+            inflate_x, inflate_y = half_width, 0
+        else:
+            inflate_x, inflate_y = 0, half_width
+
+        first_col = max(int((start_x - inflate_x) // size), 0)
+        last_col = min(int((end_x + inflate_x) // size), self.columns - 1)
+
+        for col in range(first_col, last_col + 1):
+            # pixels covered by the column's tiles, inflated along x
+            strip_left = col * size - inflate_x
+            strip_right = (col + 1) * size - 1 + inflate_x
+
+            # clip the segment to the strip to find its y range inside it
+            if change_x == 0:
+                low_y, high_y = start_y, end_y
+            else:
+                clip_start = (max(strip_left, start_x) - start_x) / change_x
+                clip_end = (min(strip_right, end_x) - start_x) / change_x
+                low_y = start_y + change_y * clip_start
+                high_y = start_y + change_y * clip_end
+            if low_y > high_y:
+                low_y, high_y = high_y, low_y
+
+            # the drawn line snaps to the nearest pixel row
+            first_row = max((round(low_y) - inflate_y) // size, 0)
+            last_row = min((round(high_y) + inflate_y) // size,
+                           self.rows - 1)
+
+            for row in range(first_row, last_row + 1):
+                if self.tiles[row * self.columns + col] == PLATFORM:
+                    return False
+        return True